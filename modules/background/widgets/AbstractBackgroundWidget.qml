@@ -2,11 +2,11 @@ pragma ComponentBehavior: Bound
 
 import QtQuick
 import Quickshell
-import Quickshell.Io
 import qs
 import qs.modules.common
 import qs.modules.common.functions
 import qs.modules.common.widgets.widgetCanvas
+import qs.services
 
 AbstractWidget {
     id: root
@@ -17,6 +17,7 @@ AbstractWidget {
     required property int scaledScreenWidth
     required property int scaledScreenHeight
     required property real wallpaperScale
+    property string screenName: ""
     property bool visibleWhenLocked: false
     property var configEntry: Config.options?.background?.widgets?.[configEntryName] ?? {}
     property string placementStrategy: configEntry.placementStrategy
@@ -101,7 +102,9 @@ AbstractWidget {
         const p = (Config.options?.background?.wallpaperPath ?? "").toLowerCase();
         return p.endsWith(".mp4") || p.endsWith(".webm") || p.endsWith(".mkv") || p.endsWith(".avi") || p.endsWith(".mov");
     }
-    property string wallpaperPath: wallpaperIsVideo ? (Config.options?.background?.thumbnailPath ?? "") : (Config.options?.background?.wallpaperPath ?? "")
+    // Playing videos are placed from frames sampled over time; a paused one shows its thumbnail
+    property bool wallpaperAnimated: Config.options?.background?.enableAnimation ?? true
+    property string wallpaperPath: (wallpaperIsVideo && !wallpaperAnimated) ? (Config.options?.background?.thumbnailPath ?? "") : (Config.options?.background?.wallpaperPath ?? "")
     
     onWallpaperPathChanged: _placementDebounce.restart()
     onPlacementStrategyChanged: {
@@ -123,41 +126,41 @@ AbstractWidget {
     }
     function refreshPlacementIfNeeded() {
         if (!Config.ready || (root.placementStrategy === "free" && root.needsColText)) return;
-        leastBusyRegionProc.wallpaperPath = root.wallpaperPath;
-        leastBusyRegionProc.running = false;
-        leastBusyRegionProc.running = true;
-    }
-    Process {
-        id: leastBusyRegionProc
-        property string wallpaperPath: root.wallpaperPath
+        WidgetPlacement.request(root.placementId, root.wallpaperPath, {
+            screen: placementQuery.screen,
+            screen_width: Math.round(root.scaledScreenWidth),
+            screen_height: Math.round(root.scaledScreenHeight),
+            width: placementQuery.contentWidth,
+            height: placementQuery.contentHeight,
+            horizontal_padding: placementQuery.horizontalPadding,
+            vertical_padding: placementQuery.verticalPadding,
+            busiest: root.placementStrategy === "mostBusy",
+            // A free widget only asks for its colour: keep other widgets off
+            // where it really is, not off the spot it would have been placed
+            reserve: root.placementStrategy !== "free",
+            fixed: root.placementStrategy === "free"
+                ? [Math.round(root.targetX / root.wallpaperScale), Math.round(root.targetY / root.wallpaperScale),
+                   Math.round(root.width / root.wallpaperScale), Math.round(root.height / root.wallpaperScale)]
+                : null
+        }, result => root.applyPlacement(result));
+    }
+    function applyPlacement(result) {
+        if (result.error) return;
+        root.dominantColor = result.dominant_color || Appearance.colors.colPrimary;
+        if (root.placementStrategy === "free") return;
+        root.targetX = root._snapToPixel(result.center_x * root.wallpaperScale - root.width / 2);
+        root.targetY  = root._snapToPixel(result.center_y * root.wallpaperScale - root.height / 2);
+    }
+    // Widgets on the same screen are placed in one batch and do not overlap
+    readonly property string placementId: `${configEntryName}@${placementQuery.screen}`
+    Component.onDestruction: WidgetPlacement.cancel(root.placementId)
+    QtObject {
+        id: placementQuery
+        readonly property string screen: root.screenName.length > 0 ? root.screenName : `${Math.round(root.scaledScreenWidth)}x${Math.round(root.scaledScreenHeight)}`
         // TODO: make these less arbitrary
         property int contentWidth: 300
         property int contentHeight: 300
         property int horizontalPadding: 200
         property int verticalPadding: 200
-        command: [Quickshell.shellPath("scripts/images/least-busy-region-venv.sh") // Comments to force the formatter to break lines
-            , "--screen-width", Math.round(root.scaledScreenWidth) //
-            , "--screen-height", Math.round(root.scaledScreenHeight) //
-            , "--width", contentWidth //
-            , "--height", contentHeight //
-            , "--horizontal-padding", horizontalPadding //
-            , "--vertical-padding", verticalPadding //
-            , wallpaperPath //
-            , ...(root.placementStrategy === "mostBusy" ? ["--busiest"] : [])
-            // "--visual-output",
-        ]
-        stdout: StdioCollector {
-            id: leastBusyRegionOutputCollector
-            onStreamFinished: {
-                const output = leastBusyRegionOutputCollector.text;
-                // console.log("[Background] Least busy region output:", output)
-                if (output.length === 0) return;
-                const parsedContent = JSON.parse(output);
-                root.dominantColor = parsedContent.dominant_color || Appearance.colors.colPrimary;
-                if (root.placementStrategy === "free") return;
-                root.targetX = root._snapToPixel(parsedContent.center_x * root.wallpaperScale - root.width / 2);
-                root.targetY  = root._snapToPixel(parsedContent.center_y * root.wallpaperScale - root.height / 2);
-            }
-        }
     }
 }
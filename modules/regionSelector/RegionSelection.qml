@@ -299,17 +299,19 @@ PanelWindow {
         Qt.callLater(() => { root.visible = true; });
     }
 
+    // Coarse content regions show up almost at once; each refined list replaces them
+    readonly property int contentRegionBudgetMs: 1500
     Process {
         id: imageDetectionProcess
         command: ["/usr/bin/bash", "-c", `${Directories.scriptsPath}/images/find-regions-venv.sh ` 
             + `--image '${StringUtils.shellSingleQuoteEscape(root.screenshotPath)}' ` 
             + `--max-width ${Math.round(root.screen.width * root.falsePositivePreventionRatio)} ` 
-            + `--max-height ${Math.round(root.screen.height * root.falsePositivePreventionRatio)} `]
-        stdout: StdioCollector {
-            id: imageDimensionCollector
-            onStreamFinished: {
+            + `--max-height ${Math.round(root.screen.height * root.falsePositivePreventionRatio)} `
+            + `--stream --budget-ms ${root.contentRegionBudgetMs}`]
+        stdout: SplitParser {
+            onRead: data => {
                 try {
-                    const text = imageDimensionCollector.text.trim()
+                    const text = data.trim()
                     if (text) {
                         imageRegions = RegionFunctions.filterImageRegions(
                             JSON.parse(text),
@@ -317,7 +319,7 @@ PanelWindow {
                         );
                     }
                 } catch (e) {
-                    imageRegions = []
+                    // Keep the regions from the previous line
                 }
             }
         }
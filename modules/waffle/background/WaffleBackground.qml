@@ -341,7 +341,8 @@ Variants {
                     scaledScreenWidth: panelRoot.screen.width
                     scaledScreenHeight: panelRoot.screen.height
                     wallpaperScale: 1
-                    wallpaperPath: panelRoot.wallpaperIsVideo
+                    screenName: panelRoot.screen?.name ?? ""
+                    wallpaperPath: panelRoot.wallpaperIsVideo && !panelRoot.enableAnimation
                         ? (panelRoot.wallpaperThumbnail || panelRoot.wallpaperSourceRaw)
                         : panelRoot.wallpaperSourceRaw
                 }
@@ -4,7 +4,6 @@ import qs
 import QtQuick
 import QtQuick.Layouts
 import Quickshell
-import Quickshell.Io
 import qs.modules.common
 import qs.modules.common.functions
 import qs.modules.common.widgets
@@ -21,6 +20,7 @@ AbstractWidget {
     required property int scaledScreenHeight
     required property real wallpaperScale
     required property string wallpaperPath
+    property string screenName: ""
 
     readonly property var clockConfig: Config.options?.waffles?.background?.widgets?.clock ?? {}
     readonly property bool clockEnabled: clockConfig.enable ?? false
@@ -162,10 +162,29 @@ AbstractWidget {
     function refreshPlacementIfNeeded(): void {
         if (!Config.ready || !clockEnabled || placementStrategy === "free" || forceCenter || !wallpaperPath || wallpaperPath.length === 0)
             return
-        leastBusyRegionProc.running = false
-        leastBusyRegionProc.running = true
+        WidgetPlacement.request(placementId, wallpaperPath, {
+            screen: placementQuery.screen,
+            screen_width: Math.round(scaledScreenWidth),
+            screen_height: Math.round(scaledScreenHeight),
+            width: placementQuery.contentWidth,
+            height: placementQuery.contentHeight,
+            horizontal_padding: placementQuery.horizontalPadding,
+            vertical_padding: placementQuery.verticalPadding,
+            busiest: placementStrategy === "mostBusy"
+        }, result => root.applyPlacement(result))
     }
 
+    function applyPlacement(result): void {
+        if (result.error)
+            return
+        root._dominantColor = result.dominant_color || Looks.colors.accent
+        root.targetX = result.center_x * root.wallpaperScale - root.width / 2
+        root.targetY = result.center_y * root.wallpaperScale - root.height / 2
+    }
+
+    readonly property string placementId: `waffleClock@${placementQuery.screen}`
+    Component.onDestruction: WidgetPlacement.cancel(placementId)
+
     onWallpaperPathChanged: refreshPlacementIfNeeded()
     onPlacementStrategyChanged: {
         syncFreePositionFromConfig()
@@ -191,34 +210,13 @@ AbstractWidget {
         precision: root.showSeconds || GlobalStates.screenLocked ? SystemClock.Seconds : SystemClock.Minutes
     }
 
-    Process {
-        id: leastBusyRegionProc
+    QtObject {
+        id: placementQuery
+        readonly property string screen: root.screenName.length > 0 ? root.screenName : `${Math.round(root.scaledScreenWidth)}x${Math.round(root.scaledScreenHeight)}`
         property int contentWidth: Math.max(260, Math.round(root.width))
         property int contentHeight: Math.max(180, Math.round(root.height))
         property int horizontalPadding: Math.max(90, Math.round(root.screenWidth * 0.08))
         property int verticalPadding: Math.max(90, Math.round(root.screenHeight * 0.08))
-        command: [Quickshell.shellPath("scripts/images/least-busy-region-venv.sh"),
-            "--screen-width", Math.round(root.scaledScreenWidth),
-            "--screen-height", Math.round(root.scaledScreenHeight),
-            "--width", contentWidth,
-            "--height", contentHeight,
-            "--horizontal-padding", horizontalPadding,
-            "--vertical-padding", verticalPadding,
-            root.wallpaperPath,
-            ...(root.placementStrategy === "mostBusy" ? ["--busiest"] : [])
-        ]
-        stdout: StdioCollector {
-            id: leastBusyRegionOutputCollector
-            onStreamFinished: {
-                const output = leastBusyRegionOutputCollector.text
-                if (!output || output.length === 0)
-                    return
-                const parsedContent = JSON.parse(output)
-                root._dominantColor = parsedContent.dominant_color || Looks.colors.accent
-                root.targetX = parsedContent.center_x * root.wallpaperScale - root.width / 2
-                root.targetY = parsedContent.center_y * root.wallpaperScale - root.height / 2
-            }
-        }
     }
 
     ColumnLayout {
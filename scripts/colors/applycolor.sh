@@ -7,6 +7,13 @@ source "$SCRIPT_DIR/lib/module-runtime.sh"
 main() {
   ensure_generated_dirs
 
+  # Apply every target from one Python process: config and generated inputs
+  # are parsed once and only targets without a Python port spawn their module.
+  # INIR_TARGET_RUNNER=0 keeps the per-module bash loop below.
+  if [[ "${INIR_TARGET_RUNNER:-1}" != "0" && -f "$SCRIPT_DIR/target_runner.py" ]]; then
+    exec "$(venv_python)" "$SCRIPT_DIR/target_runner.py"
+  fi
+
   local modules=()
   while IFS= read -r module_path; do
     [[ -n "$module_path" ]] || continue
@@ -25,9 +32,10 @@ main() {
     exit 1
   fi
 
+  trace_begin_run
   local pids=()
   for module_path in "${modules[@]}"; do
-    bash "$module_path" &
+    trace_span "$(basename "$module_path" .sh)" theming_module bash "$module_path" &
     pids+=("$!")
   done
 
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""Long-lived color engine for generate_colors_material.py.
+
+Every theme change used to start a fresh interpreter that re-imports PIL and
+materialyoucolor before doing a few milliseconds of actual color math. The
+engine keeps those imports warm and runs generate_colors_material.py
+in-process for each request received on a Unix socket.
+
+    color_engine.py serve [--idle-timeout SECONDS]
+    color_engine.py run <generate_colors_material.py arguments...>
+    color_engine.py stop
+
+`run` is a drop-in replacement for invoking generate_colors_material.py: it
+forwards argv, cwd and the environment variables the generator reads
+(FORWARDED_ENV and INIR_*) to the engine, replays stdout/stderr and
+exits with the script's status. When no engine is listening it starts one in
+the background for the next request and execs the script directly, so the
+caller never waits on the engine. Set INIR_COLOR_ENGINE=0 to always exec.
+
+Protocol: one JSON line per connection in each direction.
+    request:  {"command": "run", "argv": [...], "cwd": "...", "env": {...}}
+              {"command": "stop"}
+    response: {"status": int, "stdout": "...", "stderr": "..."}
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+import subprocess
+import sys
+import time
+import traceback
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+GENERATOR_PATH = os.path.join(SCRIPT_DIR, "generate_colors_material.py")
+
+DEFAULT_IDLE_TIMEOUT = 900
+CONNECT_TIMEOUT = 0.5
+
+# Environment passed along with each request: what the generator and its
+# post-hooks read, plus every INIR_* setting (tracing, engine toggles).
+FORWARDED_ENV = ("HOME", "PATH", "XDG_CACHE_HOME", "XDG_STATE_HOME")
+FORWARDED_ENV_PREFIX = "INIR_"
+
+# Imported once at startup so the first request does not pay for them.
+WARM_MODULES = [
+    "PIL.Image",
+    "materialyoucolor.quantize",
+    "materialyoucolor.score.score",
+    "materialyoucolor.hct",
+    "materialyoucolor.dynamiccolor.material_dynamic_colors",
+    "materialyoucolor.scheme.scheme_content",
+    "materialyoucolor.scheme.scheme_expressive",
+    "materialyoucolor.scheme.scheme_fidelity",
+    "materialyoucolor.scheme.scheme_fruit_salad",
+    "materialyoucolor.scheme.scheme_monochrome",
+    "materialyoucolor.scheme.scheme_neutral",
+    "materialyoucolor.scheme.scheme_rainbow",
+    "materialyoucolor.scheme.scheme_tonal_spot",
+    "materialyoucolor.scheme.scheme_vibrant",
+    "scheme_for_image",
+]
+
+
+def private_tmp_dir() -> str | None:
+    """/tmp/quickshell-<uid>, created if needed, or None when it is not ours.
+
+    /tmp is shared, so another user may have created the directory (or a
+    symlink in its place) first. Only a real directory owned by us with
+    mode 0700 is used.
+    """
+    path = f"/tmp/quickshell-{os.getuid()}"
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        st = os.lstat(path)
+    except OSError:
+        return None
+    if (
+        not stat.S_ISDIR(st.st_mode)
+        or st.st_uid != os.getuid()
+        or stat.S_IMODE(st.st_mode) != 0o700
+    ):
+        return None
+    return path
+
+
+def default_socket_path() -> str | None:
+    """Engine socket path, or None when there is no safe directory for it."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or private_tmp_dir()
+    if runtime_dir is None:
+        return None
+    return os.path.join(runtime_dir, "quickshell", "color-engine.sock")
+
+
+def forwarded_env() -> dict:
+    return {
+        name: value
+        for name, value in os.environ.items()
+        if name in FORWARDED_ENV or name.startswith(FORWARDED_ENV_PREFIX)
+    }
+
+
+def send_request(socket_path: str, request: dict) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(socket_path)
+        # Generation itself may take a while on a cold seed cache
+        sock.settimeout(None)
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError("color engine closed the connection")
+    return json.loads(line)
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+class GeneratorRunner:
+    """Executes generate_colors_material.py in fresh globals per request."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._code = None
+        self._mtime_ns = None
+        # mtimes of the helper modules (output_writer, pipeline_trace, ...)
+        # the generator imports from SCRIPT_DIR, as of their last (re)load
+        self._module_mtimes = {}
+
+    def code(self):
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        if self._code is None or mtime_ns != self._mtime_ns:
+            with open(self.path, "r") as f:
+                self._code = compile(f.read(), self.path, "exec")
+            self._mtime_ns = mtime_ns
+        return self._code
+
+    def refresh_modules(self) -> None:
+        """Reload helper modules from SCRIPT_DIR that changed on disk.
+
+        The generator itself is recompiled by code(), but the modules it
+        imports stay cached in sys.modules and would otherwise keep running
+        the code that was current when the engine started.
+        """
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None)
+            if name == "__main__" or not path:
+                continue
+            if os.path.dirname(os.path.abspath(path)) != SCRIPT_DIR:
+                continue
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                # Removed or renamed: let the next import find it afresh
+                del sys.modules[name]
+                self._module_mtimes.pop(name, None)
+                continue
+            previous = self._module_mtimes.setdefault(name, mtime_ns)
+            if mtime_ns != previous:
+                importlib.reload(module)
+                self._module_mtimes[name] = mtime_ns
+        # Results from the previous request must not leak into this one
+        output_writer = sys.modules.get("output_writer")
+        if output_writer is not None:
+            output_writer.changed_outputs.clear()
+
+    def run(self, argv: list, cwd: str | None, env: dict | None) -> dict:
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        status = 0
+        saved_argv = sys.argv
+        saved_cwd = os.getcwd()
+        saved_env = dict(os.environ)
+        try:
+            if env is not None:
+                os.environ.clear()
+                os.environ.update(env)
+            if cwd:
+                os.chdir(cwd)
+            sys.argv = [self.path] + list(argv)
+            self.refresh_modules()
+            script_globals = {"__name__": "__main__", "__file__": self.path}
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(
+                stderr
+            ):
+                try:
+                    exec(self.code(), script_globals)
+                except SystemExit as e:
+                    if e.code is None:
+                        status = 0
+                    elif isinstance(e.code, int):
+                        status = e.code
+                    else:
+                        print(e.code, file=sys.stderr)
+                        status = 1
+                except Exception:
+                    traceback.print_exc()
+                    status = 1
+        finally:
+            sys.argv = saved_argv
+            os.chdir(saved_cwd)
+            os.environ.clear()
+            os.environ.update(saved_env)
+        return {
+            "status": status,
+            "stdout": stdout.getvalue(),
+            "stderr": stderr.getvalue(),
+        }
+
+
+class EngineServer(socketserver.UnixStreamServer):
+    def __init__(self, socket_path: str, idle_timeout: float):
+        self.runner = GeneratorRunner(GENERATOR_PATH)
+        self.stopping = False
+        self.timeout = idle_timeout
+        super().__init__(socket_path, EngineRequestHandler)
+
+    def handle_timeout(self):
+        print("[color-engine] Idle timeout reached, exiting", flush=True)
+        self.stopping = True
+
+
+class EngineRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            # Liveness probe: connected and closed without a request
+            return
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = {"status": 1, "stdout": "", "stderr": f"bad request: {e}\n"}
+        else:
+            command = request.get("command", "run")
+            if command == "stop":
+                self.server.stopping = True
+                response = {"status": 0, "stdout": "", "stderr": ""}
+            elif command == "run":
+                response = self.server.runner.run(
+                    request.get("argv", []), request.get("cwd"), request.get("env")
+                )
+            else:
+                response = {
+                    "status": 1,
+                    "stdout": "",
+                    "stderr": f"unknown command: {command}\n",
+                }
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+def serve(socket_path: str, idle_timeout: float) -> int:
+    os.makedirs(os.path.dirname(socket_path), mode=0o700, exist_ok=True)
+    if os.path.exists(socket_path):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(CONNECT_TIMEOUT)
+                sock.connect(socket_path)
+            print("[color-engine] Already running", flush=True)
+            return 0
+        except OSError:
+            # Stale socket left by an engine that did not exit cleanly
+            os.unlink(socket_path)
+
+    for module in WARM_MODULES:
+        try:
+            __import__(module)
+        except ImportError as e:
+            print(f"[color-engine] Could not preload {module}: {e}", flush=True)
+
+    try:
+        server = EngineServer(socket_path, idle_timeout)
+        server.runner.code()
+    except OSError as e:
+        # Another engine won the race to bind
+        print(f"[color-engine] Could not bind {socket_path}: {e}", flush=True)
+        return 0
+    os.chmod(socket_path, 0o600)
+    print(f"[color-engine] Listening on {socket_path}", flush=True)
+    try:
+        with server:
+            while not server.stopping:
+                server.handle_request()
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(socket_path)
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+def spawn_engine() -> None:
+    try:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "serve"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError as e:
+        print(f"[color-engine] Could not start engine: {e}", file=sys.stderr)
+
+
+def exec_generator(argv: list):
+    os.execv(sys.executable, [sys.executable, GENERATOR_PATH] + argv)
+
+
+def run(argv: list) -> int:
+    # --batch forks a process pool whose workers must import the script as
+    # __main__, which an in-process exec cannot provide.
+    if os.environ.get("INIR_COLOR_ENGINE") == "0" or "--batch" in argv:
+        exec_generator(argv)
+
+    socket_path = default_socket_path()
+    if socket_path is None:
+        exec_generator(argv)
+    request = {
+        "command": "run",
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "env": forwarded_env(),
+    }
+    try:
+        response = send_request(socket_path, request)
+    except (OSError, ValueError):
+        spawn_engine()
+        exec_generator(argv)
+
+    sys.stdout.write(response.get("stdout", ""))
+    sys.stderr.write(response.get("stderr", ""))
+    return int(response.get("status", 1))
+
+
+def stop() -> int:
+    socket_path = default_socket_path()
+    if socket_path is None:
+        return 0
+    try:
+        send_request(socket_path, {"command": "stop"})
+    except (OSError, ValueError):
+        return 0
+    # The engine exits after answering; give it a moment to remove the socket
+    deadline = time.monotonic() + 2
+    while os.path.exists(socket_path) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return 0
+
+
+def main() -> int:
+    # `run` forwards everything after it verbatim; argparse would try to
+    # interpret the generator's own --options.
+    if len(sys.argv) > 1 and sys.argv[1] == "run":
+        return run(sys.argv[2:])
+
+    parser = argparse.ArgumentParser(description="Color engine daemon")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="run the engine")
+    serve_parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=DEFAULT_IDLE_TIMEOUT,
+        help="exit after this many seconds without requests",
+    )
+    subparsers.add_parser(
+        "run", help="run generate_colors_material.py via the engine"
+    )
+    subparsers.add_parser("stop", help="stop a running engine")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        socket_path = default_socket_path()
+        if socket_path is None:
+            print(
+                f"[color-engine] /tmp/quickshell-{os.getuid()} is not a private "
+                "directory owned by this user, refusing to listen",
+                flush=True,
+            )
+            return 1
+        return serve(socket_path, args.idle_timeout)
+    return stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,10 @@
 #!/usr/bin/env -S\_/bin/sh\_-c\_"source\_\$(eval\_echo\_\${INIR_VENV:-\$ILLOGICAL_IMPULSE_VIRTUAL_ENV})/bin/activate&&exec\_python\_-E\_"\$0"\_"\$@""
 import argparse
+import functools
+import hashlib
 import math
 import json
+import multiprocessing
 import os
 import re
 import sys
@@ -26,11 +29,40 @@ from materialyoucolor.utils.math_utils import (
     rotation_direction,
 )
 
+import pipeline_trace
+from output_writer import write_if_changed
+
 parser = argparse.ArgumentParser(description="Color generation script")
 parser.add_argument(
     "--path", type=str, default=None, help="generate colorscheme from image"
 )
+parser.add_argument(
+    "--batch",
+    type=str,
+    default=None,
+    metavar="DIR",
+    help="preview every wallpaper in DIR: stream seed/scheme/key tokens as JSONL and update the palette index",
+)
+parser.add_argument(
+    "--batch-index",
+    type=str,
+    default=None,
+    help="file path of the wallpaper palette index (default: ~/.cache/quickshell/wallpaper_palettes.json)",
+)
+parser.add_argument(
+    "--jobs",
+    type=int,
+    default=None,
+    help="worker processes for --batch (default: CPU count)",
+)
 parser.add_argument("--size", type=int, default=128, help="bitmap image size")
+parser.add_argument(
+    "--quantizer",
+    type=str,
+    choices=["auto", "native", "numpy"],
+    default="auto",
+    help="quantizer backend: materialyoucolor's native QuantizeCelebi, the NumPy port, or auto (NumPy for large --size)",
+)
 parser.add_argument(
     "--color", type=str, default=None, help="generate colorscheme from color"
 )
@@ -50,6 +82,12 @@ parser.add_argument(
     default=False,
     help="decide scheme type based on image color",
 )
+parser.add_argument(
+    "--auto-scheme",
+    action="store_true",
+    default=False,
+    help="pick the scheme variant from the image (scheme_for_image.py metrics), falling back to --scheme",
+)
 parser.add_argument(
     "--transparency",
     type=str,
@@ -105,6 +143,18 @@ parser.add_argument(
 parser.add_argument(
     "--cache", type=str, default=None, help="file path to store the generated color"
 )
+parser.add_argument(
+    "--seed-cache",
+    type=str,
+    default=None,
+    help="file path of the wallpaper seed-color cache (default: ~/.cache/quickshell/seed_colors.json)",
+)
+parser.add_argument(
+    "--no-seed-cache",
+    action="store_true",
+    default=False,
+    help="always decode and quantize the image, bypassing the seed-color cache",
+)
 parser.add_argument(
     "--soften", action="store_true", default=False, help="soften generated colors"
 )
@@ -120,6 +170,18 @@ parser.add_argument(
 parser.add_argument(
     "--terminal-output", type=str, default=None, help="file path to write terminal.json"
 )
+parser.add_argument(
+    "--scss-output",
+    type=str,
+    default=None,
+    help="file path to write material_colors.scss (same content as stdout)",
+)
+parser.add_argument(
+    "--terminal-force-dark",
+    action="store_true",
+    default=False,
+    help="generate terminal.json and SCSS in dark mode regardless of --mode",
+)
 parser.add_argument(
     "--meta-output", type=str, default=None, help="file path to write theme-meta.json"
 )
@@ -162,17 +224,215 @@ def calculate_optimal_size(width: int, height: int, bitmap_size: int) -> (int, i
     return new_width, new_height
 
 
+NUMPY_QUANTIZER_MIN_SIZE = 512
+SEED_CACHE_VERSION = 2
+SEED_CACHE_MAX_ENTRIES = 1024
+SEED_CACHE_CANDIDATES = 4
+
+
+def default_seed_cache_path() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "quickshell", "seed_colors.json")
+
+
+def seed_cache_key(path: str, bitmap_size: int) -> str:
+    """Content hash + mtime + bitmap size, so edits and --size changes miss."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return f"{digest.hexdigest()}:{os.stat(path).st_mtime_ns}:{bitmap_size}"
+
+
+def load_seed_cache(cache_path: str) -> dict:
+    try:
+        with open(cache_path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != SEED_CACHE_VERSION:
+        return {}
+    entries = data.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
+def write_json_atomic(path: str, data) -> None:
+    """Write JSON through a temp file so readers never see a partial file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def store_seed_cache(cache_path: str, entries: dict) -> None:
+    # Dicts keep insertion order: drop the oldest entries beyond the cap
+    while len(entries) > SEED_CACHE_MAX_ENTRIES:
+        entries.pop(next(iter(entries)))
+    try:
+        write_json_atomic(
+            cache_path, {"version": SEED_CACHE_VERSION, "entries": entries}
+        )
+    except OSError as e:
+        print(f"[seed-cache] Could not write {cache_path}: {e}", file=sys.stderr)
+
+
+def open_image(path: str):
+    image = Image.open(path)
+    if image.format == "GIF":
+        image.seek(1)
+    if image.mode in ["L", "P"]:
+        image = image.convert("RGB")
+    return image
+
+
+def auto_scheme_for_image(image) -> str | None:
+    """scheme_for_image.py's scheme variant for an already decoded image.
+
+    Computes the metrics from the pixels we hold instead of launching the
+    script, which would decode the wallpaper a second time. Returns None when
+    OpenCV or NumPy is unavailable.
+    """
+    try:
+        import numpy as np
+        import scheme_for_image
+    except ImportError as e:
+        print(f"[auto-scheme] Scheme detection unavailable: {e}", file=sys.stderr)
+        return None
+    width, height = image.size
+    scale = scheme_for_image.ANALYSIS_MAX_SIDE / max(width, height)
+    analysis = image
+    if scale < 1:
+        analysis = image.resize(
+            (max(1, round(width * scale)), max(1, round(height * scale))),
+            Image.Resampling.BOX,
+            reducing_gap=2.0,
+        )
+    bgr = np.ascontiguousarray(np.asarray(analysis.convert("RGB"))[:, :, ::-1])
+    return scheme_for_image.pick_scheme(*scheme_for_image.image_metrics(bgr))
+
+
+def quantize_image(path: str, bitmap_size: int, auto_scheme: bool = False):
+    """Decode, downscale and quantize an image.
+
+    Returns:
+        (scored ARGB candidates, (width, height, resized_width, resized_height),
+        auto scheme or None)
+    """
+    image = open_image(path)
+    scheme = auto_scheme_for_image(image) if auto_scheme else None
+    wsize, hsize = image.size
+    wsize_new, hsize_new = calculate_optimal_size(wsize, hsize, bitmap_size)
+    if wsize_new < wsize or hsize_new < hsize:
+        image = image.resize((wsize_new, hsize_new), Image.Resampling.BICUBIC)
+    colors = quantize_pixels(image, bitmap_size)
+    return Score.score(colors), (wsize, hsize, wsize_new, hsize_new), scheme
+
+
+def quantize_pixels(image, bitmap_size: int) -> dict:
+    """ARGB -> population for a decoded image, using the selected backend.
+
+    Both backends produce identical results. Building the per-pixel list for
+    the native quantizer dominates on large bitmaps, so auto only pays the
+    NumPy import once --size is large enough for the array path to win.
+    """
+    backend = args.quantizer
+    if backend == "auto":
+        backend = "numpy" if bitmap_size >= NUMPY_QUANTIZER_MIN_SIZE else "native"
+    if backend == "numpy":
+        try:
+            import numpy as np
+            from quantize_numpy import quantize_celebi
+        except ImportError:
+            if args.quantizer == "numpy":
+                print(
+                    "[quantize] NumPy is unavailable, using the native quantizer",
+                    file=sys.stderr,
+                )
+        else:
+            if image.mode not in ["RGB", "RGBA"]:
+                image = image.convert("RGB")
+            return quantize_celebi(np.asarray(image), 128)
+    return QuantizeCelebi(list(image.getdata()), 128)
+
+
+def cached_seed_candidates(entries: dict, key: str):
+    cached = entries.get(key)
+    if isinstance(cached, dict) and cached.get("candidates"):
+        return cached["candidates"]
+    return None
+
+
+def seed_cache_entry(path: str, candidates: list, scheme: str | None = None) -> dict:
+    entry = {
+        "path": os.path.abspath(path),
+        "seed": candidates[0],
+        "candidates": candidates[:SEED_CACHE_CANDIDATES],
+    }
+    if scheme is not None:
+        entry["scheme"] = scheme
+    return entry
+
+
+def extract_seed_candidates(
+    path: str, bitmap_size: int, cache_path: str | None, auto_scheme: bool = False
+):
+    """Scored seed candidates for an image, served from the seed cache when possible.
+
+    With auto_scheme the detected scheme variant is cached alongside the seed;
+    entries written without one only decode the image again for the metrics.
+
+    Returns:
+        (candidates, image_info, scheme) where image_info is None on a cache hit
+        and scheme is None unless auto_scheme was requested and detection worked
+    """
+    if cache_path is None:
+        return quantize_image(path, bitmap_size, auto_scheme)
+
+    key = seed_cache_key(path, bitmap_size)
+    entries = load_seed_cache(cache_path)
+    cached = cached_seed_candidates(entries, key)
+    if cached is not None:
+        scheme = entries[key].get("scheme")
+        if not auto_scheme or scheme is not None:
+            return cached, None, scheme
+        scheme = auto_scheme_for_image(open_image(path))
+        if scheme is not None:
+            entries[key]["scheme"] = scheme
+            store_seed_cache(cache_path, entries)
+        return cached, None, scheme
+
+    candidates, image_info, scheme = quantize_image(path, bitmap_size, auto_scheme)
+    entries.pop(key, None)
+    entries[key] = seed_cache_entry(path, candidates, scheme)
+    store_seed_cache(cache_path, entries)
+    return candidates, image_info, scheme
+
+
+# The terminal stage converts the same handful of colors over and over
+# (harmonize -> boost -> min chroma -> contrast search). Cache conversions on
+# their inputs; the returned Hct objects are shared and must not be mutated.
+@functools.lru_cache(maxsize=4096)
+def hct_from_argb(argb: int) -> Hct:
+    return Hct.from_int(argb)
+
+
+@functools.lru_cache(maxsize=16384)
+def argb_from_hct(hue: float, chroma: float, tone: float) -> int:
+    return Hct.from_hct(hue, chroma, tone).to_int()
+
+
 def harmonize(
     design_color: int, source_color: int, threshold: float = 35, harmony: float = 0.5
 ) -> int:
-    from_hct = Hct.from_int(design_color)
-    to_hct = Hct.from_int(source_color)
+    from_hct = hct_from_argb(design_color)
+    to_hct = hct_from_argb(source_color)
     difference_degrees_ = difference_degrees(from_hct.hue, to_hct.hue)
     rotation_degrees = min(difference_degrees_ * harmony, threshold)
     output_hue = sanitize_degrees_double(
         from_hct.hue + rotation_degrees * rotation_direction(from_hct.hue, to_hct.hue)
     )
-    return Hct.from_hct(output_hue, from_hct.chroma, from_hct.tone).to_int()
+    return argb_from_hct(output_hue, from_hct.chroma, from_hct.tone)
 
 
 def boost_chroma_tone(
@@ -189,16 +449,16 @@ def boost_chroma_tone(
     Returns:
         Adjusted color in ARGB format
     """
-    hct = Hct.from_int(argb)
+    hct = hct_from_argb(argb)
     new_tone = min(tone_cap, hct.tone * tone)
-    return Hct.from_hct(hct.hue, hct.chroma * chroma, new_tone).to_int()
+    return argb_from_hct(hct.hue, hct.chroma * chroma, new_tone)
 
 
 def ensure_min_chroma(argb: int, min_chroma: float = 40) -> int:
     """Ensure a color has minimum chroma for visual distinctiveness."""
-    hct = Hct.from_int(argb)
+    hct = hct_from_argb(argb)
     if hct.chroma < min_chroma:
-        return Hct.from_hct(hct.hue, min_chroma, hct.tone).to_int()
+        return argb_from_hct(hct.hue, min_chroma, hct.tone)
     return argb
 
 
@@ -206,23 +466,29 @@ def scale_chroma(argb: int, factor: float, maximum: float | None = None) -> int:
     """Scale chroma while preserving hue/tone for stronger or calmer accent colors."""
     if abs(factor - 1.0) < 1e-6:
         return argb
-    hct = Hct.from_int(argb)
+    hct = hct_from_argb(argb)
     new_chroma = max(0.0, hct.chroma * factor)
     if maximum is not None:
         new_chroma = min(maximum, new_chroma)
-    return Hct.from_hct(hct.hue, new_chroma, hct.tone).to_int()
+    return argb_from_hct(hct.hue, new_chroma, hct.tone)
 
 
-def relative_luminance(argb: int) -> float:
-    """Calculate relative luminance per WCAG 2.1 spec."""
-    r = ((argb >> 16) & 0xFF) / 255.0
-    g = ((argb >> 8) & 0xFF) / 255.0
-    b = (argb & 0xFF) / 255.0
+def _linearize_channel(c: float) -> float:
+    return c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4
+
 
-    def linearize(c):
-        return c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4
+# sRGB channel value (0-255) -> linear light, per WCAG 2.1
+LINEAR_CHANNEL = [_linearize_channel(v / 255.0) for v in range(256)]
 
-    return 0.2126 * linearize(r) + 0.7152 * linearize(g) + 0.0722 * linearize(b)
+
+@functools.lru_cache(maxsize=4096)
+def relative_luminance(argb: int) -> float:
+    """Calculate relative luminance per WCAG 2.1 spec."""
+    return (
+        0.2126 * LINEAR_CHANNEL[(argb >> 16) & 0xFF]
+        + 0.7152 * LINEAR_CHANNEL[(argb >> 8) & 0xFF]
+        + 0.0722 * LINEAR_CHANNEL[argb & 0xFF]
+    )
 
 
 def contrast_ratio(fg_argb: int, bg_argb: int) -> float:
@@ -234,55 +500,84 @@ def contrast_ratio(fg_argb: int, bg_argb: int) -> float:
     return (lighter + 0.05) / (darker + 0.05)
 
 
-def find_tone_for_contrast(
-    hue: float,
-    chroma: float,
-    start_tone: float,
-    limit_tone: float,
-    bg_argb: int,
-    min_ratio: float,
-    is_dark: bool,
-    step: float = 0.25,
-) -> tuple[int, float, bool, float]:
-    """Search tone values for contrast.
-
-    Returns:
-        (color_argb, tone, met_min_ratio, achieved_ratio)
-    """
+def contrast_search_tones(
+    start_tone: float, limit_tone: float, is_dark: bool, step: float
+) -> list[float]:
+    """Tones visited by walking from start_tone towards limit_tone in steps."""
     direction = 1.0 if is_dark else -1.0
     tone = start_tone
     max_steps = max(1, int(math.ceil(abs(limit_tone - start_tone) / step)) + 2)
-
-    initial = Hct.from_hct(hue, chroma, max(0.0, min(100.0, start_tone))).to_int()
-    best_color = initial
-    best_tone = start_tone
-    best_ratio = contrast_ratio(initial, bg_argb)
-
+    tones = []
     for _ in range(max_steps):
         clamped_tone = max(0.0, min(100.0, tone))
-        candidate = Hct.from_hct(hue, chroma, clamped_tone).to_int()
-        ratio = contrast_ratio(candidate, bg_argb)
-
-        if ratio > best_ratio:
-            best_color = candidate
-            best_tone = clamped_tone
-            best_ratio = ratio
-
-        if ratio >= min_ratio:
-            return candidate, clamped_tone, True, ratio
-
+        tones.append(clamped_tone)
         if is_dark and clamped_tone >= limit_tone:
             break
         if not is_dark and clamped_tone <= limit_tone:
             break
-
         tone += direction * step
         if is_dark and tone > limit_tone:
             tone = limit_tone
         if not is_dark and tone < limit_tone:
             tone = limit_tone
+    return tones
 
-    return best_color, best_tone, False, best_ratio
+
+def find_tone_for_contrast(
+    hue: float,
+    chroma: float,
+    start_tone: float,
+    limit_tone: float,
+    bg_argb: int,
+    min_ratio: float,
+    is_dark: bool,
+    step: float = 0.25,
+) -> tuple[int, float, bool, float]:
+    """Search tone values for contrast.
+
+    Tone only moves away from the background's side, so along the walk the
+    contrast first falls (while the color crosses the background luminance)
+    and then rises: "meets min_ratio" flips from False to True at most once
+    after the starting tone. Bisect for that flip instead of testing every
+    step; the result is the first step that a linear walk would accept.
+
+    Returns:
+        (color_argb, tone, met_min_ratio, achieved_ratio)
+    """
+    tones = contrast_search_tones(start_tone, limit_tone, is_dark, step)
+
+    def evaluate(index):
+        candidate = argb_from_hct(hue, chroma, tones[index])
+        return candidate, contrast_ratio(candidate, bg_argb)
+
+    candidate, ratio = evaluate(0)
+    if ratio >= min_ratio:
+        return candidate, tones[0], True, ratio
+
+    last = len(tones) - 1
+    last_candidate, last_ratio = evaluate(last)
+    if last_ratio < min_ratio:
+        # Unreachable: the best ratio sits at one end of the walk. Near the
+        # limit several steps can round to the same color; report the first.
+        if last_ratio > ratio:
+            while last > 1:
+                previous_candidate, previous_ratio = evaluate(last - 1)
+                if previous_ratio != last_ratio:
+                    break
+                last, last_candidate = last - 1, previous_candidate
+            return last_candidate, tones[last], False, last_ratio
+        return candidate, start_tone, False, ratio
+
+    low, high = 0, last
+    high_candidate, high_ratio = last_candidate, last_ratio
+    while high - low > 1:
+        middle = (low + high) // 2
+        middle_candidate, middle_ratio = evaluate(middle)
+        if middle_ratio >= min_ratio:
+            high, high_candidate, high_ratio = middle, middle_candidate, middle_ratio
+        else:
+            low = middle
+    return high_candidate, tones[high], True, high_ratio
 
 
 def ensure_contrast(
@@ -297,7 +592,7 @@ def ensure_contrast(
     if current_ratio >= min_ratio:
         return fg_argb
 
-    hct = Hct.from_int(fg_argb)
+    hct = hct_from_argb(fg_argb)
     original_tone = hct.tone
     original_chroma = hct.chroma
 
@@ -324,7 +619,7 @@ def ensure_contrast(
         # The further we shift, the more we compensate
         boost_factor = 1.0 + min(0.4, (tone_shift - 10) / 50)
         boosted_chroma = min(original_chroma * boost_factor, 80.0)
-        boosted_same_tone = Hct.from_hct(hct.hue, boosted_chroma, best_tone).to_int()
+        boosted_same_tone = argb_from_hct(hct.hue, boosted_chroma, best_tone)
         boosted_ratio = contrast_ratio(boosted_same_tone, bg_argb)
 
         if met_min and boosted_ratio >= min_ratio:
@@ -355,21 +650,23 @@ def ensure_contrast(
 
 darkmode = args.mode == "dark"
 transparent = args.transparency == "transparent"
+# Terminal palette + SCSS may be forced dark without touching the shell palette
+terminal_darkmode = darkmode or args.terminal_force_dark
 
-if args.path is not None:
-    image = Image.open(args.path)
-
-    if image.format == "GIF":
-        image.seek(1)
+image_info = None
 
-    if image.mode in ["L", "P"]:
-        image = image.convert("RGB")
-    wsize, hsize = image.size
-    wsize_new, hsize_new = calculate_optimal_size(wsize, hsize, args.size)
-    if wsize_new < wsize or hsize_new < hsize:
-        image = image.resize((wsize_new, hsize_new), Image.Resampling.BICUBIC)
-    colors = QuantizeCelebi(list(image.getdata()), 128)
-    argb = Score.score(colors)[0]
+_trace_start = pipeline_trace.now_us()
+if args.path is not None:
+    seed_cache_path = (
+        None if args.no_seed_cache else (args.seed_cache or default_seed_cache_path())
+    )
+    seed_candidates, image_info, auto_scheme = extract_seed_candidates(
+        args.path, args.size, seed_cache_path, args.auto_scheme
+    )
+    argb = seed_candidates[0]
+    pipeline_trace.record("seed_extraction", _trace_start, "generate_colors")
+    if auto_scheme is not None:
+        args.scheme = auto_scheme
 
     if args.cache is not None:
         with open(args.cache, "w") as file:
@@ -382,256 +679,529 @@ elif args.color is not None:
     argb = hex_to_argb(args.color)
     hct = Hct.from_int(argb)
 
-if args.scheme == "scheme-fruit-salad":
-    from materialyoucolor.scheme.scheme_fruit_salad import SchemeFruitSalad as Scheme
-elif args.scheme == "scheme-expressive":
-    from materialyoucolor.scheme.scheme_expressive import SchemeExpressive as Scheme
-elif args.scheme == "scheme-monochrome":
-    from materialyoucolor.scheme.scheme_monochrome import SchemeMonochrome as Scheme
-elif args.scheme == "scheme-rainbow":
-    from materialyoucolor.scheme.scheme_rainbow import SchemeRainbow as Scheme
-elif args.scheme == "scheme-tonal-spot":
-    from materialyoucolor.scheme.scheme_tonal_spot import SchemeTonalSpot as Scheme
-elif args.scheme == "scheme-neutral":
-    from materialyoucolor.scheme.scheme_neutral import SchemeNeutral as Scheme
-elif args.scheme == "scheme-fidelity":
-    from materialyoucolor.scheme.scheme_fidelity import SchemeFidelity as Scheme
-elif args.scheme == "scheme-content":
-    from materialyoucolor.scheme.scheme_content import SchemeContent as Scheme
-elif args.scheme == "scheme-vibrant":
-    from materialyoucolor.scheme.scheme_vibrant import SchemeVibrant as Scheme
-else:
-    from materialyoucolor.scheme.scheme_tonal_spot import SchemeTonalSpot as Scheme
-# Generate
-scheme = Scheme(hct, darkmode, 0.0)
-
-material_colors = {}
-term_colors = {}
-
-for color in vars(MaterialDynamicColors).keys():
-    color_name = getattr(MaterialDynamicColors, color)
-    if hasattr(color_name, "get_hct"):
-        generated_hct = color_name.get_hct(scheme)
-
-        # Apply softening if requested and scheme allows it
-        if args.soften and args.scheme not in [
-            "scheme-tonal-spot",
-            "scheme-neutral",
-            "scheme-monochrome",
-        ]:
-            generated_hct = Hct.from_hct(
-                generated_hct.hue, generated_hct.chroma * 0.60, generated_hct.tone
-            )
 
-        # Scale output chroma for color strength — skip near-achromatic tokens
-        # (chroma < 2 means effectively gray/black/white, leave untouched)
-        if abs(args.color_strength - 1.0) > 1e-6 and generated_hct.chroma > 2.0:
-            generated_hct = Hct.from_hct(
-                generated_hct.hue,
-                generated_hct.chroma * args.color_strength,
-                generated_hct.tone,
-            )
+def scheme_class(name):
+    """Map a --scheme name to its materialyoucolor Scheme class."""
+    if name == "scheme-fruit-salad":
+        from materialyoucolor.scheme.scheme_fruit_salad import SchemeFruitSalad
+        return SchemeFruitSalad
+    elif name == "scheme-expressive":
+        from materialyoucolor.scheme.scheme_expressive import SchemeExpressive
+        return SchemeExpressive
+    elif name == "scheme-monochrome":
+        from materialyoucolor.scheme.scheme_monochrome import SchemeMonochrome
+        return SchemeMonochrome
+    elif name == "scheme-rainbow":
+        from materialyoucolor.scheme.scheme_rainbow import SchemeRainbow
+        return SchemeRainbow
+    elif name == "scheme-tonal-spot":
+        from materialyoucolor.scheme.scheme_tonal_spot import SchemeTonalSpot
+        return SchemeTonalSpot
+    elif name == "scheme-neutral":
+        from materialyoucolor.scheme.scheme_neutral import SchemeNeutral
+        return SchemeNeutral
+    elif name == "scheme-fidelity":
+        from materialyoucolor.scheme.scheme_fidelity import SchemeFidelity
+        return SchemeFidelity
+    elif name == "scheme-content":
+        from materialyoucolor.scheme.scheme_content import SchemeContent
+        return SchemeContent
+    elif name == "scheme-vibrant":
+        from materialyoucolor.scheme.scheme_vibrant import SchemeVibrant
+        return SchemeVibrant
+    else:
+        from materialyoucolor.scheme.scheme_tonal_spot import SchemeTonalSpot
+        return SchemeTonalSpot
 
-        rgba = generated_hct.to_rgba()
-        material_colors[color] = rgba_to_hex(rgba)
 
-# Extended material
-if darkmode == True:
-    material_colors["success"] = "#B5CCBA"
-    material_colors["onSuccess"] = "#213528"
-    material_colors["successContainer"] = "#374B3E"
-    material_colors["onSuccessContainer"] = "#D1E9D6"
-else:
-    material_colors["success"] = "#4F6354"
-    material_colors["onSuccess"] = "#FFFFFF"
-    material_colors["successContainer"] = "#D1E8D5"
-    material_colors["onSuccessContainer"] = "#0C1F13"
+Scheme = scheme_class(args.scheme)
 
-# Terminal Colors
-if args.termscheme is not None:
-    with open(args.termscheme, "r") as f:
-        json_termscheme = f.read()
-    term_source_colors = json.loads(json_termscheme)["dark" if darkmode else "light"]
-
-    # Handle both snake_case and camelCase key naming across library versions
-    primary_key = material_colors.get(
-        "primary_paletteKeyColor",
-        material_colors.get(
-            "primaryPaletteKeyColor", material_colors.get("primary", "#6750A4")
-        ),
-    )
-    primary_color_argb = hex_to_argb(primary_key)
-
-    # User-configurable parameters
-    user_saturation = args.term_saturation  # 0.0-1.0
-    user_brightness = args.term_brightness  # 0.0-1.0
-    user_harmony = args.harmony  # 0.0-1.0
-    user_bg_brightness = args.term_bg_brightness  # 0.0-1.0
-
-    # Define surface colors for interpolation based on bg_brightness
-    # 0.0 = background (darkest), 0.5 = surfaceContainerLow (matches shell), 1.0 = surfaceContainerHighest (lightest)
-    surface_levels = [
-        ("background", 0.0),
-        ("surfaceContainerLowest", 0.2),
-        ("surfaceContainerLow", 0.4),
-        ("surfaceContainer", 0.6),
-        ("surfaceContainerHigh", 0.8),
-        ("surfaceContainerHighest", 1.0),
-    ]
-
-    def get_interpolated_surface(brightness):
-        """Get a surface color based on brightness (0-1)"""
-        # Find the two surface levels to interpolate between
-        for i, (name, level) in enumerate(surface_levels):
-            if brightness <= level or i == len(surface_levels) - 1:
-                if i == 0:
-                    return material_colors.get(name, "#1a1a1a")
-                # Interpolate between previous and current
-                prev_name, prev_level = surface_levels[i - 1]
-                t = (
-                    (brightness - prev_level) / (level - prev_level)
-                    if level != prev_level
-                    else 0
-                )
-                c1 = hex_to_argb(material_colors.get(prev_name, "#1a1a1a"))
-                c2 = hex_to_argb(material_colors.get(name, "#2a2a2a"))
-                # Simple RGB interpolation
-                r1, g1, b1 = (c1 >> 16) & 0xFF, (c1 >> 8) & 0xFF, c1 & 0xFF
-                r2, g2, b2 = (c2 >> 16) & 0xFF, (c2 >> 8) & 0xFF, c2 & 0xFF
-                r = int(r1 + (r2 - r1) * t)
-                g = int(g1 + (g2 - g1) * t)
-                b = int(b1 + (b2 - b1) * t)
-                return f"#{r:02X}{g:02X}{b:02X}"
-        return material_colors.get("surfaceContainerLow", "#1a1a1a")
-
-    for color, val in term_source_colors.items():
-        if args.scheme == "monochrome":
-            term_colors[color] = val
-            continue
+SOFTEN_EXEMPT_SCHEMES = ["scheme-tonal-spot", "scheme-neutral", "scheme-monochrome"]
 
-        # Terminal background: Interpolate based on user_bg_brightness
-        # 0.5 = surfaceContainerLow (matches shell surfaces perfectly)
-        if color == "term0":
-            term_colors[color] = get_interpolated_surface(user_bg_brightness)
-            continue
+# Both modes are built from the same seed; keep one Scheme per mode so the
+# shell palette, the forced-dark terminal palette and the template palettes
+# all share the same instances.
+_schemes = {}
+
+
+def get_scheme(is_dark):
+    if is_dark not in _schemes:
+        _schemes[is_dark] = Scheme(hct, is_dark, 0.0)
+    return _schemes[is_dark]
 
-        # Terminal foreground: Use EXACT Material onSurface color
-        if color == "term15":
-            term_colors[color] = material_colors.get("onSurface", "#e0e0e0")
+
+def add_extended_colors(palette, is_dark):
+    """Extended Material tokens (not in MaterialDynamicColors)."""
+    if is_dark:
+        palette["success"] = "#B5CCBA"
+        palette["onSuccess"] = "#213528"
+        palette["successContainer"] = "#374B3E"
+        palette["onSuccessContainer"] = "#D1E9D6"
+    else:
+        palette["success"] = "#4F6354"
+        palette["onSuccess"] = "#FFFFFF"
+        palette["successContainer"] = "#D1E8D5"
+        palette["onSuccessContainer"] = "#0C1F13"
+    return palette
+
+
+def material_color_hex(dynamic_color, scheme, scheme_name, apply_strength=True):
+    """Resolve one MaterialDynamicColors token, applying softening and strength."""
+    generated_hct = dynamic_color.get_hct(scheme)
+
+    # Apply softening if requested and scheme allows it
+    if args.soften and scheme_name not in SOFTEN_EXEMPT_SCHEMES:
+        generated_hct = Hct.from_hct(
+            generated_hct.hue, generated_hct.chroma * 0.60, generated_hct.tone
+        )
+
+    # Scale output chroma for color strength — skip near-achromatic tokens
+    # (chroma < 2 means effectively gray/black/white, leave untouched)
+    if (
+        apply_strength
+        and abs(args.color_strength - 1.0) > 1e-6
+        and generated_hct.chroma > 2.0
+    ):
+        generated_hct = Hct.from_hct(
+            generated_hct.hue,
+            generated_hct.chroma * args.color_strength,
+            generated_hct.tone,
+        )
+
+    return rgba_to_hex(generated_hct.to_rgba())
+
+
+def generate_material_colors(is_dark, apply_strength=True):
+    """Resolve every MaterialDynamicColors token for the given mode.
+
+    Softening is always applied when requested. Color strength only applies to
+    the shell palette; template palettes are rendered without it.
+    """
+    scheme = get_scheme(is_dark)
+    palette = {}
+    for color in vars(MaterialDynamicColors).keys():
+        color_name = getattr(MaterialDynamicColors, color)
+        if not hasattr(color_name, "get_hct"):
             continue
+        palette[color] = material_color_hex(
+            color_name, scheme, args.scheme, apply_strength
+        )
+    return add_extended_colors(palette, is_dark)
+
+
+def load_term_source_colors(is_dark):
+    if args.termscheme is None:
+        return {}
+    with open(args.termscheme, "r") as f:
+        return json.load(f)["dark" if is_dark else "light"]
+
 
-        # term8: autosuggestion color — needs contrast against term0
-        if color == "term8":
-            if darkmode:
-                term_colors[color] = material_colors.get(
-                    "outline",
-                    get_interpolated_surface(min(1.0, user_bg_brightness + 0.45)),
+def generate_term_colors(material_colors, is_dark):
+    """Harmonize the terminal scheme against a material palette of the same mode."""
+    term_colors = {}
+    term_source_colors = load_term_source_colors(is_dark)
+
+    if term_source_colors:
+        # Handle both snake_case and camelCase key naming across library versions
+        primary_key = material_colors.get(
+            "primary_paletteKeyColor",
+            material_colors.get(
+                "primaryPaletteKeyColor", material_colors.get("primary", "#6750A4")
+            ),
+        )
+        primary_color_argb = hex_to_argb(primary_key)
+
+        # User-configurable parameters
+        user_saturation = args.term_saturation  # 0.0-1.0
+        user_brightness = args.term_brightness  # 0.0-1.0
+        user_harmony = args.harmony  # 0.0-1.0
+        user_bg_brightness = args.term_bg_brightness  # 0.0-1.0
+
+        # Define surface colors for interpolation based on bg_brightness
+        # 0.0 = background (darkest), 0.5 = surfaceContainerLow (matches shell), 1.0 = surfaceContainerHighest (lightest)
+        surface_levels = [
+            ("background", 0.0),
+            ("surfaceContainerLowest", 0.2),
+            ("surfaceContainerLow", 0.4),
+            ("surfaceContainer", 0.6),
+            ("surfaceContainerHigh", 0.8),
+            ("surfaceContainerHighest", 1.0),
+        ]
+
+        def get_interpolated_surface(brightness):
+            """Get a surface color based on brightness (0-1)"""
+            # Find the two surface levels to interpolate between
+            for i, (name, level) in enumerate(surface_levels):
+                if brightness <= level or i == len(surface_levels) - 1:
+                    if i == 0:
+                        return material_colors.get(name, "#1a1a1a")
+                    # Interpolate between previous and current
+                    prev_name, prev_level = surface_levels[i - 1]
+                    t = (
+                        (brightness - prev_level) / (level - prev_level)
+                        if level != prev_level
+                        else 0
+                    )
+                    c1 = hex_to_argb(material_colors.get(prev_name, "#1a1a1a"))
+                    c2 = hex_to_argb(material_colors.get(name, "#2a2a2a"))
+                    # Simple RGB interpolation
+                    r1, g1, b1 = (c1 >> 16) & 0xFF, (c1 >> 8) & 0xFF, c1 & 0xFF
+                    r2, g2, b2 = (c2 >> 16) & 0xFF, (c2 >> 8) & 0xFF, c2 & 0xFF
+                    r = int(r1 + (r2 - r1) * t)
+                    g = int(g1 + (g2 - g1) * t)
+                    b = int(b1 + (b2 - b1) * t)
+                    return f"#{r:02X}{g:02X}{b:02X}"
+            return material_colors.get("surfaceContainerLow", "#1a1a1a")
+
+        for color, val in term_source_colors.items():
+            if args.scheme == "monochrome":
+                term_colors[color] = val
+                continue
+
+            # Terminal background: Interpolate based on user_bg_brightness
+            # 0.5 = surfaceContainerLow (matches shell surfaces perfectly)
+            if color == "term0":
+                term_colors[color] = get_interpolated_surface(user_bg_brightness)
+                continue
+
+            # Terminal foreground: Use EXACT Material onSurface color
+            if color == "term15":
+                term_colors[color] = material_colors.get("onSurface", "#e0e0e0")
+                continue
+
+            # term8: autosuggestion color — needs contrast against term0
+            if color == "term8":
+                if is_dark:
+                    term_colors[color] = material_colors.get(
+                        "outline",
+                        get_interpolated_surface(min(1.0, user_bg_brightness + 0.45)),
+                    )
+                else:
+                    term_colors[color] = material_colors.get(
+                        "outline_variant",
+                        material_colors.get(
+                            "outlineVariant",
+                            get_interpolated_surface(
+                                max(0.0, user_bg_brightness - 0.45)
+                            ),
+                        ),
+                    )
+                continue
+
+            if color == "term7":
+                # Neutral colors (gray tones) - minimal harmonization
+                harmonized = harmonize(
+                    hex_to_argb(val),
+                    primary_color_argb,
+                    args.harmonize_threshold * 0.3,
+                    user_harmony * 0.4,
                 )
+                # Apply user saturation (reduced for grays)
+                harmonized = boost_chroma_tone(harmonized, user_saturation * 1.2, 1)
             else:
-                term_colors[color] = material_colors.get(
-                    "outline_variant",
-                    material_colors.get(
-                        "outlineVariant",
-                        get_interpolated_surface(max(0.0, user_bg_brightness - 0.45)),
-                    ),
+                # Regular semantic colors — gentle harmonization preserves hue identity
+                harmonized = harmonize(
+                    hex_to_argb(val),
+                    primary_color_argb,
+                    args.harmonize_threshold * 0.12,
+                    user_harmony,
                 )
-            continue
+                # Apply user saturation and brightness
+                # Brightness affects tone: higher = lighter in dark mode, darker in light mode
+                tone_mult = 1 + ((user_brightness - 0.5) * 0.8 * (1 if is_dark else -1))
+                # Foreground boost gently pushes ANSI colors away from background tone.
+                # Keep this bounded so high values don't collapse colors to white/black.
+                fg_boost_delta = args.term_fg_boost * 0.25 * (1 if is_dark else -1)
+                tone_mult = max(0.60, min(1.45, tone_mult + fg_boost_delta))
+                harmonized = boost_chroma_tone(
+                    harmonized, user_saturation * 2.0, tone_mult
+                )
+                # Ensure minimum chroma for visual distinctiveness
+                harmonized = ensure_min_chroma(harmonized, 40)
+
+            # Apply additional softening if requested
+            if args.soften and args.scheme not in SOFTEN_EXEMPT_SCHEMES:
+                harmonized = boost_chroma_tone(harmonized, 0.55, 1)
+
+            term_colors[color] = argb_to_hex(harmonized)
+
+        # Second pass: ensure all foreground colors have sufficient contrast against background
+        # WCAG AA requires 4.5:1 for normal text, 3:1 for large text
+        # Normal colors (term1-6) use 4.5:1, bright colors (term9-14) use 3.5:1 since they're
+        # already intended to be lighter and we don't want to wash them out to white
+        if "term0" in term_colors:
+            bg_argb = hex_to_argb(term_colors["term0"])
+
+            # Normal semantic colors: stricter contrast (4.5:1)
+            normal_colors = ["term1", "term2", "term3", "term4", "term5", "term6"]
+            for color in normal_colors:
+                if color in term_colors:
+                    fg_argb = hex_to_argb(term_colors[color])
+                    adjusted = ensure_contrast(fg_argb, bg_argb, 4.5, is_dark)
+                    term_colors[color] = argb_to_hex(adjusted)
+
+            # Bright semantic colors: lighter contrast requirement (3.5:1) to preserve vibrancy
+            bright_colors = ["term9", "term10", "term11", "term12", "term13", "term14"]
+            for color in bright_colors:
+                if color in term_colors:
+                    fg_argb = hex_to_argb(term_colors[color])
+                    adjusted = ensure_contrast(fg_argb, bg_argb, 3.5, is_dark)
+                    term_colors[color] = argb_to_hex(adjusted)
+
+    # Fallback: derive term colors from material colors when no termscheme provided
+    if not term_colors and material_colors:
+        term_colors = {
+            "term0": material_colors.get("surfaceVariant", "#282828"),
+            "term1": material_colors.get("error", "#CC241D"),
+            "term2": material_colors.get("secondary", "#98971A"),
+            "term3": material_colors.get("tertiary", "#D79921"),
+            "term4": material_colors.get("primary", "#458588"),
+            "term5": material_colors.get("tertiary", "#B16286"),
+            "term6": material_colors.get("secondary", "#689D6A"),
+            "term7": material_colors.get("onSurfaceVariant", "#A89984"),
+            "term8": material_colors.get("outline", "#928374"),
+            "term9": material_colors.get("error", "#FB4934"),
+            "term10": material_colors.get("secondary", "#B8BB26"),
+            "term11": material_colors.get("tertiary", "#FABD2F"),
+            "term12": material_colors.get("primary", "#83A598"),
+            "term13": material_colors.get("tertiary", "#D3869B"),
+            "term14": material_colors.get("secondary", "#8EC07C"),
+            "term15": material_colors.get("onSurface", "#EBDBB2"),
+        }
+
+    return term_colors
+
+
+def build_scss(material_colors, term_colors, is_dark):
+    lines = [f"$darkmode: {is_dark};", f"$transparent: {transparent};"]
+    for color, code in material_colors.items():
+        lines.append(f"${color}: {code};")
+    for color, code in term_colors.items():
+        lines.append(f"${color}: {code};")
+    return "\n".join(lines) + "\n"
 
-        if color == "term7":
-            # Neutral colors (gray tones) - minimal harmonization
-            harmonized = harmonize(
-                hex_to_argb(val),
-                primary_color_argb,
-                args.harmonize_threshold * 0.3,
-                user_harmony * 0.4,
+
+# ---------------------------------------------------------------------------
+# Batch palette previews for the wallpaper selector
+# ---------------------------------------------------------------------------
+BATCH_INDEX_VERSION = 1
+BATCH_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".avif", ".bmp", ".gif")
+BATCH_TOKENS = [
+    "primary",
+    "onPrimary",
+    "primaryContainer",
+    "onPrimaryContainer",
+    "secondary",
+    "secondaryContainer",
+    "tertiary",
+    "tertiaryContainer",
+    "background",
+    "onBackground",
+    "surface",
+    "surfaceContainer",
+    "surfaceContainerHigh",
+    "onSurface",
+    "onSurfaceVariant",
+    "outline",
+]
+
+# Seed-cache entries loaded once by the batch parent; forked workers inherit them
+_batch_seed_entries = None
+
+
+def default_batch_index_path() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "quickshell", "wallpaper_palettes.json")
+
+
+def list_batch_images(directory: str) -> list:
+    paths = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.lower().endswith(BATCH_IMAGE_EXTENSIONS) and os.path.isfile(path):
+            paths.append(path)
+    return paths
+
+
+def batch_palette_entry(path: str):
+    """Seed color, scheme variant and key tokens for one wallpaper.
+
+    Runs in a pool worker. Returns:
+        (index entry, seed-cache key, new seed-cache entry or None)
+    """
+    try:
+        key = None
+        candidates = None
+        auto_scheme = None
+        if _batch_seed_entries is not None:
+            key = seed_cache_key(path, args.size)
+            candidates = cached_seed_candidates(_batch_seed_entries, key)
+            if candidates is not None:
+                auto_scheme = _batch_seed_entries[key].get("scheme")
+        new_seed_entry = None
+        if candidates is None or (args.auto_scheme and auto_scheme is None):
+            candidates, _, auto_scheme = quantize_image(
+                path, args.size, args.auto_scheme
             )
-            # Apply user saturation (reduced for grays)
-            harmonized = boost_chroma_tone(harmonized, user_saturation * 1.2, 1)
-        else:
-            # Regular semantic colors — gentle harmonization preserves hue identity
-            harmonized = harmonize(
-                hex_to_argb(val),
-                primary_color_argb,
-                args.harmonize_threshold * 0.12,
-                user_harmony,
+            new_seed_entry = seed_cache_entry(path, candidates, auto_scheme)
+
+        seed_hct = Hct.from_int(candidates[0])
+        scheme_name = args.scheme
+        if args.auto_scheme and auto_scheme is not None:
+            scheme_name = auto_scheme
+        if args.smart and seed_hct.chroma < 20:
+            scheme_name = "neutral"
+        scheme = scheme_class(scheme_name)(seed_hct, darkmode, 0.0)
+        colors = {
+            token: material_color_hex(
+                getattr(MaterialDynamicColors, token), scheme, scheme_name
             )
-            # Apply user saturation and brightness
-            # Brightness affects tone: higher = lighter in dark mode, darker in light mode
-            tone_mult = 1 + ((user_brightness - 0.5) * 0.8 * (1 if darkmode else -1))
-            # Foreground boost gently pushes ANSI colors away from background tone.
-            # Keep this bounded so high values don't collapse colors to white/black.
-            fg_boost_delta = args.term_fg_boost * 0.25 * (1 if darkmode else -1)
-            tone_mult = max(0.60, min(1.45, tone_mult + fg_boost_delta))
-            harmonized = boost_chroma_tone(harmonized, user_saturation * 2.0, tone_mult)
-            # Ensure minimum chroma for visual distinctiveness
-            harmonized = ensure_min_chroma(harmonized, 40)
-
-        # Apply additional softening if requested
-        if args.soften and args.scheme not in [
-            "scheme-tonal-spot",
-            "scheme-neutral",
-            "scheme-monochrome",
-        ]:
-            harmonized = boost_chroma_tone(harmonized, 0.55, 1)
-
-        term_colors[color] = argb_to_hex(harmonized)
-
-    # Second pass: ensure all foreground colors have sufficient contrast against background
-    # WCAG AA requires 4.5:1 for normal text, 3:1 for large text
-    # Normal colors (term1-6) use 4.5:1, bright colors (term9-14) use 3.5:1 since they're
-    # already intended to be lighter and we don't want to wash them out to white
-    if "term0" in term_colors:
-        bg_argb = hex_to_argb(term_colors["term0"])
-
-        # Normal semantic colors: stricter contrast (4.5:1)
-        normal_colors = ["term1", "term2", "term3", "term4", "term5", "term6"]
-        for color in normal_colors:
-            if color in term_colors:
-                fg_argb = hex_to_argb(term_colors[color])
-                adjusted = ensure_contrast(fg_argb, bg_argb, 4.5, darkmode)
-                term_colors[color] = argb_to_hex(adjusted)
-
-        # Bright semantic colors: lighter contrast requirement (3.5:1) to preserve vibrancy
-        bright_colors = ["term9", "term10", "term11", "term12", "term13", "term14"]
-        for color in bright_colors:
-            if color in term_colors:
-                fg_argb = hex_to_argb(term_colors[color])
-                adjusted = ensure_contrast(fg_argb, bg_argb, 3.5, darkmode)
-                term_colors[color] = argb_to_hex(adjusted)
-
-# Fallback: derive term colors from material colors when no termscheme provided
-if not term_colors and material_colors:
-    term_colors = {
-        "term0": material_colors.get("surfaceVariant", "#282828"),
-        "term1": material_colors.get("error", "#CC241D"),
-        "term2": material_colors.get("secondary", "#98971A"),
-        "term3": material_colors.get("tertiary", "#D79921"),
-        "term4": material_colors.get("primary", "#458588"),
-        "term5": material_colors.get("tertiary", "#B16286"),
-        "term6": material_colors.get("secondary", "#689D6A"),
-        "term7": material_colors.get("onSurfaceVariant", "#A89984"),
-        "term8": material_colors.get("outline", "#928374"),
-        "term9": material_colors.get("error", "#FB4934"),
-        "term10": material_colors.get("secondary", "#B8BB26"),
-        "term11": material_colors.get("tertiary", "#FABD2F"),
-        "term12": material_colors.get("primary", "#83A598"),
-        "term13": material_colors.get("tertiary", "#D3869B"),
-        "term14": material_colors.get("secondary", "#8EC07C"),
-        "term15": material_colors.get("onSurface", "#EBDBB2"),
+            for token in BATCH_TOKENS
+        }
+    except Exception as e:
+        return {"path": path, "error": str(e)}, None, None
+
+    entry = {
+        "path": path,
+        "seed": argb_to_hex(candidates[0]),
+        "candidates": [argb_to_hex(c) for c in candidates[:SEED_CACHE_CANDIDATES]],
+        "scheme": scheme_name,
+        "colors": colors,
+    }
+    return entry, key, new_seed_entry
+
+
+def batch_index_settings() -> dict:
+    """Options that change the previews; a mismatch invalidates the whole index."""
+    return {
+        "mode": "dark" if darkmode else "light",
+        "scheme": args.scheme,
+        "smart": args.smart,
+        "auto_scheme": args.auto_scheme,
+        "size": args.size,
+        "soften": args.soften,
+        "color_strength": args.color_strength,
+    }
+
+
+def load_batch_index(index_path: str) -> dict:
+    try:
+        with open(index_path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if (
+        not isinstance(data, dict)
+        or data.get("version") != BATCH_INDEX_VERSION
+        or data.get("settings") != batch_index_settings()
+    ):
+        return {}
+    entries = data.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
+def run_batch(directory: str) -> int:
+    global _batch_seed_entries
+
+    directory = os.path.abspath(directory)
+    try:
+        paths = list_batch_images(directory)
+    except OSError as e:
+        print(f"[batch] Could not list {directory}: {e}", file=sys.stderr)
+        return 1
+
+    seed_cache_path = (
+        None if args.no_seed_cache else (args.seed_cache or default_seed_cache_path())
+    )
+    if seed_cache_path is not None:
+        _batch_seed_entries = load_seed_cache(seed_cache_path)
+
+    results = {}
+    new_seed_entries = {}
+    if paths:
+        # fork: workers inherit args, the loaded seed cache and the imported
+        # materialyoucolor modules instead of re-running this script
+        jobs = max(1, min(args.jobs or os.cpu_count() or 1, len(paths)))
+        with multiprocessing.get_context("fork").Pool(jobs) as pool:
+            for entry, key, seed_entry in pool.imap_unordered(
+                batch_palette_entry, paths
+            ):
+                sys.stdout.write(json.dumps(entry) + "\n")
+                sys.stdout.flush()
+                if "error" in entry:
+                    print(
+                        f"[batch] {entry['path']}: {entry['error']}", file=sys.stderr
+                    )
+                    continue
+                results[entry["path"]] = entry
+                if seed_entry is not None:
+                    new_seed_entries[key] = seed_entry
+
+    if seed_cache_path is not None and new_seed_entries:
+        for key, seed_entry in new_seed_entries.items():
+            _batch_seed_entries.pop(key, None)
+            _batch_seed_entries[key] = seed_entry
+        store_seed_cache(seed_cache_path, _batch_seed_entries)
+
+    # Replace this directory's entries so deleted wallpapers drop out
+    index_path = args.batch_index or default_batch_index_path()
+    entries = {
+        path: entry
+        for path, entry in load_batch_index(index_path).items()
+        if os.path.dirname(path) != directory
     }
+    for path in paths:
+        if path in results:
+            entry = dict(results[path])
+            del entry["path"]
+            entries[path] = entry
+    try:
+        write_json_atomic(
+            index_path,
+            {
+                "version": BATCH_INDEX_VERSION,
+                "settings": batch_index_settings(),
+                "entries": entries,
+            },
+        )
+    except OSError as e:
+        print(f"[batch] Could not write {index_path}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if args.batch is not None:
+    sys.exit(run_batch(args.batch))
+
+
+# Generate
+_trace_start = pipeline_trace.now_us()
+material_colors = generate_material_colors(darkmode)
+term_colors = generate_term_colors(material_colors, darkmode)
+
+if terminal_darkmode == darkmode:
+    terminal_material_colors = material_colors
+    terminal_term_colors = term_colors
+else:
+    terminal_material_colors = generate_material_colors(terminal_darkmode)
+    terminal_term_colors = generate_term_colors(
+        terminal_material_colors, terminal_darkmode
+    )
+
+scss = build_scss(terminal_material_colors, terminal_term_colors, terminal_darkmode)
+pipeline_trace.record("schemes", _trace_start, "generate_colors")
 
 if args.debug == False:
-    print(f"$darkmode: {darkmode};")
-    print(f"$transparent: {transparent};")
-    for color, code in material_colors.items():
-        print(f"${color}: {code};")
-    for color, code in term_colors.items():
-        print(f"${color}: {code};")
+    sys.stdout.write(scss)
 else:
     if args.path is not None:
         print("\n--------------Image properties-----------------")
-        print(f"Image size: {wsize} x {hsize}")
-        print(f"Resized image: {wsize_new} x {hsize_new}")
+        if image_info is None:
+            print("Seed color served from cache")
+        else:
+            wsize, hsize, wsize_new, hsize_new = image_info
+            print(f"Image size: {wsize} x {hsize}")
+            print(f"Resized image: {wsize_new} x {hsize_new}")
     print("\n---------------Selected color------------------")
     print(f"Dark mode: {darkmode}")
     print(f"Scheme: {args.scheme}")
@@ -642,9 +1212,10 @@ else:
         rgba = rgba_from_argb(hex_to_argb(code))
         print(f"{color.ljust(32)} : {display_color(rgba)}  {code}")
     print("\n----------Harmonize terminal colors------------")
+    term_source_colors = load_term_source_colors(darkmode)
     for color, code in term_colors.items():
         rgba = rgba_from_argb(hex_to_argb(code))
-        code_source = term_source_colors[color]
+        code_source = term_source_colors.get(color, code)
         rgba_source = rgba_from_argb(hex_to_argb(code_source))
         print(
             f"{color.ljust(6)} : {display_color(rgba_source)} {code_source} --> {display_color(rgba)} {code}"
@@ -735,12 +1306,14 @@ theme_meta = {
     "term_brightness": args.term_brightness,
     "term_bg_brightness": args.term_bg_brightness,
     "term_fg_boost": args.term_fg_boost,
+    "terminal_mode": "dark" if terminal_darkmode else "light",
     "harmonize_threshold": args.harmonize_threshold,
     "color_strength": args.color_strength,
     "blend_bg_fg": args.blend_bg_fg,
     "generated_by": "generate_colors_material.py",
 }
 
+_trace_start = pipeline_trace.now_us()
 if args.json_output:
     with open(args.json_output, "w") as f:
         json.dump(colors_json, f, indent=2)
@@ -751,16 +1324,87 @@ if args.palette_output:
 
 if args.terminal_output:
     with open(args.terminal_output, "w") as f:
-        json.dump(term_colors, f, indent=2)
+        json.dump(terminal_term_colors, f, indent=2)
+
+if args.scss_output:
+    with open(args.scss_output, "w") as f:
+        f.write(scss)
 
 if args.meta_output:
     with open(args.meta_output, "w") as f:
         json.dump(theme_meta, f, indent=2)
+pipeline_trace.record("write_outputs", _trace_start, "generate_colors")
 
 # ---------------------------------------------------------------------------
 # Template rendering for iNiR's unified theming pipeline
 # ---------------------------------------------------------------------------
+TEMPLATE_CACHE_VERSION = 1
+
+# Splits around {{colors.TOKEN.MODE.PROP}} and {{image}} placeholders, keeping
+# both the placeholder and its expression
+TEMPLATE_VAR_RE = re.compile(r"(\{\{\s*(.*?)\s*\}\})")
+
+
+def default_template_cache_path() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "quickshell", "template_cache.json")
+
+
+def load_template_cache(cache_path: str) -> dict:
+    try:
+        with open(cache_path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = None
+    if not isinstance(data, dict) or data.get("version") != TEMPLATE_CACHE_VERSION:
+        data = {"version": TEMPLATE_CACHE_VERSION}
+    for section in ("templates", "outputs"):
+        if not isinstance(data.get(section), dict):
+            data[section] = {}
+    return data
+
+
+def compile_template(path: str, compiled: dict) -> list:
+    """Split a template into [literal, placeholder, expression, literal, ...].
+
+    Compiled segments are cached by path and reused until the template's
+    mtime or size changes.
+    """
+    st = os.stat(path)
+    cached = compiled.get(path)
+    if (
+        isinstance(cached, dict)
+        and cached.get("mtime_ns") == st.st_mtime_ns
+        and cached.get("size") == st.st_size
+    ):
+        return cached["segments"]
+    with open(path, "r") as f:
+        content = f.read()
+    segments = TEMPLATE_VAR_RE.split(content)
+    compiled[path] = {
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "segments": segments,
+    }
+    return segments
+
+
+def template_dependencies(segments: list) -> list:
+    """Unique (placeholder, expression) pairs in first-use order."""
+    return list(dict.fromkeys(zip(segments[1::3], segments[2::3])))
+
+
+def render_segments(segments: list, values: dict) -> str:
+    parts = []
+    for i in range(0, len(segments) - 1, 3):
+        parts.append(segments[i])
+        parts.append(values[segments[i + 1]])
+    parts.append(segments[-1])
+    return "".join(parts)
+
+
 if args.render_templates:
+    _trace_start = pipeline_trace.now_us()
     template_dir = args.render_templates
     manifest_path = os.path.join(template_dir, "templates.json")
     legacy_config_path = os.path.join(template_dir, "config.toml")
@@ -830,32 +1474,9 @@ if args.render_templates:
     # The main `material_colors` dict was generated for the *current* mode;
     # we also need the opposite mode for templates like GTK4 that embed both.
     def _generate_palette(is_dark):
-        s = Scheme(hct, is_dark, 0.0)
-        palette = {}
-        for c in vars(MaterialDynamicColors).keys():
-            cn = getattr(MaterialDynamicColors, c)
-            if hasattr(cn, "get_hct"):
-                g = cn.get_hct(s)
-                if args.soften and args.scheme not in [
-                    "scheme-tonal-spot",
-                    "scheme-neutral",
-                    "scheme-monochrome",
-                ]:
-                    g = Hct.from_hct(g.hue, g.chroma * 0.60, g.tone)
-                palette[c] = rgba_to_hex(g.to_rgba())
+        palette = generate_material_colors(is_dark, apply_strength=False)
         # source_color is the seed itself
         palette["source_color"] = argb_to_hex(argb)
-        # Extended Material tokens (not in MaterialDynamicColors)
-        if is_dark:
-            palette["success"] = "#B5CCBA"
-            palette["onSuccess"] = "#213528"
-            palette["successContainer"] = "#374B3E"
-            palette["onSuccessContainer"] = "#D1E9D6"
-        else:
-            palette["success"] = "#4F6354"
-            palette["onSuccess"] = "#FFFFFF"
-            palette["successContainer"] = "#D1E8D5"
-            palette["onSuccessContainer"] = "#0C1F13"
         return palette
 
     dark_palette = _generate_palette(True)
@@ -906,11 +1527,8 @@ if args.render_templates:
         if snake != tok:
             colors_ns[snake] = token_obj
 
-    # Regex to resolve {{colors.TOKEN.MODE.PROP}} and {{image}}
-    _VAR_RE = re.compile(r"\{\{\s*(.*?)\s*\}\}")
-
-    def _resolve(match):
-        expr = match.group(1)
+    def _resolve(placeholder, expr):
+        """Value for one {{expression}}; unknown expressions stay verbatim."""
         if expr == "image":
             return args.path or ""
         parts = expr.split(".")
@@ -925,25 +1543,34 @@ if args.render_templates:
                     f"[render-templates] WARNING: unresolved token '{token}' in {{{{colors.{token}.{mode}.{prop}}}}}",
                     file=sys.stderr,
                 )
-                return match.group(0)  # leave unresolved
+                return placeholder  # leave unresolved
             mode_obj = getattr(tok_obj, mode, None)
             if mode_obj is None:
                 print(
                     f"[render-templates] WARNING: unresolved mode '{mode}' for token '{token}' in {{{{colors.{token}.{mode}.{prop}}}}}",
                     file=sys.stderr,
                 )
-                return match.group(0)
+                return placeholder
             val = getattr(mode_obj, prop, None)
             if val is None:
                 print(
                     f"[render-templates] WARNING: unresolved prop '{prop}' for token '{token}.{mode}' in {{{{colors.{token}.{mode}.{prop}}}}}",
                     file=sys.stderr,
                 )
-                return match.group(0)
+                return placeholder
             return val
-        return match.group(0)  # leave unknown expressions untouched
+        return placeholder  # leave unknown expressions untouched
+
+    # Compiled segments and, per output, the template and token values it was
+    # last rendered from. An output is only rewritten when one of those changed
+    # or the file on disk is no longer the one we wrote.
+    template_cache_path = default_template_cache_path()
+    template_cache = load_template_cache(template_cache_path)
+    compiled_templates = template_cache["templates"]
+    output_states = template_cache["outputs"]
 
     rendered_count = 0
+    unchanged_count = 0
 
     for entry in template_entries:
         tpl_path = entry["template_path"]
@@ -956,12 +1583,40 @@ if args.render_templates:
             )
             continue
 
-        with open(tpl_path, "r") as f:
-            content = f.read()
+        segments = compile_template(tpl_path, compiled_templates)
+        values = {
+            placeholder: _resolve(placeholder, expr)
+            for placeholder, expr in template_dependencies(segments)
+        }
+        dependency_digest = hashlib.blake2b(
+            json.dumps(values, sort_keys=True).encode(), digest_size=16
+        ).hexdigest()
+        template_stamp = [
+            compiled_templates[tpl_path]["mtime_ns"],
+            compiled_templates[tpl_path]["size"],
+        ]
+
+        previous = output_states.get(out_path)
+        if (
+            isinstance(previous, dict)
+            and previous.get("template") == tpl_path
+            and previous.get("template_stamp") == template_stamp
+            and previous.get("dependencies") == dependency_digest
+            and not os.path.islink(out_path)
+        ):
+            try:
+                out_stat = os.stat(out_path)
+            except OSError:
+                out_stat = None
+            if out_stat is not None and previous.get("output_stamp") == [
+                out_stat.st_mtime_ns,
+                out_stat.st_size,
+            ]:
+                unchanged_count += 1
+                continue
+
+        rendered = render_segments(segments, values)
 
-        rendered = _VAR_RE.sub(_resolve, content)
-
-        os.makedirs(os.path.dirname(out_path), exist_ok=True)
         # Break symlinks before writing so we don't corrupt external themes
         if os.path.islink(out_path):
             print(
@@ -969,14 +1624,38 @@ if args.render_templates:
                 file=sys.stderr,
             )
             os.remove(out_path)
-        with open(out_path, "w") as f:
-            f.write(rendered)
-        rendered_count += 1
+        if write_if_changed(out_path, rendered):
+            rendered_count += 1
+        else:
+            unchanged_count += 1
+        out_stat = os.stat(out_path)
+        output_states[out_path] = {
+            "template": tpl_path,
+            "template_stamp": template_stamp,
+            "dependencies": dependency_digest,
+            "output_stamp": [out_stat.st_mtime_ns, out_stat.st_size],
+        }
+
+    try:
+        write_json_atomic(template_cache_path, template_cache)
+    except OSError as e:
+        print(
+            f"[render-templates] Could not write {template_cache_path}: {e}",
+            file=sys.stderr,
+        )
 
-    if rendered_count > 0:
+    if rendered_count > 0 or unchanged_count > 0:
         print(
-            f"[render-templates] Rendered {rendered_count} template(s)", file=sys.stderr
+            f"[render-templates] Rendered {rendered_count} template(s), {unchanged_count} unchanged",
+            file=sys.stderr,
         )
+    pipeline_trace.record(
+        "render_templates",
+        _trace_start,
+        "generate_colors",
+        rendered=rendered_count,
+        unchanged=unchanged_count,
+    )
 
     # SDDM sync post-hook: run only if script and theme exist
     sddm_sync = os.path.expanduser("~/.local/bin/sync-pixel-sddm.py")
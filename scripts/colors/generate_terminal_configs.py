@@ -14,6 +14,12 @@ from datetime import datetime
 from pathlib import Path
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from output_writer import (
+    record_change,
+    track_changes,
+    write_if_changed,
+    write_json_if_changed,
+)
 from zed.theme_generator import generate_zed_config
 from vscode.theme_generator import (
     generate_vscode_theme,
@@ -21,6 +27,20 @@ from vscode.theme_generator import (
     VSCODE_FORKS,
 )
 
+ALL_TERMINALS = [
+    "kitty",
+    "alacritty",
+    "foot",
+    "wezterm",
+    "ghostty",
+    "konsole",
+    "starship",
+    "omp",
+    "btop",
+    "lazygit",
+    "yazi",
+]
+
 
 def parse_scss_colors(scss_path):
     """Parse material_colors.scss compatibility values."""
@@ -52,10 +72,15 @@ def load_generator_colors(scss_path, palette_json_path, terminal_json_path):
     colors = parse_scss_colors(scss_path) if scss_path else {}
     palette_colors = load_json_colors(palette_json_path)
     terminal_colors = load_json_colors(terminal_json_path)
+    return merge_generator_colors(colors, palette_colors, terminal_colors)
+
 
+def merge_generator_colors(scss_colors, palette, terminal):
+    """Combine SCSS, palette and terminal colors into one generator mapping."""
+    colors = dict(scss_colors)
     # Explicit contracts should win over SCSS compatibility values.
-    colors.update(palette_colors)
-    colors.update(terminal_colors)
+    for contract in (palette, terminal):
+        colors.update({k: v for k, v in contract.items() if isinstance(v, str)})
     return colors
 
 
@@ -169,15 +194,17 @@ color15 {colors.get("term15", "#EBDBB2")}
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     # Write config to a secondary file
     theme_conf = os.path.join(os.path.dirname(output_path), "theme.conf")
-    with open(theme_conf, "w") as f:
-        f.write(config)
+    theme_changed = write_if_changed(theme_conf, config)
 
     # Use atomic mv for the symlink swap (eliminates race conditions)
-    tmp_link = output_path + f".{os.getpid()}.tmp"
-    if os.path.lexists(tmp_link):
-        os.remove(tmp_link)
-    os.symlink("theme.conf", tmp_link)
-    os.replace(tmp_link, output_path)
+    if not os.path.islink(output_path) or os.readlink(output_path) != "theme.conf":
+        tmp_link = output_path + f".{os.getpid()}.tmp"
+        if os.path.lexists(tmp_link):
+            os.remove(tmp_link)
+        os.symlink("theme.conf", tmp_link)
+        os.replace(tmp_link, output_path)
+        record_change(output_path)
+        theme_changed = True
 
     # Auto-integrate into kitty.conf
     home = os.path.expanduser("~")
@@ -189,6 +216,9 @@ color15 {colors.get("term15", "#EBDBB2")}
     else:
         print(f"✓ Generated Kitty config (already integrated)")
 
+    if not theme_changed:
+        return
+
     # Live reload kitty config via SIGUSR1 (updates all windows and tab bar)
     import subprocess
 
@@ -401,8 +431,7 @@ cyan    = '{colors.get("term14", "#8EC07C")}'
 white   = '{colors.get("term15", "#EBDBB2")}'
 """
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w") as f:
-        f.write(config)
+    write_if_changed(output_path, config)
 
     # Auto-integrate into alacritty.toml and fix import order
     home = os.path.expanduser("~")
@@ -463,8 +492,7 @@ jump-labels={colors.get("term0", "#282828")[1:]} {colors.get("term3", "#D79921")
 urls={colors.get("term4", "#458588")[1:]}
 """
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w") as f:
-        f.write(config)
+    write_if_changed(output_path, config)
 
     # Auto-integrate into foot.ini (add at the top to avoid section issues)
     home = os.path.expanduser("~")
@@ -539,8 +567,7 @@ return {{
 }}
 """
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w") as f:
-        f.write(config)
+    write_if_changed(output_path, config)
 
     # Auto-integrate into wezterm.lua
     home = os.path.expanduser("~")
@@ -621,8 +648,7 @@ palette = 7={colors.get("term7", "#A89984")}
 palette = 15={colors.get("term15", "#EBDBB2")}
 """
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w") as f:
-        f.write(config)
+    write_if_changed(output_path, config)
 
     # Auto-integrate into ghostty config
     home = os.path.expanduser("~")
@@ -701,8 +727,7 @@ Opacity=1.0
 Wallpaper=
 """
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w") as f:
-        f.write(config)
+    write_if_changed(output_path, config)
     print(f"✓ Generated Konsole config")
 
 
@@ -773,8 +798,7 @@ bright_cyan = '{colors.get("term14", "#8EC07C")}'
 bright_white = '{colors.get("term15", "#EBDBB2")}'
 """
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w") as f:
-        f.write(config)
+    write_if_changed(output_path, config)
 
     # Auto-integrate into starship.toml
     home = os.path.expanduser("~")
@@ -903,8 +927,7 @@ theme[process_mid]="{primary_dim}"
 theme[process_end]="{primary_dim}"
 """
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w") as f:
-        f.write(config)
+    write_if_changed(output_path, config)
 
     # Auto-integrate: set color_theme in btop.conf
     home = os.path.expanduser("~")
@@ -1017,8 +1040,7 @@ def generate_omp_config(colors, output_path):
     }
 
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w") as f:
-        json.dump(theme, f, indent=2)
+    write_json_if_changed(output_path, theme, indent=2)
 
     print(f"✓ Generated oh-my-posh theme")
 
@@ -1072,10 +1094,12 @@ def generate_lazygit_config(colors, output_path):
 
     # Also write standalone theme file for reference
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w") as f:
-        f.write(f"# Auto-generated by ii wallpaper theming system\n")
-        f.write(f"# This is the theme section for lazygit config.yml\n")
-        f.write(f"gui:\n{theme_yaml}\n")
+    write_if_changed(
+        output_path,
+        "# Auto-generated by ii wallpaper theming system\n"
+        "# This is the theme section for lazygit config.yml\n"
+        f"gui:\n{theme_yaml}\n",
+    )
 
     if config_file.exists():
         content = config_file.read_text()
@@ -1217,8 +1241,7 @@ rules = [
 ]
 """
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w") as f:
-        f.write(config)
+    write_if_changed(output_path, config)
 
     # Auto-integrate: set flavor in yazi's theme.toml
     home = os.path.expanduser("~")
@@ -1280,8 +1303,7 @@ match={hex_alpha(primary)}
 selection-match={hex_alpha(primary)}
 """
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w") as f:
-        f.write(config)
+    write_if_changed(output_path, config)
     print(f"\u2713 Generated Fuzzel theme")
 
 
@@ -1319,11 +1341,139 @@ def generate_pywalfox_config(colors, output_path):
     }
 
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w") as f:
-        json.dump(pywalfox_data, f, indent=2)
+    write_json_if_changed(output_path, pywalfox_data, indent=2)
     print(f"\u2713 Generated Pywalfox colors")
 
 
+def read_json(path):
+    """Parsed JSON object at `path`, or None when it is missing or unreadable."""
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Warning: ignoring unreadable {path}: {e}", file=sys.stderr)
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def generate_configs(
+    colors,
+    terminals,
+    scss_path,
+    colors_path,
+    terminal_json_path,
+    zed=False,
+    vscode=False,
+    vscode_forks=None,
+    palette=None,
+    terminal=None,
+):
+    """Generate configs for `terminals` (plus Zed/VSCode when requested).
+
+    `palette` and `terminal` are the already-parsed palette/terminal JSON; when
+    None they are read from `colors_path` / `terminal_json_path`. Returns the
+    names whose outputs changed, so reload hooks can skip everything else.
+    """
+    home = os.path.expanduser("~")
+    # Generate configs for requested terminals; reload hooks only need to
+    # run for the ones whose outputs actually changed
+    changed = []
+    if "kitty" in terminals:
+        with track_changes("kitty", changed):
+            generate_kitty_config(colors, f"{home}/.config/kitty/current-theme.conf")
+
+    if "alacritty" in terminals:
+        with track_changes("alacritty", changed):
+            generate_alacritty_config(colors, f"{home}/.config/alacritty/colors.toml")
+
+    if "foot" in terminals:
+        with track_changes("foot", changed):
+            generate_foot_config(colors, f"{home}/.config/foot/colors.ini")
+
+    if "wezterm" in terminals:
+        with track_changes("wezterm", changed):
+            generate_wezterm_config(colors, f"{home}/.config/wezterm/colors.lua")
+
+    if "ghostty" in terminals:
+        with track_changes("ghostty", changed):
+            generate_ghostty_config(colors, f"{home}/.config/ghostty/themes/ii-auto")
+
+    if "konsole" in terminals:
+        with track_changes("konsole", changed):
+            generate_konsole_config(
+                colors, f"{home}/.local/share/konsole/ii-auto.colorscheme"
+            )
+
+    if "starship" in terminals:
+        with track_changes("starship", changed):
+            generate_starship_config(colors, f"{home}/.config/starship/ii-palette.toml")
+
+    if "omp" in terminals:
+        with track_changes("omp", changed):
+            m3_colors = palette if palette is not None else read_json(colors_path)
+            if m3_colors is None:
+                print(
+                    f"Warning: {colors_path} not found, oh-my-posh theme may be incomplete"
+                )
+                generate_omp_config(colors, f"{home}/.config/oh-my-posh/ii-auto.json")
+            else:
+                omp_colors = {**colors, **m3_colors}
+                if terminal is None:
+                    terminal = read_json(terminal_json_path)
+                if terminal is not None:
+                    omp_colors.update(terminal)
+                generate_omp_config(
+                    omp_colors, f"{home}/.config/oh-my-posh/ii-auto.json"
+                )
+
+    if "btop" in terminals:
+        with track_changes("btop", changed):
+            # btop needs full M3 tokens from palette.json, not just terminal colors
+            m3_colors = palette if palette is not None else read_json(colors_path)
+            if m3_colors is None:
+                print(f"Warning: {colors_path} not found, btop theme may be incomplete")
+                generate_btop_config(
+                    colors, f"{home}/.config/btop/themes/ii-auto.theme"
+                )
+            else:
+                # Merge M3 tokens with terminal colors
+                btop_colors = {**colors, **m3_colors}
+                generate_btop_config(
+                    btop_colors, f"{home}/.config/btop/themes/ii-auto.theme"
+                )
+
+    if "lazygit" in terminals:
+        with track_changes("lazygit", changed):
+            generate_lazygit_config(colors, f"{home}/.config/lazygit/ii-theme.yml")
+
+    if "yazi" in terminals:
+        with track_changes("yazi", changed):
+            generate_yazi_config(
+                colors, f"{home}/.config/yazi/flavors/ii-auto.yazi/flavor.toml"
+            )
+
+    if zed:
+        with track_changes("zed", changed):
+            generate_zed_config(
+                colors,
+                scss_path,
+                f"{home}/.config/zed/themes/ii-theme.json",
+                colors_path,
+                terminal_json_path,
+            )
+
+    if vscode:
+        with track_changes("vscode", changed):
+            # Use the new multi-fork generation that auto-detects all installed forks
+            results = generate_all_vscode_themes(colors_path, scss_path, vscode_forks)
+            if not results:
+                print("✗ No VSCode forks found or all disabled")
+
+    return changed
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Generate terminal color configs from material_colors.scss"
@@ -1391,6 +1541,13 @@ def main():
         help=f"Specific VSCode forks to generate for. Options: {', '.join(VSCODE_FORKS.keys())}. Default: all installed",
     )
 
+    parser.add_argument(
+        "--changed-report",
+        type=str,
+        default=None,
+        help="write the names of terminals/editors whose outputs changed to this file, one per line",
+    )
+
     args = parser.parse_args()
 
     # Prefer explicit generated contracts, keep SCSS as compatibility fallback.
@@ -1400,114 +1557,25 @@ def main():
         print("Error: No colors found in SCSS file", file=sys.stderr)
         sys.exit(1)
 
-    home = os.path.expanduser("~")
-    all_terminals = [
-        "kitty",
-        "alacritty",
-        "foot",
-        "wezterm",
-        "ghostty",
-        "konsole",
-        "starship",
-        "omp",
-        "btop",
-        "lazygit",
-        "yazi",
-    ]
     if args.terminals is None:
-        terminals = [] if (args.zed or args.vscode) else all_terminals
+        terminals = [] if (args.zed or args.vscode) else ALL_TERMINALS
     else:
-        terminals = args.terminals if "all" not in args.terminals else all_terminals
-
-    # Generate configs for requested terminals
-    if "kitty" in terminals:
-        generate_kitty_config(colors, f"{home}/.config/kitty/current-theme.conf")
-
-    if "alacritty" in terminals:
-        generate_alacritty_config(colors, f"{home}/.config/alacritty/colors.toml")
-
-    if "foot" in terminals:
-        generate_foot_config(colors, f"{home}/.config/foot/colors.ini")
-
-    if "wezterm" in terminals:
-        generate_wezterm_config(colors, f"{home}/.config/wezterm/colors.lua")
-
-    if "ghostty" in terminals:
-        generate_ghostty_config(colors, f"{home}/.config/ghostty/themes/ii-auto")
-
-    if "konsole" in terminals:
-        generate_konsole_config(
-            colors, f"{home}/.local/share/konsole/ii-auto.colorscheme"
-        )
-
-    if "starship" in terminals:
-        generate_starship_config(colors, f"{home}/.config/starship/ii-palette.toml")
-
-    if "omp" in terminals:
-        colors_json_path = args.colors
-        terminal_json_path = args.terminal_json
-        try:
-            with open(colors_json_path, "r") as f:
-                m3_colors = json.load(f)
-                omp_colors = {**colors, **m3_colors}
-                if os.path.exists(terminal_json_path):
-                    with open(terminal_json_path, "r") as tf:
-                        omp_colors.update(json.load(tf))
-                generate_omp_config(
-                    omp_colors, f"{home}/.config/oh-my-posh/ii-auto.json"
-                )
-        except FileNotFoundError:
-            print(
-                f"Warning: {colors_json_path} not found, oh-my-posh theme may be incomplete"
-            )
-            generate_omp_config(colors, f"{home}/.config/oh-my-posh/ii-auto.json")
-
-    if "btop" in terminals:
-        # btop needs full M3 tokens from palette.json, not just terminal colors
-        colors_json_path = args.colors
-        try:
-            with open(colors_json_path, "r") as f:
-                m3_colors = json.load(f)
-                # Merge M3 tokens with terminal colors
-                btop_colors = {**colors, **m3_colors}
-                generate_btop_config(
-                    btop_colors, f"{home}/.config/btop/themes/ii-auto.theme"
-                )
-        except FileNotFoundError:
-            print(
-                f"Warning: {colors_json_path} not found, btop theme may be incomplete"
-            )
-            generate_btop_config(colors, f"{home}/.config/btop/themes/ii-auto.theme")
-
-    if "lazygit" in terminals:
-        generate_lazygit_config(colors, f"{home}/.config/lazygit/ii-theme.yml")
-
-    if "yazi" in terminals:
-        generate_yazi_config(
-            colors, f"{home}/.config/yazi/flavors/ii-auto.yazi/flavor.toml"
-        )
-
-    if args.zed:
-        generate_zed_config(
-            colors,
-            args.scss,
-            f"{home}/.config/zed/themes/ii-theme.json",
-            args.colors,
-            args.terminal_json,
-        )
+        terminals = args.terminals if "all" not in args.terminals else ALL_TERMINALS
+
+    changed = generate_configs(
+        colors,
+        terminals,
+        args.scss,
+        args.colors,
+        args.terminal_json,
+        zed=args.zed,
+        vscode=args.vscode,
+        vscode_forks=args.vscode_forks or None,
+    )
 
-    if args.vscode:
-        # Use the new multi-fork generation that auto-detects all installed forks
-        colors_json = args.colors
-        # Parse enabled forks from --vscode-forks argument if provided
-        forks_to_generate = (
-            args.vscode_forks
-            if hasattr(args, "vscode_forks") and args.vscode_forks
-            else None
-        )
-        results = generate_all_vscode_themes(colors_json, args.scss, forks_to_generate)
-        if not results:
-            print("✗ No VSCode forks found or all disabled")
+    if args.changed_report:
+        with open(args.changed_report, "w") as f:
+            f.write("".join(f"{name}\n" for name in changed))
 
 
 if __name__ == "__main__":
@@ -9,6 +9,8 @@ STATE_DIR="$XDG_STATE_HOME/quickshell"
 
 # shellcheck source=scripts/lib/config-path.sh
 source "$SCRIPT_DIR/../lib/config-path.sh"
+# shellcheck source=scripts/colors/lib/pipeline-trace.sh
+source "$SCRIPT_DIR/lib/pipeline-trace.sh"
 CONFIG_FILE="$(inir_config_file)"
 MODULE_LOG="$STATE_DIR/user/generated/theming_modules.log"
 TARGETS_DIR="$SCRIPT_DIR/targets"
@@ -0,0 +1,52 @@
+#!/usr/bin/env bash
+
+# Library file: intended to be sourced by other scripts.
+# Bash side of scripts/colors/pipeline_trace.py: while INIR_TRACE_RUN is set,
+# finished stages are appended as Chrome-trace events to pipeline_trace.jsonl.
+
+PIPELINE_TRACE_EVENTS="${XDG_STATE_HOME:-$HOME/.local/state}/quickshell/user/generated/pipeline_trace.jsonl"
+
+# Start a traced run unless a caller already did; children inherit the id
+trace_begin_run() {
+  [[ "${INIR_TRACE:-1}" != "0" ]] || return 0
+  if [[ -z "${INIR_TRACE_RUN:-}" ]]; then
+    INIR_TRACE_RUN="$(trace_now_us)-$$"
+    export INIR_TRACE_RUN
+  fi
+}
+
+# Wall-clock microseconds, comparable with time.time_ns() // 1000
+trace_now_us() {
+  local now="${EPOCHREALTIME:-}"
+  if [[ -n "$now" ]]; then
+    printf '%s\n' "${now//[.,]/}"
+  else
+    printf '%s\n' "$(( $(date +%s%N) / 1000 ))"
+  fi
+}
+
+# trace_record <stage> <start-us> [category]
+trace_record() {
+  [[ -n "${INIR_TRACE_RUN:-}" && "${INIR_TRACE:-1}" != "0" ]] || return 0
+  local name="$1"
+  local start_us="$2"
+  local category="${3:-bash}"
+  local end_us
+  end_us="$(trace_now_us)"
+  mkdir -p "$(dirname "$PIPELINE_TRACE_EVENTS")" 2>/dev/null || return 0
+  printf '{"name":"%s","cat":"%s","ph":"X","ts":%s,"dur":%s,"pid":%s,"tid":%s,"args":{"run":"%s"}}\n' \
+    "$name" "$category" "$start_us" "$((end_us - start_us))" "$$" "${BASHPID:-$$}" "$INIR_TRACE_RUN" \
+    >> "$PIPELINE_TRACE_EVENTS" 2>/dev/null || true
+}
+
+# trace_span <stage> <category> <command...>: run a command as one stage
+trace_span() {
+  local name="$1"
+  local category="$2"
+  shift 2
+  local start_us rc=0
+  start_us="$(trace_now_us)"
+  "$@" || rc=$?
+  trace_record "$name" "$start_us" "$category"
+  return "$rc"
+}
@@ -170,10 +170,17 @@ apply_terminal_configs() {
 
   [[ ${#enabled_terminals[@]} -gt 0 ]] || return 0
 
-  local python_cmd
+  local python_cmd changed_report
   python_cmd=$(venv_python)
-  "$python_cmd" "$SCRIPT_DIR/generate_terminal_configs.py" --scss "$SCSS_FILE" --colors "$PALETTE_FILE" --terminal-json "$TERMINAL_FILE" --terminals "${enabled_terminals[@]}" >> "$STATE_DIR/user/generated/terminal_colors.log" 2>&1
-  reload_terminal_colors "${enabled_terminals[@]}" >> "$STATE_DIR/user/generated/terminal_colors.log" 2>&1 &
+  changed_report=$(mktemp)
+  "$python_cmd" "$SCRIPT_DIR/generate_terminal_configs.py" --scss "$SCSS_FILE" --colors "$PALETTE_FILE" --terminal-json "$TERMINAL_FILE" --terminals "${enabled_terminals[@]}" --changed-report "$changed_report" >> "$STATE_DIR/user/generated/terminal_colors.log" 2>&1
+
+  # Only reload terminals whose generated config actually changed
+  local changed_terminals=()
+  mapfile -t changed_terminals < "$changed_report"
+  rm -f "$changed_report"
+  [[ ${#changed_terminals[@]} -gt 0 ]] || return 0
+  reload_terminal_colors "${changed_terminals[@]}" >> "$STATE_DIR/user/generated/terminal_colors.log" 2>&1 &
 }
 
 main() {
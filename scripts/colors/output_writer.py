@@ -0,0 +1,84 @@
+"""Write-if-changed atomic output helpers shared by the theming generators.
+
+Terminals and editors watch their theme files (kitty, foot, VS Code, Zed,
+btop...), so rewriting identical content still triggers a reload. Outputs are
+compared with what is already on disk and only replaced, atomically through a
+temp file + rename, when the content differs. Every replaced path is recorded
+in `changed_outputs` so callers can limit reload hooks to what changed.
+"""
+
+import contextlib
+import json
+import os
+import tempfile
+import threading
+
+# Paths replaced by write_if_changed() in this process, in write order
+changed_outputs = []
+
+# Per-thread write counter, so track_changes() stays accurate when several
+# generators run concurrently in one process
+_thread_state = threading.local()
+
+# Mode open() would give a new file; mkstemp() always creates them 0600.
+# Read once at import, since os.umask() can only be queried by setting it.
+_umask = os.umask(0)
+os.umask(_umask)
+NEW_FILE_MODE = 0o666 & ~_umask
+del _umask
+
+
+def record_change(path) -> None:
+    """Record an output replaced outside write_if_changed() (e.g. a symlink)."""
+    changed_outputs.append(path)
+    _thread_state.writes = getattr(_thread_state, "writes", 0) + 1
+
+
+def write_if_changed(path, content, encoding="utf-8") -> bool:
+    """Atomically replace `path` with `content` unless it already matches.
+
+    Symlinked outputs are resolved so the link itself survives. Returns True
+    when the file was written.
+    """
+    path = os.path.realpath(os.path.expanduser(str(path)))
+    data = content.encode(encoding) if isinstance(content, str) else content
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = NEW_FILE_MODE
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # A unique name, so concurrent writers in one process (threads, the
+    # color engine) never share a temp file
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+    record_change(path)
+    return True
+
+
+def write_json_if_changed(path, data, **dump_kwargs) -> bool:
+    """json.dumps() `data` and write it with write_if_changed()."""
+    return write_if_changed(path, json.dumps(data, **dump_kwargs))
+
+
+@contextlib.contextmanager
+def track_changes(name, changed_names):
+    """Append `name` to `changed_names` if the block wrote any output."""
+    mark = getattr(_thread_state, "writes", 0)
+    yield
+    if getattr(_thread_state, "writes", 0) > mark:
+        changed_names.append(name)
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Per-stage timing for the wallpaper-switch / theming pipeline.
+
+switchwall.sh exports INIR_TRACE_RUN (a run id) for the whole pipeline. Every
+stage that finishes while it is set, in bash (lib/pipeline-trace.sh) or in the
+Python generators (record()/stage() below), appends one Chrome-trace "complete"
+event to pipeline_trace.jsonl. `export` turns the last runs into
+pipeline_trace.json, which chrome://tracing and ui.perfetto.dev load directly,
+and folds in the matching theming_modules.log lines as instant events.
+
+    pipeline_trace.py export [--runs N]
+    pipeline_trace.py summary [--runs N] [--json]
+
+Set INIR_TRACE=0 to disable recording.
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+EVENTS_NAME = "pipeline_trace.jsonl"
+TRACE_NAME = "pipeline_trace.json"
+MODULE_LOG_NAME = "theming_modules.log"
+
+# Runs kept in pipeline_trace.jsonl; older events are dropped on export
+MAX_RUNS = 50
+DEFAULT_EXPORT_RUNS = 10
+
+MODULE_LOG_RE = re.compile(r"^\[(\d{2}):(\d{2}):(\d{2})\] \[([^\]]*)\] (.*)$")
+
+
+def generated_dir() -> str:
+    """State dir the trace files live in, resolved from the current environment.
+
+    Looked up per call rather than at import: the color engine keeps this
+    module loaded across requests that each bring their own XDG_STATE_HOME.
+    """
+    state_home = os.environ.get("XDG_STATE_HOME") or os.path.expanduser(
+        "~/.local/state"
+    )
+    return os.path.join(state_home, "quickshell", "user", "generated")
+
+
+def now_us() -> int:
+    """Wall-clock microseconds, comparable with bash's $EPOCHREALTIME."""
+    return time.time_ns() // 1000
+
+
+def current_run():
+    if os.environ.get("INIR_TRACE") == "0":
+        return None
+    return os.environ.get("INIR_TRACE_RUN") or None
+
+
+def record(name: str, start_us: int, category: str = "python", **args) -> None:
+    """Append a complete event for a stage that started at `start_us`."""
+    run = current_run()
+    if run is None:
+        return
+    end_us = now_us()
+    event = {
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "ts": start_us,
+        "dur": end_us - start_us,
+        "pid": os.getpid(),
+        "tid": threading.get_native_id(),
+        "args": {"run": run, **args},
+    }
+    try:
+        directory = generated_dir()
+        os.makedirs(directory, exist_ok=True)
+        # One short O_APPEND write per event keeps concurrent writers intact
+        with open(os.path.join(directory, EVENTS_NAME), "a") as f:
+            f.write(json.dumps(event) + "\n")
+    except OSError:
+        pass
+
+
+@contextlib.contextmanager
+def stage(name: str, category: str = "python", **args):
+    start_us = now_us()
+    try:
+        yield
+    finally:
+        record(name, start_us, category, **args)
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+def load_events() -> list:
+    events = []
+    try:
+        with open(os.path.join(generated_dir(), EVENTS_NAME), "r") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(event, dict) and event.get("args", {}).get("run"):
+                    events.append(event)
+    except FileNotFoundError:
+        pass
+    return events
+
+
+def group_runs(events: list) -> list:
+    """[(run id, events)] ordered oldest first by each run's first event."""
+    runs = {}
+    for event in events:
+        runs.setdefault(event["args"]["run"], []).append(event)
+    return sorted(runs.items(), key=lambda item: min(e["ts"] for e in item[1]))
+
+
+def run_bounds(events: list) -> tuple:
+    return (
+        min(e["ts"] for e in events),
+        max(e["ts"] + e.get("dur", 0) for e in events),
+    )
+
+
+def module_log_events(runs: list) -> list:
+    """theming_modules.log lines falling inside a run, as instant events.
+
+    The log only carries HH:MM:SS, so lines are matched against each run's
+    local date with one second of slack on both ends.
+    """
+    try:
+        with open(os.path.join(generated_dir(), MODULE_LOG_NAME), "r") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return []
+
+    windows = []
+    for run, events in runs:
+        start_us, end_us = run_bounds(events)
+        windows.append((run, start_us - 1_000_000, end_us + 1_000_000))
+
+    instants = []
+    for line in lines:
+        match = MODULE_LOG_RE.match(line)
+        if not match:
+            continue
+        hours, minutes, seconds, module, message = match.groups()
+        for run, lower_us, upper_us in windows:
+            day = datetime.datetime.fromtimestamp(lower_us / 1e6).replace(
+                hour=int(hours), minute=int(minutes), second=int(seconds), microsecond=0
+            )
+            ts = int(day.timestamp() * 1e6)
+            if lower_us <= ts <= upper_us:
+                instants.append(
+                    {
+                        "name": f"{module}: {message}",
+                        "cat": "theming_modules.log",
+                        "ph": "i",
+                        "s": "g",
+                        "ts": ts,
+                        "pid": 0,
+                        "tid": 0,
+                        "args": {"run": run, "module": module},
+                    }
+                )
+                break
+    return instants
+
+
+# ---------------------------------------------------------------------------
+# Commands
+# ---------------------------------------------------------------------------
+def export(runs_to_keep: int) -> int:
+    directory = generated_dir()
+    events_path = os.path.join(directory, EVENTS_NAME)
+    trace_path = os.path.join(directory, TRACE_NAME)
+    runs = group_runs(load_events())
+
+    # Prune the event log so it stays bounded
+    if len(runs) > MAX_RUNS:
+        runs = runs[-MAX_RUNS:]
+        tmp_path = f"{events_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            for _run, events in runs:
+                for event in events:
+                    f.write(json.dumps(event) + "\n")
+        os.replace(tmp_path, events_path)
+
+    selected = runs[-runs_to_keep:] if runs_to_keep > 0 else runs
+    trace_events = [event for _run, events in selected for event in events]
+    trace_events.extend(module_log_events(selected))
+    trace_events.sort(key=lambda e: e["ts"])
+
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{trace_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+    os.replace(tmp_path, trace_path)
+    return 0
+
+
+def summarize(runs: list) -> dict:
+    stages = {}
+    for _run, events in runs:
+        for event in events:
+            key = (event.get("cat", ""), event["name"])
+            stages.setdefault(key, []).append(event.get("dur", 0) / 1000)
+    return {
+        "runs": [
+            {
+                "run": run,
+                "started": datetime.datetime.fromtimestamp(
+                    run_bounds(events)[0] / 1e6
+                ).isoformat(timespec="seconds"),
+                "wall_ms": (run_bounds(events)[1] - run_bounds(events)[0]) / 1000,
+            }
+            for run, events in reversed(runs)
+        ],
+        "stages": [
+            {
+                "category": category,
+                "stage": name,
+                "count": len(durations),
+                "mean_ms": sum(durations) / len(durations),
+                "max_ms": max(durations),
+                "last_ms": durations[-1],
+            }
+            for (category, name), durations in sorted(
+                stages.items(), key=lambda item: -sum(item[1]) / len(item[1])
+            )
+        ],
+    }
+
+
+def summary(runs_to_show: int, as_json: bool) -> int:
+    runs = group_runs(load_events())[-runs_to_show:]
+    if not runs:
+        print(f"No traced runs in {os.path.join(generated_dir(), EVENTS_NAME)}")
+        return 0
+    result = summarize(runs)
+    if as_json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    print(f"Last {len(runs)} run(s), newest first:")
+    for run in result["runs"]:
+        print(f"  {run['started']}  {run['wall_ms']:9.1f} ms  {run['run']}")
+    print()
+    print(
+        f"{'category':<18} {'stage':<28} {'count':>5} "
+        f"{'mean ms':>9} {'max ms':>9} {'last ms':>9}"
+    )
+    for item in result["stages"]:
+        print(
+            f"{item['category']:<18} {item['stage']:<28} {item['count']:>5} "
+            f"{item['mean_ms']:>9.1f} {item['max_ms']:>9.1f} {item['last_ms']:>9.1f}"
+        )
+    print()
+    print(f"Chrome trace: {os.path.join(generated_dir(), TRACE_NAME)}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Theming pipeline timings")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser(
+        "export", help="write pipeline_trace.json from the recorded events"
+    )
+    export_parser.add_argument(
+        "--runs",
+        type=int,
+        default=DEFAULT_EXPORT_RUNS,
+        help="number of most recent runs to include (0 = all kept)",
+    )
+    summary_parser = subparsers.add_parser(
+        "summary", help="summarize per-stage wall time over the last runs"
+    )
+    summary_parser.add_argument(
+        "--runs", type=int, default=10, help="number of most recent runs"
+    )
+    summary_parser.add_argument("--json", action="store_true", help="output JSON")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        return export(args.runs)
+    return summary(max(args.runs, 1), args.json)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
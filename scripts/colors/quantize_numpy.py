@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""NumPy port of the Celebi quantizer (Wu + weighted spherical k-means).
+
+`materialyoucolor.quantize.QuantizeCelebi` wants a Python list with one
+sequence per pixel, which is slow to build and keeps `--size` pinned to small
+bitmaps. This module takes the decoded image as an array and returns the same
+ARGB -> population mapping that `Score.score` expects.
+
+The algorithm mirrors material-color-utilities' C++ implementation (the one
+materialyoucolor wraps), including its fixed-seed random initial assignment,
+so both backends agree:
+
+- Wu's quantizer splits the 5-bit-per-channel RGB histogram into boxes and
+  seeds the clusters with each box's mean color.
+- WSMeans refines those clusters in L*a*b* space, weighting every distinct
+  pixel color by its population.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+INDEX_BITS = 5
+SIDE_LENGTH = (1 << INDEX_BITS) + 1
+MAX_ITERATIONS = 100
+MIN_DELTA_E = 3.0
+# Smallest distance change that passes the truncated MIN_DELTA_E check
+MIN_MOVE = int(MIN_DELTA_E) + 1
+# Absorbs rounding drift in the accumulated distance bounds
+BOUND_SLACK = 1e-6
+RANDOM_SEED = 42688
+# Points per block when evaluating point-to-cluster distances
+DISTANCE_CHUNK = 16384
+
+_WHITE_POINT_D65 = (95.047, 100.0, 108.883)
+_LAB_E = 216.0 / 24389.0
+_LAB_KAPPA = 24389.0 / 27.0
+
+
+def lab_from_rgb(rgb: np.ndarray) -> np.ndarray:
+    """Convert an (N, 3) uint8 RGB array to (N, 3) float64 L*a*b*."""
+    normalized = rgb.astype(np.float64) / 255.0
+    linear = np.where(
+        normalized <= 0.040449936,
+        normalized / 12.92 * 100.0,
+        np.power((normalized + 0.055) / 1.055, 2.4) * 100.0,
+    )
+    r, g, b = linear[:, 0], linear[:, 1], linear[:, 2]
+    xyz = (
+        (0.41233895 * r + 0.35762064 * g + 0.18051042 * b) / _WHITE_POINT_D65[0],
+        (0.2126 * r + 0.7152 * g + 0.0722 * b) / _WHITE_POINT_D65[1],
+        (0.01932141 * r + 0.11916382 * g + 0.95034478 * b) / _WHITE_POINT_D65[2],
+    )
+    fx, fy, fz = (
+        np.where(
+            t > _LAB_E, np.power(t, 1.0 / 3.0), (_LAB_KAPPA * t + 16) / 116
+        )
+        for t in xyz
+    )
+    return np.stack((116.0 * fy - 16, 500.0 * (fx - fy), 200.0 * (fy - fz)), axis=1)
+
+
+def _delinearized(component: np.ndarray) -> np.ndarray:
+    normalized = component / 100
+    with np.errstate(invalid="ignore"):
+        delinearized = np.where(
+            normalized <= 0.0031308,
+            normalized * 12.92,
+            1.055 * np.power(normalized, 1.0 / 2.4) - 0.055,
+        )
+    # C round() is half away from zero; values below zero are clamped anyway
+    return np.clip(np.floor(delinearized * 255.0 + 0.5), 0, 255).astype(np.int64)
+
+
+def argb_from_lab(lab: np.ndarray) -> np.ndarray:
+    """Convert an (N, 3) L*a*b* array to opaque ARGB integers."""
+    l, a, b = lab[:, 0], lab[:, 1], lab[:, 2]
+    fy = (l + 16.0) / 116.0
+    fx = (a / 500.0) + fy
+    fz = fy - (b / 200.0)
+    fx3 = fx * fx * fx
+    fz3 = fz * fz * fz
+    x = np.where(fx3 > _LAB_E, fx3, (116.0 * fx - 16.0) / _LAB_KAPPA)
+    y = np.where(l > 8.0, fy * fy * fy, l / _LAB_KAPPA)
+    z = np.where(fz3 > _LAB_E, fz3, (116.0 * fz - 16.0) / _LAB_KAPPA)
+    x = x * _WHITE_POINT_D65[0]
+    y = y * _WHITE_POINT_D65[1]
+    z = z * _WHITE_POINT_D65[2]
+    red = _delinearized(3.2406 * x - 1.5372 * y - 0.4986 * z)
+    green = _delinearized(-0.9689 * x + 1.8758 * y + 0.0415 * z)
+    blue = _delinearized(0.0557 * x - 0.2040 * y + 1.0570 * z)
+    return (0xFF << 24) | (red << 16) | (green << 8) | blue
+
+
+def _glibc_rand(seed: int, count: int) -> list[int]:
+    """First `count` values of glibc's rand() after srand(seed).
+
+    Upstream assigns every point to a pseudo-random starting cluster; using the
+    same generator keeps this backend's output identical to QuantizeCelebi.
+    """
+    state = [seed]
+    for i in range(1, 31):
+        hi, lo = divmod(state[i - 1], 127773)
+        word = 16807 * lo - 2836 * hi
+        state.append(word + 2147483647 if word < 0 else word)
+    state.extend(state[i] for i in range(3))
+    for i in range(34, 344 + count):
+        state.append((state[i - 31] + state[i - 3]) & 0xFFFFFFFF)
+    return [value >> 1 for value in state[344:]]
+
+
+def _volume(box, m):
+    r0, r1, g0, g1, b0, b1 = box
+    return (
+        m[r1, g1, b1]
+        - m[r1, g1, b0]
+        - m[r1, g0, b1]
+        + m[r1, g0, b0]
+        - m[r0, g1, b1]
+        + m[r0, g1, b0]
+        + m[r0, g0, b1]
+        - m[r0, g0, b0]
+    )
+
+
+def _bottom(box, axis, m):
+    r0, r1, g0, g1, b0, b1 = box
+    if axis == 0:
+        return -m[r0, g1, b1] + m[r0, g1, b0] + m[r0, g0, b1] - m[r0, g0, b0]
+    if axis == 1:
+        return -m[r1, g0, b1] + m[r1, g0, b0] + m[r0, g0, b1] - m[r0, g0, b0]
+    return -m[r1, g1, b0] + m[r1, g0, b0] + m[r0, g1, b0] - m[r0, g0, b0]
+
+
+def _top(box, axis, positions, m):
+    r0, r1, g0, g1, b0, b1 = box
+    p = positions
+    if axis == 0:
+        return m[p, g1, b1] - m[p, g1, b0] - m[p, g0, b1] + m[p, g0, b0]
+    if axis == 1:
+        return m[r1, p, b1] - m[r1, p, b0] - m[r0, p, b1] + m[r0, p, b0]
+    return m[r1, g1, p] - m[r1, g0, p] - m[r0, g1, p] + m[r0, g0, p]
+
+
+class _WuHistogram:
+    """Cumulative color moments over the 33^3 Wu histogram."""
+
+    def __init__(self, rgb: np.ndarray, counts: np.ndarray):
+        r = rgb[:, 0].astype(np.int64)
+        g = rgb[:, 1].astype(np.int64)
+        b = rgb[:, 2].astype(np.int64)
+        shift = 8 - INDEX_BITS
+        index = (
+            ((r >> shift) + 1) * SIDE_LENGTH * SIDE_LENGTH
+            + ((g >> shift) + 1) * SIDE_LENGTH
+            + ((b >> shift) + 1)
+        )
+        size = SIDE_LENGTH**3
+        shape = (SIDE_LENGTH,) * 3
+
+        def cumulative(values, dtype):
+            hist = np.bincount(index, weights=values, minlength=size)
+            hist = np.rint(hist).astype(dtype) if dtype is np.int64 else hist
+            return hist.reshape(shape).cumsum(0).cumsum(1).cumsum(2)
+
+        self.weights = cumulative(counts, np.int64)
+        self.moments_r = cumulative(counts * r, np.int64)
+        self.moments_g = cumulative(counts * g, np.int64)
+        self.moments_b = cumulative(counts * b, np.int64)
+        self.moments = cumulative(
+            counts.astype(np.float64) * (r * r + g * g + b * b), np.float64
+        )
+
+    def variance(self, box) -> float:
+        dr = _volume(box, self.moments_r)
+        dg = _volume(box, self.moments_g)
+        db = _volume(box, self.moments_b)
+        xx = _volume(box, self.moments)
+        hypotenuse = float(dr * dr + dg * dg + db * db)
+        return xx - hypotenuse / _volume(box, self.weights)
+
+    def maximize(self, box, axis, first, last, whole):
+        """Best cut position along one axis, or (-1, 0.0) when no cut helps."""
+        if last <= first:
+            return -1, 0.0
+        positions = np.arange(first, last)
+        tables = (self.moments_r, self.moments_g, self.moments_b, self.weights)
+        half = [
+            _bottom(box, axis, m) + _top(box, axis, positions, m) for m in tables
+        ]
+        half_r, half_g, half_b, half_w = (h.astype(np.float64) for h in half)
+        rest_r = whole[0] - half_r
+        rest_g = whole[1] - half_g
+        rest_b = whole[2] - half_b
+        rest_w = whole[3] - half_w
+        valid = (half_w != 0) & (rest_w != 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            score = (half_r**2 + half_g**2 + half_b**2) / half_w + (
+                rest_r**2 + rest_g**2 + rest_b**2
+            ) / rest_w
+        score = np.where(valid, score, -np.inf)
+        best = int(np.argmax(score))
+        if score[best] > 0.0:
+            return first + best, float(score[best])
+        return -1, 0.0
+
+    def cut(self, one, two) -> bool:
+        whole = tuple(
+            float(_volume(one, m))
+            for m in (self.moments_r, self.moments_g, self.moments_b, self.weights)
+        )
+        r0, r1, g0, g1, b0, b1 = one
+        cut_r, max_r = self.maximize(one, 0, r0 + 1, r1, whole)
+        cut_g, max_g = self.maximize(one, 1, g0 + 1, g1, whole)
+        cut_b, max_b = self.maximize(one, 2, b0 + 1, b1, whole)
+
+        if max_r >= max_g and max_r >= max_b:
+            if cut_r < 0:
+                return False
+            one[1] = cut_r
+            two[:] = [cut_r, r1, g0, g1, b0, b1]
+        elif max_g >= max_r and max_g >= max_b:
+            one[3] = cut_g
+            two[:] = [r0, r1, cut_g, g1, b0, b1]
+        else:
+            one[5] = cut_b
+            two[:] = [r0, r1, g0, g1, cut_b, b1]
+        return True
+
+
+def _box_volume(box) -> int:
+    return (box[1] - box[0]) * (box[3] - box[2]) * (box[5] - box[4])
+
+
+def quantize_wu(rgb: np.ndarray, counts: np.ndarray, max_colors: int) -> np.ndarray:
+    """Wu quantization of unique colors; returns (K, 3) uint8 cluster means."""
+    histogram = _WuHistogram(rgb, counts)
+    last = SIDE_LENGTH - 1
+    boxes = [[0, last, 0, last, 0, last]] + [[0] * 6 for _ in range(max_colors - 1)]
+    volume_variance = [0.0] * max_colors
+
+    generated = max_colors
+    next_box = 0
+    i = 1
+    while i < max_colors:
+        if histogram.cut(boxes[next_box], boxes[i]):
+            for index in (next_box, i):
+                volume_variance[index] = (
+                    histogram.variance(boxes[index])
+                    if _box_volume(boxes[index]) > 1
+                    else 0.0
+                )
+        else:
+            volume_variance[next_box] = 0.0
+            i -= 1
+
+        next_box = 0
+        best = volume_variance[0]
+        for j in range(1, i + 1):
+            if volume_variance[j] > best:
+                best = volume_variance[j]
+                next_box = j
+        if best <= 0.0:
+            generated = i + 1
+            break
+        i += 1
+
+    colors = []
+    for box in boxes[:generated]:
+        weight = int(_volume(box, histogram.weights))
+        if weight > 0:
+            colors.append(
+                (
+                    int(_volume(box, histogram.moments_r)) // weight,
+                    int(_volume(box, histogram.moments_g)) // weight,
+                    int(_volume(box, histogram.moments_b)) // weight,
+                )
+            )
+    return np.array(colors, dtype=np.uint8).reshape(-1, 3)
+
+
+def _squared_distances(points: np.ndarray, clusters: np.ndarray) -> np.ndarray:
+    delta = points[:, None, :] - clusters[None, :, :]
+    return (
+        delta[:, :, 0] * delta[:, :, 0]
+        + delta[:, :, 1] * delta[:, :, 1]
+        + delta[:, :, 2] * delta[:, :, 2]
+    )
+
+
+def _reassign(points: np.ndarray, clusters: np.ndarray, current: np.ndarray):
+    """Apply upstream's reassignment rule to a set of points.
+
+    Candidates are ranked with one BLAS matrix product; only rows whose best
+    candidates are within rounding error of each other are re-ranked with the
+    exact per-component distance, so ties resolve exactly like upstream.
+
+    Returns:
+        (assignments, moved, distance to the assigned cluster,
+         lower bound on the distance to every other cluster)
+    """
+    assignments = current.copy()
+    moved = np.zeros(len(points), dtype=bool)
+    upper = np.empty(len(points))
+    lower = np.empty(len(points))
+    cluster_norms = np.einsum("ij,ij->i", clusters, clusters)
+    tolerance = 1e-9 * (1.0 + cluster_norms.max())
+
+    for start in range(0, len(points), DISTANCE_CHUNK):
+        chunk = slice(start, start + DISTANCE_CHUNK)
+        pts = points[chunk]
+        rows = np.arange(len(pts))
+        point_norms = np.einsum("ij,ij->i", pts, pts)
+        approx = point_norms[:, None] - 2.0 * (pts @ clusters.T) + cluster_norms
+        margin = tolerance * (1.0 + point_norms)
+
+        nearest = np.argmin(approx, axis=1)
+        best = approx[rows, nearest]
+        ambiguous = np.flatnonzero(
+            np.count_nonzero(approx <= (best + margin)[:, None], axis=1) > 1
+        )
+        if ambiguous.size:
+            exact = _squared_distances(pts[ambiguous], clusters)
+            nearest[ambiguous] = np.argmin(exact, axis=1)
+
+        nearest_distance = _row_distances(pts, clusters[nearest])
+        current_distance = _row_distances(pts, clusters[current[chunk]])
+        # Upstream measures the movement with the integer abs(), so the change
+        # is truncated before it is compared against the threshold.
+        chunk_moved = (nearest_distance < current_distance) & (
+            np.trunc(np.abs(np.sqrt(nearest_distance) - np.sqrt(current_distance)))
+            > MIN_DELTA_E
+        )
+        chunk_assignments = np.where(chunk_moved, nearest, current[chunk])
+
+        approx[rows, chunk_assignments] = np.inf
+        other = approx.min(axis=1) - margin
+        assignments[chunk] = chunk_assignments
+        moved[chunk] = chunk_moved
+        upper[chunk] = np.sqrt(
+            np.where(chunk_moved, nearest_distance, current_distance)
+        )
+        lower[chunk] = np.sqrt(np.maximum(other, 0.0))
+    return assignments, moved, upper, lower
+
+
+def _row_distances(points: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    delta = points - targets
+    return (
+        delta[:, 0] * delta[:, 0] + delta[:, 1] * delta[:, 1] + delta[:, 2] * delta[:, 2]
+    )
+
+
+def quantize_wsmeans(
+    points: np.ndarray, counts: np.ndarray, starting_clusters: np.ndarray
+) -> dict[int, int]:
+    """Weighted k-means over unique L*a*b* points seeded with the Wu clusters.
+
+    `points` must be in first-seen pixel order, as upstream draws one random
+    starting cluster per point in that order.
+
+    Distance bounds (Hamerly-style) skip points that provably cannot move: a
+    point only changes cluster when another one is at least MIN_MOVE closer.
+    """
+    clusters = starting_clusters.astype(np.float64).copy()
+    cluster_count = len(clusters)
+    weights = counts.astype(np.float64)
+    assignments = np.array(_glibc_rand(RANDOM_SEED, len(points)), dtype=np.int64)
+    assignments %= cluster_count
+    upper = np.zeros(len(points))
+    lower = np.zeros(len(points))
+    population = np.zeros(cluster_count, dtype=np.int64)
+
+    for iteration in range(MAX_ITERATIONS):
+        if iteration == 0:
+            candidates = np.arange(len(points))
+        else:
+            candidates = np.flatnonzero(lower <= upper - MIN_MOVE + BOUND_SLACK)
+
+        any_moved = False
+        if candidates.size:
+            new, moved, new_upper, new_lower = _reassign(
+                points[candidates], clusters, assignments[candidates]
+            )
+            assignments[candidates] = new
+            upper[candidates] = new_upper
+            lower[candidates] = new_lower
+            any_moved = bool(moved.any())
+        if not any_moved and iteration != 0:
+            break
+
+        population = np.bincount(assignments, weights=counts, minlength=cluster_count)
+        population = np.rint(population).astype(np.int64)
+        sums = [
+            np.bincount(
+                assignments, weights=points[:, c] * weights, minlength=cluster_count
+            )
+            for c in range(3)
+        ]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            updated = np.where(
+                population[:, None] > 0,
+                np.stack(sums, axis=1) / population[:, None],
+                0.0,
+            )
+        shift = np.sqrt(_row_distances(updated, clusters))
+        upper += shift[assignments]
+        lower -= shift.max()
+        clusters = updated
+
+    result: dict[int, int] = {}
+    for argb, count in zip(argb_from_lab(clusters).tolist(), population.tolist()):
+        if count == 0:
+            continue
+        result[argb] = result.get(argb, 0) + count
+    return result
+
+
+def quantize_celebi(pixels: np.ndarray, max_colors: int) -> dict[int, int]:
+    """Quantize an (H, W, C) or (N, C) uint8 array to ARGB -> population.
+
+    Only the first three channels are read; like upstream QuantizeCelebi, alpha
+    is ignored.
+    """
+    max_colors = min(max_colors, 256)
+    pixels = np.asarray(pixels, dtype=np.uint8)
+    flat = pixels.reshape(-1, pixels.shape[-1])[:, :3]
+    if max_colors <= 0 or len(flat) == 0:
+        return {}
+
+    packed = (
+        (flat[:, 0].astype(np.int64) << 16)
+        | (flat[:, 1].astype(np.int64) << 8)
+        | flat[:, 2].astype(np.int64)
+    )
+    unique, first_seen, counts = np.unique(
+        packed, return_index=True, return_counts=True
+    )
+    order = np.argsort(first_seen, kind="stable")
+    unique = unique[order]
+    counts = counts[order]
+    rgb = np.stack(
+        ((unique >> 16) & 0xFF, (unique >> 8) & 0xFF, unique & 0xFF), axis=1
+    ).astype(np.uint8)
+
+    wu_colors = quantize_wu(rgb, counts, max_colors)
+    cluster_count = min(max_colors, len(rgb), len(wu_colors))
+    if cluster_count == 0:
+        return {}
+    return quantize_wsmeans(
+        lab_from_rgb(rgb), counts, lab_from_rgb(wu_colors[:cluster_count])
+    )
@@ -1,8 +1,31 @@
 #!/usr/bin/env python3
+import struct
 import sys
 import cv2
 import numpy as np
 
+# Long side the metrics are computed at. Colorfulness, saturation and hue
+# spread are image-wide statistics, so a 1024px thumbnail gives the same
+# scheme as the full wallpaper at a fraction of the decode and memory cost.
+ANALYSIS_MAX_SIDE = 1024
+
+# cv2.imread flags that let libjpeg (and friends) decode at 1/2, 1/4, 1/8 size
+REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# Hue x saturation histogram for the circular hue spread. OpenCV hue is 0-179
+# (two degrees per step); saturation bins only need to be fine enough to weight.
+HUE_BINS = 180
+SATURATION_BINS = 32
+HUE_VECTORS = np.exp(1j * np.arange(HUE_BINS) * (2 * np.pi / HUE_BINS))
+SATURATION_WEIGHTS = (np.arange(SATURATION_BINS) + 0.5) * (256 / SATURATION_BINS)
+# Circular std-dev grows without bound as hues spread evenly round the wheel;
+# clamp it to the 0-~90 range pick_scheme's thresholds were written for.
+HUE_SPREAD_MAX = 90.0
+
 # Allowed scheme types
 SCHEMES = [
     "scheme-content",
@@ -16,31 +39,121 @@ SCHEMES = [
 ]
 
 
+def image_dimensions(path):
+    """(width, height) from a PNG or JPEG header, or None for anything else."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(24)
+            if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+                return struct.unpack(">II", head[16:24])
+            if not head.startswith(b"\xff\xd8"):
+                return None
+            f.seek(2)
+            while True:
+                marker = f.read(2)
+                if len(marker) < 2 or marker[0] != 0xFF:
+                    return None
+                if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+                    continue
+                length = struct.unpack(">H", f.read(2))[0]
+                # SOF0-SOF15, minus DHT (C4), JPG (C8) and DAC (CC)
+                if 0xC0 <= marker[1] <= 0xCF and marker[1] not in (0xC4, 0xC8, 0xCC):
+                    height, width = struct.unpack(">xHH", f.read(5))
+                    return width, height
+                f.seek(length - 2, 1)
+    except (OSError, struct.error):
+        return None
+
+
+def load_image(path, max_side=ANALYSIS_MAX_SIDE):
+    """Decode an image for analysis, no larger than max_side on its long side."""
+    flags = cv2.IMREAD_COLOR
+    size = image_dimensions(path)
+    if size is not None:
+        for factor, reduced in REDUCED_FLAGS:
+            if max(size) // factor >= max_side:
+                flags = reduced
+                break
+    image = cv2.imread(path, flags)
+    if image is None:
+        return None
+    height, width = image.shape[:2]
+    scale = max_side / max(height, width)
+    if scale < 1:
+        image = cv2.resize(
+            image,
+            (max(1, round(width * scale)), max(1, round(height * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+    return image
+
+
 def image_colorfulness(image):
     # Based on Hasler and Süsstrunk's colorfulness metric
-    (B, G, R) = cv2.split(image.astype("float"))
+    B, G, R = cv2.split(image.astype(np.float32))
     rg = np.absolute(R - G)
     yb = np.absolute(0.5 * (R + G) - B)
-    std_rg = np.std(rg)
-    std_yb = np.std(yb)
-    mean_rg = np.mean(rg)
-    mean_yb = np.mean(yb)
+    # float32 buffers, float64 accumulators
+    std_rg = np.std(rg, dtype=np.float64)
+    std_yb = np.std(yb, dtype=np.float64)
+    mean_rg = np.mean(rg, dtype=np.float64)
+    mean_yb = np.mean(yb, dtype=np.float64)
     colorfulness = np.sqrt(std_rg**2 + std_yb**2) + (
         0.3 * np.sqrt(mean_rg**2 + mean_yb**2)
     )
     return colorfulness
 
 
-def dominant_saturation(image):
+def dominant_saturation(image, hsv=None):
     """Average saturation of the image in HSV space."""
-    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-    return float(np.mean(hsv[:, :, 1]))
+    if hsv is None:
+        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    return float(np.mean(hsv[:, :, 1], dtype=np.float64))
 
 
-def color_variety(image):
+def color_variety(image, hsv=None):
     """Rough hue spread: std-dev of the hue channel (0-180 in OpenCV)."""
+    if hsv is None:
+        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    return float(np.std(hsv[:, :, 0], dtype=np.float64))
+
+
+def circular_hue_spread(image, hsv=None):
+    """Saturation-weighted circular std-dev of hue, in OpenCV hue units (0-90).
+
+    Hue wraps, so reds at 2 and 178 are neighbours here rather than opposite
+    ends of the range, and near-grey pixels, whose hue is noise, count in
+    proportion to their saturation. Built from a hue x saturation histogram,
+    so memory stays constant whatever the image size.
+    """
+    if hsv is None:
+        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist(
+        [hsv], [0, 1], None, [HUE_BINS, SATURATION_BINS], [0, 180, 0, 256]
+    )
+    weights = hist.astype(np.float64) @ SATURATION_WEIGHTS
+    total = weights.sum()
+    if total <= 0:
+        return 0.0
+    resultant = abs(weights @ HUE_VECTORS) / total
+    if resultant <= 0:
+        return HUE_SPREAD_MAX
+    spread = np.sqrt(max(0.0, -2 * np.log(resultant))) * (HUE_BINS / (2 * np.pi))
+    return float(min(spread, HUE_SPREAD_MAX))
+
+
+def image_metrics(image, circular_hue=True):
+    """(colorfulness, saturation, hue_spread) from a single HSV conversion.
+
+    circular_hue=False uses the linear hue std-dev (color_variety) instead.
+    """
     hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-    return float(np.std(hsv[:, :, 0]))
+    hue_spread = circular_hue_spread if circular_hue else color_variety
+    return (
+        image_colorfulness(image),
+        dominant_saturation(image, hsv),
+        hue_spread(image, hsv),
+    )
 
 
 def pick_scheme(colorfulness, saturation, hue_spread):
@@ -50,7 +163,7 @@ def pick_scheme(colorfulness, saturation, hue_spread):
     Axes:
       - colorfulness  (Hasler-Süsstrunk metric, 0-~200+)
       - saturation    (mean HSV saturation, 0-255)
-      - hue_spread    (hue std-dev, 0-~90)
+      - hue_spread    (circular or linear hue std-dev, 0-~90)
 
     Design goals:
       - tonal-spot is the safe default — most images should land here
@@ -101,26 +214,26 @@ def pick_scheme(colorfulness, saturation, hue_spread):
 
 def main():
     colorfulness_mode = False
+    circular_hue = True
     args = sys.argv[1:]
     if "--colorfulness" in args:
         colorfulness_mode = True
         args.remove("--colorfulness")
+    if "--linear-hue" in args:
+        circular_hue = False
+        args.remove("--linear-hue")
     if len(args) < 1:
         print("scheme-tonal-spot")
         sys.exit(1)
     img_path = args[0]
-    img = cv2.imread(img_path)
+    img = load_image(img_path)
     if img is None:
         print("scheme-tonal-spot")
         sys.exit(1)
-    colorfulness = image_colorfulness(img)
     if colorfulness_mode:
-        print(f"{colorfulness}")
+        print(f"{image_colorfulness(img)}")
     else:
-        sat = dominant_saturation(img)
-        spread = color_variety(img)
-        scheme = pick_scheme(colorfulness, sat, spread)
-        print(scheme)
+        print(pick_scheme(*image_metrics(img, circular_hue)))
 
 
 if __name__ == "__main__":
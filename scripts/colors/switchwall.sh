@@ -10,6 +10,8 @@ SHELL_ROOT="$(cd "$SCRIPT_DIR/../.." 2>/dev/null && pwd)"
 
 # shellcheck source=scripts/lib/config-path.sh
 source "$SCRIPT_DIR/../lib/config-path.sh"
+# shellcheck source=scripts/colors/lib/pipeline-trace.sh
+source "$SCRIPT_DIR/lib/pipeline-trace.sh"
 SHELL_CONFIG_FILE="$(inir_config_file)"
 TEMPLATE_DIR="$XDG_CONFIG_HOME/matugen"
 terminalscheme="$SCRIPT_DIR/terminal/scheme-base.json"
@@ -117,6 +119,19 @@ write_chromium_theme_contract() {
     printf '%s\n' "$rgb_color" > "$output_path"
 }
 
+# Move a freshly generated temp file into place, unless the destination already
+# has identical content: watchers (QML FileViews, terminals) then see no change.
+replace_if_changed() {
+    local tmp_path="$1"
+    local output_path="$2"
+
+    if [[ -f "$output_path" ]] && cmp -s "$tmp_path" "$output_path"; then
+        rm -f "$tmp_path"
+    else
+        mv "$tmp_path" "$output_path"
+    fi
+}
+
 write_generated_wallpaper_path() {
     local wallpaper_path="$1"
     local wallpaper_state_path="$STATE_DIR/user/generated/wallpaper/path.txt"
@@ -528,7 +543,7 @@ switch() {
             if has_valid_file "$config_thumbnail"; then
                 thumbnail="$config_thumbnail"
             elif ! has_valid_file "$thumbnail"; then
-                ffmpeg -y -i "$imgpath" -vframes 1 "$thumbnail" 2>/dev/null
+                trace_span thumbnail switchwall ffmpeg -y -i "$imgpath" -vframes 1 "$thumbnail" 2>/dev/null
             fi
 
             if ! has_valid_file "$thumbnail"; then
@@ -554,7 +569,7 @@ switch() {
             color_source="$imgpath"
             if is_gif "$imgpath"; then
                 color_preview="$THUMBNAIL_DIR/$(echo -n "$imgpath" | md5sum | cut -d' ' -f1).jpg"
-                if ensure_color_preview_for_media "$imgpath" "$color_preview"; then
+                if trace_span color_preview switchwall ensure_color_preview_for_media "$imgpath" "$color_preview"; then
                     color_source="$color_preview"
                 fi
             fi
@@ -618,7 +633,13 @@ switch() {
         fi
     fi
 
-    [[ -n "$type_flag" ]] && generate_colors_material_args+=(--scheme "$type_flag")
+    if [[ "$type_flag" == "auto" ]]; then
+        # Detected from the pixels generate_colors_material.py decodes anyway;
+        # tonal-spot is the fallback when detection is unavailable.
+        generate_colors_material_args+=(--scheme scheme-tonal-spot --auto-scheme)
+    elif [[ -n "$type_flag" ]]; then
+        generate_colors_material_args+=(--scheme "$type_flag")
+    fi
     generate_colors_material_args+=(--termscheme "$terminalscheme" --blend_bg_fg)
     generate_colors_material_args+=(--cache "$STATE_DIR/user/generated/color.txt")
 
@@ -688,86 +709,77 @@ switch() {
     _chromium_tmp="$STATE_DIR/user/generated/chromium.theme.tmp"
     _chromium_out="$STATE_DIR/user/generated/chromium.theme"
 
-    # 1) Generate authoritative shell/UI colors.json + render app templates.
-    if "$_ii_python" "$SCRIPT_DIR/generate_colors_material.py" "${generate_colors_material_args[@]}" \
+    # Terminal/editor outputs (terminal.json + material_colors.scss) may optionally
+    # force dark mode without affecting the shell/UI palette.
+    force_dark_terminal=$(jq -r '.appearance.wallpaperTheming.terminalGenerationProps.forceDarkMode // false' "$SHELL_CONFIG_FILE" 2>/dev/null || echo "false")
+    if [[ "$force_dark_terminal" == "true" ]]; then
+        generate_colors_material_args+=(--terminal-force-dark)
+    fi
+
+    # Generate colors.json, palette.json, terminal.json, theme-meta.json and
+    # material_colors.scss, and render app templates, from a single seed extraction.
+    # color_engine.py forwards the run to the warm color engine (started on first
+    # use) and falls back to running generate_colors_material.py directly.
+    if trace_span generate_colors switchwall "$_ii_python" "$SCRIPT_DIR/color_engine.py" run "${generate_colors_material_args[@]}" \
         --json-output "$_json_tmp" \
         --palette-output "$_palette_tmp" \
         --terminal-output "$_terminal_tmp" \
         --meta-output "$_meta_tmp" \
+        --scss-output "$_scss_tmp" \
         --render-templates "$TEMPLATE_DIR" \
         > /dev/null 2>/dev/null && [[ -s "$_json_tmp" ]]; then
-        mv "$_json_tmp" "$_json_out"
-        [[ -s "$_palette_tmp" ]] && mv "$_palette_tmp" "$_palette_out" || rm -f "$_palette_tmp"
-        [[ -s "$_terminal_tmp" ]] && mv "$_terminal_tmp" "$_terminal_out" || rm -f "$_terminal_tmp"
-        [[ -s "$_meta_tmp" ]] && mv "$_meta_tmp" "$_meta_out" || rm -f "$_meta_tmp"
+        replace_if_changed "$_json_tmp" "$_json_out"
+        [[ -s "$_palette_tmp" ]] && replace_if_changed "$_palette_tmp" "$_palette_out" || rm -f "$_palette_tmp"
+        [[ -s "$_terminal_tmp" ]] && replace_if_changed "$_terminal_tmp" "$_terminal_out" || rm -f "$_terminal_tmp"
+        [[ -s "$_meta_tmp" ]] && replace_if_changed "$_meta_tmp" "$_meta_out" || rm -f "$_meta_tmp"
+        if [[ -s "$_scss_tmp" ]]; then
+            replace_if_changed "$_scss_tmp" "$STATE_DIR/user/generated/material_colors.scss"
+        else
+            echo "[switchwall] Warning: material_colors.scss generation failed, keeping previous SCSS" >&2
+            rm -f "$_scss_tmp"
+        fi
         if write_chromium_theme_contract "$_palette_out" "$_chromium_tmp" && [[ -s "$_chromium_tmp" ]]; then
-            mv "$_chromium_tmp" "$_chromium_out"
+            replace_if_changed "$_chromium_tmp" "$_chromium_out"
         else
             rm -f "$_chromium_tmp"
         fi
     else
-        echo "[switchwall] Warning: colors.json generation failed, keeping previous JSON" >&2
+        echo "[switchwall] Warning: colors.json generation failed, keeping previous JSON and SCSS" >&2
         rm -f "$_json_tmp"
         rm -f "$_palette_tmp"
         rm -f "$_terminal_tmp"
         rm -f "$_meta_tmp"
+        rm -f "$_scss_tmp"
         rm -f "$_chromium_tmp"
     fi
 
-    # 2) Generate material_colors.scss for terminals/editors. This path may optionally
-    #    force dark mode without affecting the shell/UI palette above.
-    scss_generate_args=("${generate_colors_material_args[@]}")
-    force_dark_terminal=$(jq -r '.appearance.wallpaperTheming.terminalGenerationProps.forceDarkMode // false' "$SHELL_CONFIG_FILE" 2>/dev/null || echo "false")
-    if [[ "$force_dark_terminal" == "true" ]]; then
-        for i in "${!scss_generate_args[@]}"; do
-            if [[ "${scss_generate_args[$i]}" == "--mode" && $((i + 1)) -lt ${#scss_generate_args[@]} ]]; then
-                scss_generate_args[$((i + 1))]="dark"
-                break
-            fi
-        done
-    fi
-
-    _terminal_force_tmp="$STATE_DIR/user/generated/terminal.json.force.tmp"
-
-    scss_cmd=("$_ii_python" "$SCRIPT_DIR/generate_colors_material.py" "${scss_generate_args[@]}")
-    if [[ "$force_dark_terminal" == "true" ]]; then
-        scss_cmd+=(--terminal-output "$_terminal_force_tmp")
-    fi
-
-    if "${scss_cmd[@]}" > "$_scss_tmp" 2>/dev/null && [[ -s "$_scss_tmp" ]]; then
-        mv "$_scss_tmp" "$STATE_DIR/user/generated/material_colors.scss"
-        # Keep terminal outputs aligned with forced-dark generation path when enabled.
-        if [[ "$force_dark_terminal" == "true" && -s "$_terminal_force_tmp" ]]; then
-            mv "$_terminal_force_tmp" "$_terminal_out"
-        else
-            rm -f "$_terminal_force_tmp"
-        fi
-    else
-        echo "[switchwall] Warning: material_colors.scss generation failed, keeping previous SCSS" >&2
-        rm -f "$_scss_tmp"
-        rm -f "$_terminal_force_tmp"
+    # Resolve the auto-detected scheme for the KDE wrapper in post_process
+    if [[ "$type_flag" == "auto" ]]; then
+        type_flag="$(jq -r '.scheme // "scheme-tonal-spot"' "$_meta_out" 2>/dev/null || echo "scheme-tonal-spot")"
     fi
 
     # Generate Vesktop theme if enabled (only when app theming is on)
     if [ "$enable_apps_shell" != "false" ]; then
         enable_vesktop=$(jq -r '.appearance.wallpaperTheming.enableVesktop // true' "$SHELL_CONFIG_FILE" 2>/dev/null || echo "true")
         if [[ "$enable_vesktop" != "false" ]]; then
-            "$SCRIPT_DIR/system24_palette.sh"
+            trace_span system24_palette switchwall "$SCRIPT_DIR/system24_palette.sh"
         fi
     fi
 
     # Always run applycolor.sh - it has its own checks for enableTerminal and enableAppsAndShell
-    "$SCRIPT_DIR"/applycolor.sh
+    trace_span applycolor switchwall "$SCRIPT_DIR"/applycolor.sh
     deactivate 2>/dev/null || true
 
     # Pass screen width, height, and wallpaper path to post_process (only when app theming is on)
     if [ "$enable_apps_shell" != "false" ]; then
         read max_width_desired max_height_desired <<< "$(get_max_monitor_resolution)"
-        post_process "$max_width_desired" "$max_height_desired" "$imgpath"
+        trace_span post_process switchwall post_process "$max_width_desired" "$max_height_desired" "$imgpath"
     fi
 }
 
 main() {
+    trace_begin_run
+    _trace_run_start="$(trace_now_us)"
     imgpath=""
     mode_flag=""
     type_flag=""
@@ -920,8 +932,12 @@ main() {
             auto_detect_path="$(resolve_effective_theming_wallpaper)"
         fi
 
-        if [[ -n "$auto_detect_path" && -f "$auto_detect_path" ]]; then
-            detected_type="$(detect_scheme_type_from_image "$auto_detect_path")"
+        if [[ -n "$auto_detect_path" && -f "$auto_detect_path" && -z "$color_flag" ]]; then
+            # The palette comes from this image: switch passes --auto-scheme and
+            # generate_colors_material.py detects the scheme in the same decode.
+            :
+        elif [[ -n "$auto_detect_path" && -f "$auto_detect_path" ]]; then
+            detected_type="$(trace_span scheme_for_image switchwall detect_scheme_type_from_image "$auto_detect_path")"
             # Only use detected_type if it's valid
             valid_detected=0
             for t in "${allowed_types[@]}"; do
@@ -943,6 +959,10 @@ main() {
     fi
 
     switch "$imgpath" "$mode_flag" "$type_flag" "$color_flag" "$color" "$skip_config_write" "$noswitch_flag"
+
+    trace_record switchwall "$_trace_run_start" switchwall
+    # Refresh the Chrome trace (pipeline_trace.json) off the critical path
+    [[ -n "${INIR_TRACE_RUN:-}" ]] && "${_ii_python:-python3}" "$SCRIPT_DIR/pipeline_trace.py" export >/dev/null 2>&1 &
 }
 
 main "$@"
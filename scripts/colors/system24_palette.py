@@ -18,6 +18,8 @@ from colorsys import rgb_to_hls, hls_to_rgb
 from pathlib import Path
 from typing import Dict, Tuple
 
+from output_writer import write_if_changed
+
 
 COLOR_SOURCE = Path(
     os.environ.get(
@@ -394,17 +396,19 @@ def _write_palette(palette: Dict[str, str]) -> None:
     midnight_content = MIDNIGHT_THEME_TEMPLATE.format(palette_css=palette_css)
 
     for out in system24_outputs:
-        with out.open("w", encoding="utf-8") as fh:
-            fh.write(system24_content)
-        print(f"Generated: {out}")
+        if write_if_changed(out, system24_content):
+            print(f"Generated: {out}")
+        else:
+            print(f"Unchanged: {out}")
 
     for out in midnight_outputs:
-        with out.open("w", encoding="utf-8") as fh:
-            fh.write(midnight_content)
+        if write_if_changed(out, midnight_content):
+            print(f"Generated: {out}")
+        else:
+            print(f"Unchanged: {out}")
         legacy_out = out.parent / "ii-midnight.theme.css"
         if legacy_out != out:
             legacy_out.unlink(missing_ok=True)
-        print(f"Generated: {out}")
 
 
 def main() -> None:
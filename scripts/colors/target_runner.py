@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""In-process runner for the theming targets declared in targets/*.json.
+
+applycolor.sh used to start one bash process per module; each module then
+re-read config.json through several jq calls and started its own Python
+interpreter for the generators. This runner parses config.json and the
+generated palette/terminal/SCSS inputs once and applies the targets from a
+thread pool. Targets with a Python implementation (PYTHON_TARGETS) run
+in-process; every other target falls back to its shell module.
+
+    target_runner.py [target-id ...]    (default: every declared target)
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+import pipeline_trace
+from generate_terminal_configs import (
+    ALL_TERMINALS,
+    generate_configs,
+    merge_generator_colors,
+    parse_scss_colors,
+    read_json,
+)
+
+TARGETS_DIR = SCRIPT_DIR / "targets"
+MODULES_DIR = SCRIPT_DIR / "modules"
+
+XDG_CONFIG_HOME = Path(os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config")
+XDG_STATE_HOME = Path(
+    os.environ.get("XDG_STATE_HOME") or Path.home() / ".local" / "state"
+)
+GENERATED_DIR = XDG_STATE_HOME / "quickshell" / "user" / "generated"
+MODULE_LOG = GENERATED_DIR / "theming_modules.log"
+
+# Maps /proc/*/comm name -> config key under .appearance.wallpaperTheming.terminals
+KNOWN_TERMINALS = {
+    "kitty": "kitty",
+    "alacritty": "alacritty",
+    "foot": "foot",
+    "footclient": "foot",
+    "wezterm": "wezterm",
+    "wezterm-gui": "wezterm",
+    "ghostty": "ghostty",
+    "konsole": "konsole",
+}
+SHELL_COMMS = {"fish", "bash", "zsh", "nu", "elvish", "xonsh"}
+
+
+def resolve_config_path() -> Path:
+    """Same resolution as scripts/lib/config-path.sh."""
+    new_dir = XDG_CONFIG_HOME / "inir"
+    old_dir = XDG_CONFIG_HOME / "illogical-impulse"
+    if old_dir.is_symlink() and new_dir.is_dir():
+        return new_dir / "config.json"
+    if old_dir.is_dir():
+        return old_dir / "config.json"
+    return new_dir / "config.json"
+
+
+class ThemingContext:
+    """Config and generated inputs, loaded once and shared by every target."""
+
+    def __init__(self, config: dict, generated_dir: Path):
+        self.config = config
+        self.scss_path = generated_dir / "material_colors.scss"
+        self.palette_path = generated_dir / "palette.json"
+        self.terminal_path = generated_dir / "terminal.json"
+
+        # A corrupt input only degrades the targets that use it; bash-module
+        # targets never read these and must still be applied
+        scss_colors = {}
+        if self.scss_path.is_file():
+            try:
+                scss_colors = parse_scss_colors(self.scss_path)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable {self.scss_path}: {e}", file=sys.stderr)
+        # None (rather than {}) tells the generators the file is missing
+        self.palette = read_json(self.palette_path)
+        self.terminal = read_json(self.terminal_path)
+        self.colors = merge_generator_colors(
+            scss_colors, self.palette or {}, self.terminal or {}
+        )
+
+    @classmethod
+    def load(cls) -> "ThemingContext":
+        try:
+            with open(resolve_config_path(), "r") as f:
+                config = json.load(f)
+        except (OSError, ValueError):
+            config = {}
+        return cls(config if isinstance(config, dict) else {}, GENERATED_DIR)
+
+    def config_value(self, dotted_key: str, fallback=None):
+        current = self.config
+        for part in dotted_key.split("."):
+            if not isinstance(current, dict) or current.get(part) is None:
+                return fallback
+            current = current[part]
+        return current
+
+    def config_bool(self, dotted_key: str, fallback: bool) -> bool:
+        # Mirrors config_bool in module-runtime.sh: only a missing/null value
+        # falls back, an explicit false is preserved
+        value = self.config_value(dotted_key)
+        if value is None:
+            return fallback
+        return value is True or value == "true"
+
+
+# ---------------------------------------------------------------------------
+# Output routing
+# ---------------------------------------------------------------------------
+class ThreadOutput:
+    """sys.stdout/sys.stderr stand-in that lets each thread pick its stream."""
+
+    def __init__(self, default):
+        self.default = default
+        self.local = threading.local()
+
+    def _stream(self):
+        return getattr(self.local, "stream", None) or self.default
+
+    def write(self, text):
+        return self._stream().write(text)
+
+    def flush(self):
+        self._stream().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.default, name)
+
+    @contextlib.contextmanager
+    def redirect(self, stream):
+        previous = getattr(self.local, "stream", None)
+        self.local.stream = stream
+        try:
+            yield
+        finally:
+            self.local.stream = previous
+
+
+_module_log_lock = threading.Lock()
+
+
+def log_module(target_id: str, message: str) -> None:
+    with _module_log_lock:
+        GENERATED_DIR.mkdir(parents=True, exist_ok=True)
+        with open(MODULE_LOG, "a") as f:
+            f.write(f"[{time.strftime('%H:%M:%S')}] [{target_id}] {message}\n")
+
+
+@contextlib.contextmanager
+def output_to_log(log_path: Path):
+    """Route this thread's stdout and stderr to `log_path` (appending)."""
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "a") as log:
+        stack = contextlib.ExitStack()
+        for stream in (sys.stdout, sys.stderr):
+            if isinstance(stream, ThreadOutput):
+                stack.enter_context(stream.redirect(log))
+        with stack:
+            yield
+
+
+# ---------------------------------------------------------------------------
+# Processes
+# ---------------------------------------------------------------------------
+def process_comms() -> dict:
+    """Map of pid -> comm for every running process."""
+    comms = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/comm", "r") as f:
+                comms[int(entry)] = f.read().strip()
+        except OSError:
+            continue
+    return comms
+
+
+def parent_pid(pid: int):
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("PPid:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def find_terminal_ancestor(pid: int, comms: dict):
+    """Config key of the terminal emulator owning `pid`, or None if unknown."""
+    for _ in range(20):
+        if pid <= 1:
+            break
+        comm = comms.get(pid)
+        if comm in KNOWN_TERMINALS:
+            return KNOWN_TERMINALS[comm]
+        ppid = parent_pid(pid)
+        if ppid is None or ppid == pid:
+            break
+        pid = ppid
+    return None
+
+
+def signal_processes(comms: dict, sig, name: str, substring: bool = False) -> None:
+    """`pgrep -x name && pkill [-x] name` over a process_comms() snapshot."""
+    if name not in comms.values():
+        return
+    for pid, comm in comms.items():
+        if comm == name or (substring and name in comm):
+            with contextlib.suppress(ProcessLookupError, PermissionError):
+                os.kill(pid, sig)
+
+
+# ---------------------------------------------------------------------------
+# Python targets
+# ---------------------------------------------------------------------------
+def render_term_sequences(ctx: ThemingContext, template: str) -> str:
+    if ctx.terminal is not None:
+        for idx in range(16):
+            value = ctx.terminal.get(f"term{idx}")
+            if value:
+                template = template.replace(f"$term{idx} #", value.lstrip("#"))
+    else:
+        for name, value in ctx.colors.items():
+            template = template.replace(f"${name} #", value.lstrip("#"))
+    return template.replace("$alpha", "100")
+
+
+def apply_term_sequences(ctx: ThemingContext) -> None:
+    """Push the palette to open shells through OSC sequences on their pts."""
+    template_path = SCRIPT_DIR / "terminal" / "sequences.txt"
+    if not template_path.is_file():
+        return
+    sequences = render_term_sequences(ctx, template_path.read_text())
+    sequences_path = GENERATED_DIR / "terminal" / "sequences.txt"
+    sequences_path.parent.mkdir(parents=True, exist_ok=True)
+    sequences_path.write_text(sequences)
+
+    comms = process_comms()
+    safe_pts = []
+    for pid, comm in comms.items():
+        if comm not in SHELL_COMMS:
+            continue
+        try:
+            tty = os.readlink(f"/proc/{pid}/fd/0")
+        except OSError:
+            continue
+        if not tty.startswith("/dev/pts/") or tty in safe_pts:
+            continue
+        term_key = find_terminal_ancestor(pid, comms)
+        # Unknown terminals still get the sequences (backwards compat)
+        if term_key is None or ctx.config_bool(
+            f"appearance.wallpaperTheming.terminals.{term_key}", True
+        ):
+            safe_pts.append(tty)
+
+    data = sequences.encode()
+    for tty in safe_pts:
+        if not os.access(tty, os.W_OK):
+            continue
+        try:
+            # Non-blocking so a stuck terminal cannot hold up the runner
+            fd = os.open(tty, os.O_WRONLY | os.O_NONBLOCK | os.O_NOCTTY)
+        except OSError:
+            continue
+        with contextlib.suppress(OSError):
+            os.write(fd, data)
+        os.close(fd)
+
+
+# D-Bus and oh-my-posh can hang; like the bash module's background job, they
+# run detached so a stuck session never holds up apply_targets
+KONSOLE_RELOAD = (
+    "qdbus6 org.kde.konsole 2>/dev/null | grep -E '/Sessions/[0-9]+$' |"
+    " while IFS= read -r session; do"
+    ' qdbus6 org.kde.konsole "$session" org.kde.konsole.Session.setProfile ii-auto;'
+    " done"
+)
+
+
+def spawn_detached(command: list) -> None:
+    with contextlib.suppress(OSError):
+        subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+
+def reload_terminal_colors(terminals: list) -> None:
+    comms = process_comms()
+    running = set(comms.values())
+    home = Path.home()
+    for term in terminals:
+        if term == "kitty":
+            signal_processes(comms, signal.SIGUSR1, "kitty")
+        elif term == "foot":
+            signal_processes(comms, signal.SIGUSR1, "foot", substring=True)
+        elif term in ("alacritty", "wezterm"):
+            config = {
+                "alacritty": home / ".config/alacritty/alacritty.toml",
+                "wezterm": home / ".config/wezterm/wezterm.lua",
+            }[term]
+            if term in running and config.is_file():
+                with contextlib.suppress(OSError):
+                    config.touch()
+        elif term == "konsole":
+            if "konsole" in running and shutil.which("qdbus6"):
+                spawn_detached(["sh", "-c", KONSOLE_RELOAD])
+        elif term == "btop":
+            signal_processes(comms, signal.SIGUSR2, "btop", substring=True)
+        elif term == "omp":
+            if shutil.which("oh-my-posh"):
+                spawn_detached(["oh-my-posh", "enable", "reload"])
+
+
+def apply_terminals(ctx: ThemingContext) -> None:
+    """Python port of modules/10-terminals.sh."""
+    if not ctx.config_bool("appearance.wallpaperTheming.enableTerminal", True):
+        return
+    if not ctx.scss_path.is_file():
+        return
+    apply_term_sequences(ctx)
+
+    enabled_terminals = [
+        term
+        for term in ALL_TERMINALS
+        if ctx.config_bool(f"appearance.wallpaperTheming.terminals.{term}", True)
+        and shutil.which("oh-my-posh" if term == "omp" else term)
+    ]
+    if not enabled_terminals:
+        return
+
+    with output_to_log(GENERATED_DIR / "terminal_colors.log"):
+        changed = generate_configs(
+            ctx.colors,
+            enabled_terminals,
+            str(ctx.scss_path),
+            str(ctx.palette_path),
+            str(ctx.terminal_path),
+            palette=ctx.palette,
+            terminal=ctx.terminal,
+        )
+        # Only reload terminals whose generated config actually changed
+        reload_terminal_colors(changed)
+
+
+def run_script(*command) -> None:
+    subprocess.run([str(part) for part in command], check=True)
+
+
+def apply_gtk_kde(ctx: ThemingContext) -> None:
+    """Python port of modules/20-gtk-kde.sh."""
+    if not ctx.config_bool(
+        "appearance.wallpaperTheming.enableAppsAndShell", True
+    ) and not ctx.config_bool("appearance.wallpaperTheming.enableQtApps", True):
+        return
+    run_script(SCRIPT_DIR / "apply-gtk-theme.sh")
+
+
+def apply_chrome(ctx: ThemingContext) -> None:
+    """Python port of modules/40-chrome.sh."""
+    if ctx.config_bool("appearance.wallpaperTheming.enableChrome", True):
+        run_script(SCRIPT_DIR / "apply-chrome-theme.sh")
+
+
+def apply_spicetify(ctx: ThemingContext) -> None:
+    """Python port of modules/50-spicetify.sh."""
+    if not ctx.config_bool("appearance.wallpaperTheming.enableSpicetify", False):
+        return
+    if shutil.which("spicetify"):
+        run_script(SCRIPT_DIR / "apply-spicetify-theme.sh")
+
+
+def apply_sddm(ctx: ThemingContext) -> None:
+    """Python port of modules/60-sddm.sh."""
+    sync_script = SCRIPT_DIR.parent / "sddm" / "sync-pixel-sddm.py"
+    if Path("/usr/share/sddm/themes/ii-pixel").is_dir() and sync_script.is_file():
+        # System python on purpose, as the module does: it may need to run
+        # outside the venv to reach the SDDM theme helpers
+        run_script("python3", sync_script)
+
+
+# Targets without an entry here run their shell module
+PYTHON_TARGETS = {
+    "terminals": apply_terminals,
+    "gtk-kde": apply_gtk_kde,
+    "chrome": apply_chrome,
+    "spicetify": apply_spicetify,
+    "sddm": apply_sddm,
+}
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+def declared_targets() -> list:
+    """(target id, module path) pairs, like list_declared_theming_modules."""
+    targets = []
+    for manifest_path in sorted(TARGETS_DIR.glob("*.json")):
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        module_name = manifest.get("module") if isinstance(manifest, dict) else None
+        if not module_name:
+            continue
+        targets.append((manifest_path.stem, MODULES_DIR / module_name))
+    if not targets:
+        targets = [(path.stem, path) for path in sorted(MODULES_DIR.glob("*.sh"))]
+    return targets
+
+
+def run_target(ctx: ThemingContext, target_id: str, module_path: Path) -> bool:
+    apply = PYTHON_TARGETS.get(target_id)
+    kind = "shell" if apply is None else "python"
+    with pipeline_trace.stage(target_id, "theming_target", runner=kind):
+        return _run_target(ctx, target_id, module_path, apply)
+
+
+def _run_target(ctx: ThemingContext, target_id: str, module_path: Path, apply) -> bool:
+    if apply is None:
+        if not module_path.is_file():
+            return True
+        if subprocess.run(["bash", str(module_path)]).returncode == 0:
+            return True
+        log_module(target_id, f"module failed: {module_path.name}")
+        return False
+
+    try:
+        apply(ctx)
+    except subprocess.CalledProcessError as e:
+        log_module(target_id, f"target failed: exit status {e.returncode}")
+        return False
+    except Exception:
+        log_module(target_id, "target failed")
+        traceback.print_exc()
+        return False
+    return True
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Apply iNiR theming targets")
+    parser.add_argument(
+        "targets", nargs="*", help="target ids to apply (default: all declared)"
+    )
+    args = parser.parse_args()
+
+    targets = declared_targets()
+    if args.targets:
+        known = dict(targets)
+        unknown = [target_id for target_id in args.targets if target_id not in known]
+        for target_id in unknown:
+            print(f"Unknown theming target: {target_id}", file=sys.stderr)
+        if unknown:
+            return 1
+        targets = [(target_id, known[target_id]) for target_id in args.targets]
+    if not targets:
+        print(f"No theming modules found in {MODULES_DIR}", file=sys.stderr)
+        return 1
+
+    GENERATED_DIR.mkdir(parents=True, exist_ok=True)
+    # Runs started on their own (not from switchwall.sh) get a trace run too
+    owns_trace_run = not os.environ.get("INIR_TRACE_RUN")
+    if owns_trace_run and os.environ.get("INIR_TRACE") != "0":
+        os.environ["INIR_TRACE_RUN"] = f"{pipeline_trace.now_us()}-{os.getpid()}"
+    run_start = pipeline_trace.now_us()
+    sys.stdout = ThreadOutput(sys.stdout)
+    sys.stderr = ThreadOutput(sys.stderr)
+    try:
+        ctx = ThemingContext.load()
+    except Exception:
+        # Still run every target: shell modules read their own inputs
+        traceback.print_exc()
+        ctx = ThemingContext({}, Path(os.devnull))
+
+    with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+        results = list(pool.map(lambda target: run_target(ctx, *target), targets))
+    pipeline_trace.record("apply_targets", run_start, "theming_target")
+    if owns_trace_run and pipeline_trace.current_run():
+        with contextlib.suppress(OSError):
+            pipeline_trace.export(pipeline_trace.DEFAULT_EXPORT_RUNS)
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
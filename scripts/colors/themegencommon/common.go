@@ -1,14 +1,55 @@
 package themegencommon
 
 import (
+	"bytes"
 	"encoding/json"
 	"fmt"
 	"math"
 	"os"
+	"path/filepath"
 	"regexp"
 	"strings"
 )
 
+// WriteFileIfChanged atomically replaces path with data (temp file + rename)
+// unless the file already holds exactly data, so editors watching it do not
+// reload for nothing. Symlinks are resolved to keep the link itself intact.
+// Reports whether the file was written.
+func WriteFileIfChanged(path string, data []byte, perm os.FileMode) (bool, error) {
+	if resolved, err := filepath.EvalSymlinks(path); err == nil {
+		path = resolved
+	}
+	if existing, err := os.ReadFile(path); err == nil && bytes.Equal(existing, data) {
+		return false, nil
+	}
+	if info, err := os.Stat(path); err == nil {
+		perm = info.Mode().Perm()
+	}
+	tmp, err := os.CreateTemp(filepath.Dir(path), "."+filepath.Base(path)+".*.tmp")
+	if err != nil {
+		return false, err
+	}
+	tmpPath := tmp.Name()
+	if _, err := tmp.Write(data); err != nil {
+		tmp.Close()
+		os.Remove(tmpPath)
+		return false, err
+	}
+	if err := tmp.Close(); err != nil {
+		os.Remove(tmpPath)
+		return false, err
+	}
+	if err := os.Chmod(tmpPath, perm); err != nil {
+		os.Remove(tmpPath)
+		return false, err
+	}
+	if err := os.Rename(tmpPath, path); err != nil {
+		os.Remove(tmpPath)
+		return false, err
+	}
+	return true, nil
+}
+
 func ReadStringMapJSON(path string) (map[string]string, error) {
 	data, err := os.ReadFile(path)
 	if err != nil {
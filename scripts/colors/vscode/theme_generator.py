@@ -10,6 +10,9 @@ import re
 import sys
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from output_writer import write_json_if_changed
+
 
 # ── Color manipulation helpers ──────────────────────────────────────────
 
@@ -819,9 +822,9 @@ def merge_settings_json(
         "rules": semantic_tokens,
     }
 
-    # Write back with pretty formatting
-    with open(settings_path, "w") as f:
-        json.dump(settings, f, indent=2, ensure_ascii=False)
+    # Write back with pretty formatting; unchanged settings are left untouched
+    # so VSCode does not reload for nothing
+    write_json_if_changed(settings_path, settings, indent=2, ensure_ascii=False)
 
     return True
 
@@ -924,8 +927,7 @@ def strip_vscode_theme(settings_path: str) -> bool:
 
     if changed:
         try:
-            with open(settings_path, "w") as f:
-                json.dump(settings, f, indent=2, ensure_ascii=False)
+            write_json_if_changed(settings_path, settings, indent=2, ensure_ascii=False)
             print(f"✓ Stripped iNiR theme from {settings_path}")
         except OSError as e:
             print(f"✗ Failed to write {settings_path}: {e}", file=sys.stderr)
@@ -552,7 +552,8 @@ func writeSettings(path string, settings map[string]any) error {
 		return err
 	}
 	data = append(data, '\n')
-	return os.WriteFile(path, data, 0o644)
+	_, err = common.WriteFileIfChanged(path, data, 0o644)
+	return err
 }
 
 func getSettingsPath(forkName string) string {
@@ -11,6 +11,9 @@ import re
 import sys
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from output_writer import write_json_if_changed
+
 
 def generate_zed_config(
     colors, scss_path, output_path, palette_json_path=None, terminal_json_path=None
@@ -1022,8 +1025,7 @@ def generate_zed_config(
         ],
     }
 
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w") as f:
-        json.dump(theme_data, f, indent=2, ensure_ascii=False)
-
-    print(f"\u2713 Generated Zed theme")
+    if write_json_if_changed(output_path, theme_data, indent=2, ensure_ascii=False):
+        print(f"\u2713 Generated Zed theme")
+    else:
+        print(f"\u2713 Zed theme unchanged")
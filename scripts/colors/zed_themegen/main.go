@@ -4,6 +4,7 @@ import (
 	"encoding/json"
 	"flag"
 	"fmt"
+	common "inir/scripts/colors/themegencommon"
 	"math"
 	"os"
 	"path/filepath"
@@ -1102,9 +1103,14 @@ func main() {
 		fmt.Fprintln(os.Stderr, err)
 		os.Exit(1)
 	}
-	if err := os.WriteFile(*outputPath, append(data, '\n'), 0o644); err != nil {
+	changed, err := common.WriteFileIfChanged(*outputPath, append(data, '\n'), 0o644)
+	if err != nil {
 		fmt.Fprintln(os.Stderr, err)
 		os.Exit(1)
 	}
-	fmt.Println("✓ Generated Zed theme")
+	if changed {
+		fmt.Println("✓ Generated Zed theme")
+	} else {
+		fmt.Println("✓ Zed theme unchanged")
+	}
 }
@@ -54,7 +54,7 @@ _inir_completions() {
                     COMPREPLY=( $(compgen -W "install uninstall enable disable start stop restart status logs" -- "$cur") )
                     ;;
                 theme)
-                    COMPREPLY=( $(compgen -W "list-targets inspect doctor scaffold apply" -- "$cur") )
+                    COMPREPLY=( $(compgen -W "list-targets inspect doctor scaffold apply timings" -- "$cur") )
                     ;;
                 completions)
                     COMPREPLY=( $(compgen -W "bash zsh fish" -- "$cur") )
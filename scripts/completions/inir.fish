@@ -105,7 +105,7 @@ complete -c inir -n '__fish_use_subcommand' -a zoom -d 'Screen zoom'
 complete -c inir -n '__fish_seen_subcommand_from service' -a 'install uninstall enable disable start stop restart status logs'
 
 # Subcommand completions: theme
-complete -c inir -n '__fish_seen_subcommand_from theme' -a 'list-targets inspect doctor scaffold apply'
+complete -c inir -n '__fish_seen_subcommand_from theme' -a 'list-targets inspect doctor scaffold apply timings'
 
 # Subcommand completions: completions
 complete -c inir -n '__fish_seen_subcommand_from completions' -a 'bash zsh fish'
@@ -5,65 +5,126 @@ import cv2
 import json
 import numpy as np
 import sys
+import time
 
 DEFAULT_IMAGE_PATH = '/tmp/quickshell/media/screenshot/image'
 
-def iou(boxA, boxB):
-    # Compute intersection over union for two boxes
-    xA = max(boxA['x'], boxB['x'])
-    yA = max(boxA['y'], boxB['y'])
-    xB = min(boxA['x'] + boxA['width'], boxB['x'] + boxB['width'])
-    yB = min(boxA['y'] + boxA['height'], boxB['y'] + boxB['height'])
-    interW = max(0, xB - xA)
-    interH = max(0, yB - yA)
-    interArea = interW * interH
-    boxAArea = boxA['width'] * boxA['height']
-    boxBArea = boxB['width'] * boxB['height']
-    iou = interArea / float(boxAArea + boxBArea - interArea) if (boxAArea + boxBArea - interArea) > 0 else 0
-    return iou
-
 def non_max_suppression(regions, iou_threshold=0.7):
-    # Sort by area (largest first)
-    regions = sorted(regions, key=lambda r: r['width'] * r['height'], reverse=True)
+    """Greedy NMS, largest area first, dropping regions with IoU >= iou_threshold.
+
+    IoU is a pair's intersection area over the area of their union (0 when
+    the union is empty). Each kept box is tested against the remaining ones
+    at once with NumPy. Boxes are sorted by area, and a box with area B can
+    only reach IoU B / A with a larger one of area A. So only the prefix of
+    later boxes with B >= threshold * A is compared at all.
+    """
+    if not regions:
+        return []
+    boxes = np.array([[r['x'], r['y'], r['width'], r['height']] for r in regions], dtype=np.int64)
+    areas = boxes[:, 2] * boxes[:, 3]
+    # Sort by area (largest first); stable like sorted(..., reverse=True)
+    order = np.argsort(-areas, kind='stable')
+    x1, y1 = boxes[order, 0], boxes[order, 1]
+    x2, y2 = x1 + boxes[order, 2], y1 + boxes[order, 3]
+    areas = areas[order]
+    ascending_areas = areas[::-1]
+    suppressed = np.zeros(len(order), dtype=bool)
     keep = []
-    while regions:
-        current = regions.pop(0)
-        keep.append(current)
-        regions = [r for r in regions if iou(current, r) < iou_threshold]
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        keep.append(regions[order[i]])
+        # Later boxes too small to reach the threshold form the tail of `areas`
+        smallest = iou_threshold * areas[i] * (1 - 1e-9)
+        end = len(order) - np.searchsorted(ascending_areas, smallest, side='left')
+        if end <= i + 1:
+            continue
+        j = slice(i + 1, end)
+        inter_w = np.maximum(0, np.minimum(x2[i], x2[j]) - np.maximum(x1[i], x1[j]))
+        inter_h = np.maximum(0, np.minimum(y2[i], y2[j]) - np.maximum(y1[i], y1[j]))
+        inter = inter_w * inter_h
+        union = areas[i] + areas[j] - inter
+        iou = np.divide(inter, union, out=np.zeros(len(inter)), where=union > 0)
+        suppressed[j] |= iou >= iou_threshold
     return keep
 
-def find_regions(image_path, min_width, min_height, max_width=None, max_height=None, quality=False, k=150, min_size=20, sigma=0.8, resize_factor=1.0):
+def load_image(image_path):
     image = cv2.imread(image_path)
     if image is None:
         print(f'Error: Could not load image {image_path}', file=sys.stderr)
         sys.exit(1)
+    return image
+
+def selective_search(image, resize_factor=1.0, quality=False, k=150, min_size=20, sigma=0.8):
+    """Selective-search rects of `image` run at `resize_factor`, in original image coordinates."""
     orig_h, orig_w = image.shape[:2]
     if resize_factor != 1.0:
-        image = cv2.resize(image, (int(orig_w * resize_factor), int(orig_h * resize_factor)), interpolation=cv2.INTER_AREA)
+        image = cv2.resize(image, (max(1, int(orig_w * resize_factor)), max(1, int(orig_h * resize_factor))), interpolation=cv2.INTER_AREA)
     ss = cv2.ximgproc.segmentation.createSelectiveSearchSegmentation()
     ss.setBaseImage(image)
     if quality:
         ss.switchToSelectiveSearchQuality(k, min_size, sigma)
     else:
         ss.switchToSelectiveSearchFast(k, min_size, sigma)
-    rects = ss.process()
-    regions = []
-    for (x, y, w, h) in rects:
+    rects = []
+    for (x, y, w, h) in ss.process():
         # Scale regions back to original image size if resized
         if resize_factor != 1.0:
             x = int(x / resize_factor)
             y = int(y / resize_factor)
             w = int(w / resize_factor)
             h = int(h / resize_factor)
+        rects.append((int(x), int(y), int(w), int(h)))
+    return rects
+
+def filter_regions(rects, image_width, image_height, min_width, min_height, max_width=None, max_height=None):
+    regions = []
+    for (x, y, w, h) in rects:
         # Filter out region that is exactly the same size as the original image
-        if w == orig_w and h == orig_h and x == 0 and y == 0:
+        if w == image_width and h == image_height and x == 0 and y == 0:
             continue
         if w > min_width and h > min_height:
             if (max_width is None or w < max_width) and (max_height is None or h < max_height):
-                regions.append({'x': int(x), 'y': int(y), 'width': int(w), 'height': int(h)})
+                regions.append({'x': x, 'y': y, 'width': w, 'height': h})
     # Remove duplicates/overlaps
-    regions = non_max_suppression(regions, iou_threshold=0.7)
-    return regions, cv2.imread(image_path)  # Return original image for drawing
+    return non_max_suppression(regions, iou_threshold=0.7)
+
+def find_regions(image_path, min_width, min_height, max_width=None, max_height=None, quality=False, k=150, min_size=20, sigma=0.8, resize_factor=1.0):
+    image = load_image(image_path)
+    rects = selective_search(image, resize_factor, quality, k, min_size, sigma)
+    regions = filter_regions(rects, image.shape[1], image.shape[0], min_width, min_height, max_width, max_height)
+    return regions, image  # Return original image for drawing
+
+# Resize factors --stream goes through, as multiples of --resize-factor
+PYRAMID_SCALES = (0.5, 1.0, 2.0, 3.0)
+DEFAULT_BUDGET_MS = 1500
+
+def stream_regions(image, emit, min_width, min_height, max_width=None, max_height=None, quality=False, k=150, min_size=20, sigma=0.8, resize_factor=1.0, budget_ms=DEFAULT_BUDGET_MS):
+    """Run selective search coarse to fine, calling emit(regions) whenever the result improves.
+
+    Rects from every finished level are merged before NMS. The coarsest level
+    always runs; a finer one is skipped when its expected time (the last
+    level's time scaled by the pixel count) would overrun `budget_ms`.
+    Returns the last regions emitted.
+    """
+    start = time.monotonic()
+    deadline = start + budget_ms / 1000
+    image_height, image_width = image.shape[:2]
+    factors = sorted({min(1.0, resize_factor * scale) for scale in PYRAMID_SCALES})
+    rects = []
+    regions = None
+    last_factor = last_seconds = None
+    for factor in factors:
+        if last_seconds is not None and time.monotonic() + last_seconds * (factor / last_factor) ** 2 > deadline:
+            break
+        level_start = time.monotonic()
+        rects.extend(selective_search(image, factor, quality, k, min_size, sigma))
+        last_factor, last_seconds = factor, time.monotonic() - level_start
+        refined = filter_regions(rects, image_width, image_height, min_width, min_height, max_width, max_height)
+        if refined != regions:
+            regions = refined
+            emit(regions)
+    return regions or []
 
 def draw_regions(image, regions, output_path):
     for region in regions:
@@ -91,11 +152,26 @@ def main():
     parser.add_argument('--min-size', type=int, default=50, help='Segmentation parameter min_size (default: 20)')
     parser.add_argument('--sigma', type=float, default=0.6, help='Segmentation parameter sigma (default: 0.8)')
     parser.add_argument('--resize-factor', type=float, default=0.1, help='Resize factor for input image before processing (default: 1.0, e.g. 0.5 for half size)')
+    parser.add_argument('--stream', action='store_true', help='Print coarse regions right away, then a refined list per finer pyramid level, one JSON list per line')
+    parser.add_argument('--budget-ms', type=int, default=DEFAULT_BUDGET_MS, help=f'Latency budget for --stream; finer levels that would overrun it are skipped (default: {DEFAULT_BUDGET_MS})')
+    parser.add_argument('--threads', type=int, default=0, help='OpenCV worker threads (default: 0, OpenCV\'s own choice)')
     parser.add_argument('--hyprctl', action='store_true', help='Mimics hyprctl\'s window output, like {"at": [x, y], "size": [w, h]}')
     args = parser.parse_args()
+    if args.threads > 0:
+        cv2.setNumThreads(args.threads)
+
+    def format_regions(regions):
+        if args.single and regions:
+            largest = max(regions, key=lambda r: r['width'] * r['height'])
+            regions = [largest]
+        if args.hyprctl:
+            regions = [{"at": [r['x'], r['y']], "size": [r['width'], r['height']]} for r in regions]
+        return regions
 
-    regions, image = find_regions(
-        args.image,
+    def output(regions):
+        print(json.dumps(format_regions(regions)), flush=True)
+
+    search_args = dict(
         min_width=args.min_width,
         min_height=args.min_height,
         max_width=args.max_width,
@@ -106,14 +182,17 @@ def main():
         sigma=args.sigma,
         resize_factor=args.resize_factor
     )
-    if args.single and regions:
-        largest = max(regions, key=lambda r: r['width'] * r['height'])
-        regions = [largest]
-    if args.hyprctl:
-        regions = [{"at": [r['x'], r['y']], "size": [r['width'], r['height']]} for r in regions]
-    print(json.dumps(regions))
+    if args.stream:
+        image = load_image(args.image)
+        regions = stream_regions(image, output, budget_ms=args.budget_ms, **search_args)
+        if args.debug_output:
+            draw_regions(image, format_regions(regions), args.debug_output)
+        return
+
+    regions, image = find_regions(args.image, **search_args)
+    output(regions)
     if args.debug_output:
-        draw_regions(image, regions, args.debug_output)
+        draw_regions(image, format_regions(regions), args.debug_output)
 
 if __name__ == '__main__':
     main()
@@ -6,7 +6,9 @@ os.environ["OPENCV_LOG_LEVEL"] = "SILENT"
 import cv2
 import numpy as np
 import argparse
+import hashlib
 import json
+import sys
 
 def center_crop(img, target_w, target_h):
     h, w = img.shape[:2]
@@ -18,32 +20,261 @@ def center_crop(img, target_w, target_h):
     y2 = y1 + target_h
     return img[y1:y2, x1:x2]
 
-def find_least_busy_region(image_path, region_width=300, region_height=200, screen_width=None, screen_height=None, verbose=False, stride=2, screen_mode="fill", horizontal_padding=50, vertical_padding=50, busiest=False):
-    img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-    if img is None:
-        raise FileNotFoundError(f"Image not found: {image_path}")
-    orig_h, orig_w = img.shape
-    scale = 1.0
-    if screen_width is not None and screen_height is not None:
-        scale_w = screen_width / orig_w
-        scale_h = screen_height / orig_h
-        if screen_mode == "fill":
-            scale = max(scale_w, scale_h)
-        else:
-            scale = min(scale_w, scale_h)
-        new_w = int(orig_w * scale)
-        new_h = int(orig_h * scale)
-        if verbose:
-            print(f"Scaling image from {orig_w}x{orig_h} to {new_w}x{new_h} (scale: {scale:.3f}, mode: {screen_mode})")
-        img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LANCZOS4)
-        img = center_crop(img, screen_width, screen_height)
-        if verbose:
-            print(f"Cropped image to {screen_width}x{screen_height}")
-    else:
+# Longest side, in pixels, of the grayscale frame the region search runs on.
+# Screens up to 1920 wide are analyzed pixel-exact; larger ones are downscaled
+# and the result is mapped back to screen coordinates.
+ANALYSIS_MAX_SIDE = 1920
+
+def jpeg_dimensions(image_path):
+    """(width, height) read from a JPEG's SOF header, or None if not a JPEG."""
+    try:
+        with open(image_path, "rb") as f:
+            if f.read(2) != b"\xff\xd8":
+                return None
+            while True:
+                marker = f.read(2)
+                if len(marker) < 2 or marker[0] != 0xFF:
+                    return None
+                if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+                    continue
+                length = int.from_bytes(f.read(2), "big")
+                if 0xC0 <= marker[1] <= 0xCF and marker[1] not in (0xC4, 0xC8, 0xCC):
+                    header = f.read(5)
+                    return int.from_bytes(header[3:5], "big"), int.from_bytes(header[1:3], "big")
+                f.seek(length - 2, 1)
+    except OSError:
+        return None
+
+def screen_scale(img_w, img_h, screen_width, screen_height, screen_mode="fill"):
+    scale_w = screen_width / img_w
+    scale_h = screen_height / img_h
+    return max(scale_w, scale_h) if screen_mode == "fill" else min(scale_w, scale_h)
+
+def read_image(image_path, flags, decoded=None):
+    """cv2.imread, memoized in the `decoded` dict when one is given."""
+    if decoded is None:
+        return cv2.imread(image_path, flags)
+    if flags not in decoded:
+        decoded[flags] = cv2.imread(image_path, flags)
+    return decoded[flags]
+
+# Wallpapers sampled with cv2.VideoCapture instead of read as one still image
+ANIMATED_EXTENSIONS = (".mp4", ".mkv", ".webm", ".avi", ".mov", ".gif", ".webp")
+# Frames sampled from an animated wallpaper, and the longest side they are
+# analyzed at (kept smaller than for stills since every frame is searched)
+DEFAULT_FRAME_SAMPLES = 8
+ANIMATED_ANALYSIS_MAX_SIDE = 960
+
+def is_animated(image_path):
+    return image_path.lower().endswith(ANIMATED_EXTENSIONS)
+
+def sample_frames(video_path, count=DEFAULT_FRAME_SAMPLES):
+    """Up to `count` BGR frames spread evenly over a video or animated image.
+
+    Returns an empty list when OpenCV cannot read it as a video (e.g. a
+    still .webp), so callers can fall back to cv2.imread.
+    """
+    capture = cv2.VideoCapture(video_path)
+    frames = []
+    try:
+        if not capture.isOpened():
+            return frames
+        total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        seekable = total > 0
+        if not seekable:
+            # No frame count (raw streams, some containers), and seeking is
+            # unreliable without one: count with grab(), which skips the
+            # conversion to BGR, then walk forward again from the start.
+            total = 0
+            while capture.grab():
+                total += 1
+            capture.release()
+            capture = cv2.VideoCapture(video_path)
+        count = max(1, count)
+        targets = sorted({i * total // count for i in range(count)})
+        position = 0
+        for target in targets:
+            if target != position:
+                if seekable:
+                    capture.set(cv2.CAP_PROP_POS_FRAMES, target)
+                else:
+                    while position < target and capture.grab():
+                        position += 1
+            ok, frame = capture.read()
+            if not ok:
+                break
+            frames.append(frame)
+            position = target + 1
+    finally:
+        capture.release()
+    return frames
+
+def fit_to_screen(img, screen_width=None, screen_height=None, screen_mode="fill", verbose=False):
+    """Scale and center-crop a decoded image the way the wallpaper is shown."""
+    orig_h, orig_w = img.shape[:2]
+    if screen_width is None or screen_height is None:
         if verbose:
             print(f"Using original image size: {orig_w}x{orig_h}")
-    arr = img.astype(np.float64)
-    h, w = arr.shape
+        return img
+    scale = screen_scale(orig_w, orig_h, screen_width, screen_height, screen_mode)
+    new_w = int(orig_w * scale)
+    new_h = int(orig_h * scale)
+    if verbose:
+        print(f"Scaling image from {orig_w}x{orig_h} to {new_w}x{new_h} (scale: {scale:.3f}, mode: {screen_mode})")
+    if (new_w, new_h) != (orig_w, orig_h):
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+        img = cv2.resize(img, (new_w, new_h), interpolation=interpolation)
+    img = center_crop(img, screen_width, screen_height)
+    if verbose:
+        print(f"Cropped image to {screen_width}x{screen_height}")
+    return img
+
+def load_screen_frame(image_path, screen_width=None, screen_height=None, screen_mode="fill", verbose=False, decoded=None):
+    """Decode the wallpaper once and fit it to the screen the way it is shown.
+
+    Large JPEGs are decoded at a reduced DCT scale when that still leaves
+    enough pixels for the screen, and downscaling uses INTER_AREA. Passing
+    the same `decoded` dict for several screens shares the decodes.
+    Animated wallpapers yield their first frame.
+    """
+    if is_animated(image_path):
+        frames = load_screen_frames(image_path, screen_width, screen_height, screen_mode, 1, verbose, decoded)
+        return frames[0]
+    flags = cv2.IMREAD_COLOR
+    dims = jpeg_dimensions(image_path) if screen_width is not None and screen_height is not None else None
+    if dims:
+        scale = screen_scale(dims[0], dims[1], screen_width, screen_height, screen_mode)
+        for factor, reduced_flags in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2)):
+            if scale * factor <= 1.0:
+                flags = reduced_flags
+                break
+    img = read_image(image_path, flags, decoded)
+    if img is not None and flags != cv2.IMREAD_COLOR and dims and screen_scale(img.shape[1], img.shape[0], screen_width, screen_height, screen_mode) > 1.0:
+        # EXIF rotation swapped the axes; the reduced decode is too small
+        img = read_image(image_path, cv2.IMREAD_COLOR, decoded)
+    if img is None:
+        raise FileNotFoundError(f"Image not found: {image_path}")
+    return fit_to_screen(img, screen_width, screen_height, screen_mode, verbose)
+
+def load_screen_frames(image_path, screen_width=None, screen_height=None, screen_mode="fill", count=DEFAULT_FRAME_SAMPLES, verbose=False, decoded=None):
+    """Screen-fitted frames sampled evenly over an animated wallpaper.
+
+    Falls back to the still image when OpenCV cannot play the file. The raw
+    samples are kept in `decoded` so other screens reuse them.
+    """
+    key = ("frames", count)
+    frames = decoded.get(key) if decoded is not None else None
+    if frames is None:
+        frames = sample_frames(image_path, count)
+        if decoded is not None:
+            decoded[key] = frames
+    if not frames:
+        img = read_image(image_path, cv2.IMREAD_COLOR, decoded)
+        if img is None:
+            raise FileNotFoundError(f"Image not found: {image_path}")
+        frames = [img]
+    if verbose:
+        print(f"Sampled {len(frames)} frame(s) from {image_path}")
+    return [fit_to_screen(frame, screen_width, screen_height, screen_mode, verbose and i == 0) for i, frame in enumerate(frames)]
+
+def analysis_frame(frame, max_side=ANALYSIS_MAX_SIDE):
+    """Copy of `frame` for the region search, at most `max_side` long.
+
+    Returns (image, factor) where factor is analysis pixels per screen pixel.
+    """
+    h, w = frame.shape[:2]
+    if not max_side or max(h, w) <= max_side:
+        return frame, 1.0
+    factor = max_side / max(h, w)
+    small = cv2.resize(frame, (max(1, round(w * factor)), max(1, round(h * factor))), interpolation=cv2.INTER_AREA)
+    return small, factor
+
+def integral_images(img):
+    """Zero-padded integral images of `img` and `img**2` (shape (h+1, w+1)).
+
+    cv2.integral2 builds both in one pass straight from the 8-bit image; the
+    float64 sums are exact, so this matches integrating a float64 copy.
+    """
+    integral, integral_sq = cv2.integral2(img, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+    return integral, integral_sq
+
+def window_sums(ii, region_width, region_height, x_start, x_last, y_start, y_last, stride=1):
+    """Sum of every region_width x region_height window of a zero-padded integral image.
+
+    Entry [i, j] is the window whose top-left corner is
+    (x_start + j * stride, y_start + i * stride); x_last/y_last are the last
+    corners included.
+    """
+    rows = slice(y_start, y_last + 1, stride)
+    cols = slice(x_start, x_last + 1, stride)
+    rows_end = slice(y_start + region_height, y_last + region_height + 1, stride)
+    cols_end = slice(x_start + region_width, x_last + region_width + 1, stride)
+    total = ii[rows_end, cols_end] - ii[rows_end, cols]
+    total -= ii[rows, cols_end]
+    total += ii[rows, cols]
+    return total
+
+def window_variance_map(integral, integral_sq, region_width, region_height, x_start, x_last, y_start, y_last, stride=1):
+    """Variance of every region_width x region_height window, computed at once.
+
+    Indexed like window_sums(); uses the integral images from integral_images().
+    """
+    window = (region_width, region_height, x_start, x_last, y_start, y_last, stride)
+    area = region_width * region_height
+    mean = window_sums(integral, *window)
+    mean /= area
+    var = window_sums(integral_sq, *window)
+    var /= area
+    np.multiply(mean, mean, out=mean)
+    var -= mean
+    return var
+
+# Longest side of the image the spectral-residual saliency is computed on
+SALIENCY_SIZE = 64
+# Weights of the per-window terms of the "saliency" cost, each normalized to a
+# mean of 1 over all candidate windows
+SALIENCY_WEIGHTS = {"variance": 1.0, "edges": 1.0, "saliency": 1.0}
+
+def spectral_residual_saliency(gray):
+    """Spectral-residual saliency map (Hou & Zhang, 2007) at the size of `gray`, in [0, 1]."""
+    h, w = gray.shape
+    scale = SALIENCY_SIZE / max(h, w)
+    small = cv2.resize(gray, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA).astype(np.float64)
+    spectrum = np.fft.fft2(small)
+    log_amplitude = np.log(np.abs(spectrum) + 1e-9)
+    residual = log_amplitude - cv2.blur(log_amplitude, (3, 3))
+    saliency = np.abs(np.fft.ifft2(np.exp(residual + 1j * np.angle(spectrum)))) ** 2
+    saliency = cv2.GaussianBlur(saliency, (0, 0), 2.5)
+    saliency = cv2.resize(saliency.astype(np.float32), (w, h), interpolation=cv2.INTER_LINEAR)
+    peak = float(saliency.max())
+    return saliency / peak if peak > 0 else saliency
+
+def saliency_cost_integrals(gray):
+    """(integral, weight) pairs of the per-pixel terms the "saliency" cost adds to variance.
+
+    Edge density comes from Canny edges and the spectral-residual map marks
+    regions that stand out (subjects, faces) even where they are smooth.
+    """
+    edges = cv2.Canny(gray, 50, 150)
+    saliency = spectral_residual_saliency(gray)
+    return [
+        (cv2.integral(edges, sdepth=cv2.CV_64F), SALIENCY_WEIGHTS["edges"]),
+        (cv2.integral(saliency, sdepth=cv2.CV_64F), SALIENCY_WEIGHTS["saliency"]),
+    ]
+
+def find_least_busy_region(img, region_width=300, region_height=200, verbose=False, stride=1, horizontal_padding=50, vertical_padding=50, busiest=False, integrals=None, occupied=(), cost_integrals=(), frame_integrals=(), frame_aggregate="max"):
+    """Top-left corner and variance of the calmest (or busiest) window of `img`.
+
+    `integrals` reuses integral_images(img) across calls. Windows overlapping
+    any (x, y, w, h) rectangle in `occupied` are skipped unless nothing else fits.
+    `cost_integrals` holds (integral, weight) pairs of extra per-pixel costs,
+    such as saliency_cost_integrals(); windows are then ranked by the weighted
+    sum of their mean-normalized variance and mean costs. `frame_integrals`
+    holds integral_images() of further frames of an animation; each window's
+    variance is then the max (or mean) over all frames, so regions that only
+    move later are not picked as calm.
+    """
+    h, w = img.shape
     # Validate & adjust stride
     stride = max(1, int(stride) if stride else 1)
     # Adjust region size if it does not fit given padding
@@ -63,98 +294,69 @@ def find_least_busy_region(image_path, region_width=300, region_height=200, scre
         if verbose:
             print(f"Requested region_height {region_height} too large; clamping to {max_region_h}")
         region_height = max_region_h
-    # Use OpenCV's integral for fast computation
-    integral = cv2.integral(arr, sdepth=cv2.CV_64F)[1:,1:]
-    integral_sq = cv2.integral(arr**2, sdepth=cv2.CV_64F)[1:,1:]
-    def region_sum(ii, x1, y1, x2, y2):
-        # Assume bounds have been checked before calling
-        total = ii[y2, x2]
-        if x1 > 0:
-            total -= ii[y2, x1-1]
-        if y1 > 0:
-            total -= ii[y1-1, x2]
-        if x1 > 0 and y1 > 0:
-            total += ii[y1-1, x1-1]
-        return total
-    min_var = None
-    max_var = None
-    min_coords = (horizontal_padding, vertical_padding)
-    max_coords = (horizontal_padding, vertical_padding)
-    area = region_width * region_height
+    integral, integral_sq = integrals if integrals is not None else integral_images(img)
     x_start = horizontal_padding
     y_start = vertical_padding
-    x_end = w - region_width - horizontal_padding + 1
-    y_end = h - region_height - vertical_padding + 1
-    if x_end < x_start:
-        x_end = x_start
-    if y_end < y_start:
-        y_end = y_start
-    for y in range(y_start, y_end + 1, stride):
-        for x in range(x_start, x_end + 1, stride):
-            x1, y1 = x, y
-            x2, y2 = x + region_width - 1, y + region_height - 1
-            if x2 >= w or y2 >= h:
-                continue  # Skip out-of-bounds window
-            s = region_sum(integral, x1, y1, x2, y2)
-            s2 = region_sum(integral_sq, x1, y1, x2, y2)
-            mean = s / area
-            var = (s2 / area) - (mean ** 2)
-            if (min_var is None) or (var < min_var):
-                min_var = var
-                min_coords = (x, y)
-            if (max_var is None) or (var > max_var):
-                max_var = var
-                max_coords = (x, y)
-    if busiest:
-        return max_coords, max_var
-    else:
-        return min_coords, min_var
-
-def find_largest_region(image_path, screen_width=None, screen_height=None, verbose=False, stride=2, screen_mode="fill", threshold=100.0, aspect_ratio=1.0, horizontal_padding=50, vertical_padding=50):
-    img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-    if img is None:
-        raise FileNotFoundError(f"Image not found: {image_path}")
-    orig_h, orig_w = img.shape
-    # ...existing scaling logic...
-    scale = 1.0
-    if screen_width is not None and screen_height is not None:
-        scale_w = screen_width / orig_w
-        scale_h = screen_height / orig_h
-        if screen_mode == "fill":
-            scale = max(scale_w, scale_h)
+    # Last top-left corner whose window still fits inside the image
+    x_last = min(w - region_width - horizontal_padding + 1, w - region_width)
+    y_last = min(h - region_height - vertical_padding + 1, h - region_height)
+    if x_last < x_start or y_last < y_start:
+        return (horizontal_padding, vertical_padding), None
+    var_map = window_variance_map(integral, integral_sq, region_width, region_height, x_start, x_last, y_start, y_last, stride)
+    for frame_integral, frame_integral_sq in frame_integrals:
+        frame_map = window_variance_map(frame_integral, frame_integral_sq, region_width, region_height, x_start, x_last, y_start, y_last, stride)
+        if frame_aggregate == "mean":
+            var_map += frame_map
         else:
-            scale = min(scale_w, scale_h)
-        new_w = int(orig_w * scale)
-        new_h = int(orig_h * scale)
-        if verbose:
-            print(f"Scaling image from {orig_w}x{orig_h} to {new_w}x{new_h} (scale: {scale:.3f}, mode: {screen_mode})")
-        img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LANCZOS4)
-        img = center_crop(img, screen_width, screen_height)
-        if verbose:
-            print(f"Cropped image to {screen_width}x{screen_height}")
-    else:
-        if verbose:
-            print(f"Using original image size: {orig_w}x{orig_h}")
-    arr = img.astype(np.float64)
-    h, w = arr.shape
+            np.maximum(var_map, frame_map, out=var_map)
+    if frame_integrals and frame_aggregate == "mean":
+        var_map /= len(frame_integrals) + 1
+    scores = var_map
+    if cost_integrals:
+        window = (region_width, region_height, x_start, x_last, y_start, y_last, stride)
+        scores = np.zeros_like(var_map)
+        for term, weight in [(var_map, SALIENCY_WEIGHTS["variance"])] + [(window_sums(ii, *window), weight) for ii, weight in cost_integrals]:
+            mean = float(term.mean())
+            if mean > 0:
+                scores += term * (weight / mean)
+    if occupied:
+        xs = np.arange(x_start, x_last + 1, stride)
+        ys = np.arange(y_start, y_last + 1, stride)
+        blocked = np.zeros(var_map.shape, dtype=bool)
+        for ox, oy, ow, oh in occupied:
+            cols = (xs > ox - region_width) & (xs < ox + ow)
+            rows = (ys > oy - region_height) & (ys < oy + oh)
+            blocked[np.ix_(rows, cols)] = True
+        if blocked.all():
+            if verbose:
+                print("No free window left; allowing overlap with placed regions")
+        else:
+            scores = np.where(blocked, -np.inf if busiest else np.inf, scores)
+    # argmin/argmax return the first extreme in row-major order, i.e. the
+    # topmost-leftmost window, like a y-then-x scan keeping strict improvements
+    index = np.argmax(scores) if busiest else np.argmin(scores)
+    row, col = np.unravel_index(index, var_map.shape)
+    coords = (x_start + int(col) * stride, y_start + int(row) * stride)
+    return coords, float(var_map[row, col])
+
+# Window rows scored per vectorized step of find_largest_region
+LARGEST_REGION_BLOCK_ROWS = 64
+
+def find_largest_region(img, verbose=False, stride=2, threshold=100.0, aspect_ratio=1.0, horizontal_padding=50, vertical_padding=50, integrals=None):
+    """Center, size and variance of the largest window of `img` under `threshold`.
+
+    Binary-searches the window size; each probe scores positions a block of
+    rows at a time with window_variance_map() and takes the first one
+    (row-major) under the threshold. `integrals` reuses integral_images(img) across calls.
+    """
+    h, w = img.shape
     stride = max(1, int(stride) if stride else 1)
     threshold = max(0.0, float(threshold))
     # Adjust padding if image too small
     if horizontal_padding * 2 >= w or vertical_padding * 2 >= h:
         horizontal_padding = max(0, min(horizontal_padding, (w - 1) // 2))
         vertical_padding = max(0, min(vertical_padding, (h - 1) // 2))
-    # Use OpenCV's integral for fast computation
-    integral = cv2.integral(arr, sdepth=cv2.CV_64F)[1:,1:]
-    integral_sq = cv2.integral(arr**2, sdepth=cv2.CV_64F)[1:,1:]
-    def region_sum(ii, x1, y1, x2, y2):
-        total = ii[y2, x2]
-        if x1 > 0:
-            total -= ii[y2, x1-1]
-        if y1 > 0:
-            total -= ii[y1-1, x2]
-        if x1 > 0 and y1 > 0:
-            total += ii[y1-1, x1-1]
-        return total
+    integral, integral_sq = integrals if integrals is not None else integral_images(img)
     min_size = 10
     # Determine maximum feasible size respecting padding
     effective_w = w - 2 * horizontal_padding
@@ -188,23 +390,22 @@ def find_largest_region(image_path, screen_width=None, screen_height=None, verbo
         y_start = vertical_padding
         x_end = w - region_w - horizontal_padding
         y_end = h - region_h - vertical_padding
-        for y in range(y_start, y_end + 1, stride):
-            for x in range(x_start, x_end + 1, stride):
-                x1, y1 = x, y
-                x2, y2 = x + region_w - 1, y + region_h - 1
-                if x2 >= w or y2 >= h:
-                    continue
-                s = region_sum(integral, x1, y1, x2, y2)
-                s2 = region_sum(integral_sq, x1, y1, x2, y2)
-                area = region_w * region_h
-                mean = s / area
-                var = (s2 / area) - (mean ** 2)
-                if var <= threshold:
-                    found = True
-                    best = (x, y, region_w, region_h, var)
-                    break
-            if found:
+        # Score blocks of rows top to bottom and stop at the first one with a
+        # hit; the first hit in row-major order matches a y-then-x scan
+        block_step = stride * LARGEST_REGION_BLOCK_ROWS
+        block_starts = range(y_start, y_end + 1, block_step) if x_end >= x_start else ()
+        for block_y in block_starts:
+            block_last = min(y_end, block_y + block_step - stride)
+            var_map = window_variance_map(integral, integral_sq, region_w, region_h, x_start, x_end, block_y, block_last, stride)
+            under = var_map <= threshold
+            index = np.argmax(under)
+            if under.flat[index]:
+                found = True
+                row, col = np.unravel_index(index, var_map.shape)
+                best = (x_start + int(col) * stride, block_y + int(row) * stride, region_w, region_h, float(var_map[row, col]))
                 break
+        if verbose:
+            print(f"Probe {region_w}x{region_h}: {'found' if found else 'none'} under {threshold}")
         if found:
             min_size = mid + 1
         else:
@@ -217,43 +418,15 @@ def find_largest_region(image_path, screen_width=None, screen_height=None, verbo
     else:
         return None, (0, 0), None
 
-def draw_region(image_path, coords, region_width=300, region_height=200, output_path='output.png', screen_width=None, screen_height=None, screen_mode="fill"):
-    img = cv2.imread(image_path)
-    if img is None:
-        raise FileNotFoundError(f"Image not found: {image_path}")
-    orig_h, orig_w = img.shape[:2]
-    if screen_width is not None and screen_height is not None:
-        scale_w = screen_width / orig_w
-        scale_h = screen_height / orig_h
-        if screen_mode == "fill":
-            scale = max(scale_w, scale_h)
-        else:
-            scale = min(scale_w, scale_h)
-        new_w = int(orig_w * scale)
-        new_h = int(orig_h * scale)
-        img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LANCZOS4)
-        img = center_crop(img, screen_width, screen_height)
+def draw_region(frame, coords, region_width=300, region_height=200, output_path='output.png'):
+    img = frame.copy()
     x, y = coords
     cv2.rectangle(img, (x, y), (x+region_width-1, y+region_height-1), (0,0,255), 3)
     cv2.imwrite(output_path, img)
     # print removed for quieter operation
 
-def draw_largest_region(image_path, center, size, output_path='output.png', screen_width=None, screen_height=None, screen_mode="fill"):
-    img = cv2.imread(image_path)
-    if img is None:
-        raise FileNotFoundError(f"Image not found: {image_path}")
-    orig_h, orig_w = img.shape[:2]
-    if screen_width is not None and screen_height is not None:
-        scale_w = screen_width / orig_w
-        scale_h = screen_height / orig_h
-        if screen_mode == "fill":
-            scale = max(scale_w, scale_h)
-        else:
-            scale = min(scale_w, scale_h)
-        new_w = int(orig_w * scale)
-        new_h = int(orig_h * scale)
-        img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LANCZOS4)
-        img = center_crop(img, screen_width, screen_height)
+def draw_largest_region(frame, center, size, output_path='output.png'):
+    img = frame.copy()
     cx, cy = center
     region_w, region_h = size
     x1 = cx - region_w // 2
@@ -264,56 +437,339 @@ def draw_largest_region(image_path, center, size, output_path='output.png', scre
     cv2.imwrite(output_path, img)
     # print removed for quieter operation
 
-def get_dominant_color(image_path, x, y, w, h, screen_width=None, screen_height=None, screen_mode="fill"):
-    img = cv2.imread(image_path)
-    if img is None:
-        raise FileNotFoundError(f"Image not found: {image_path}")
-    orig_h, orig_w = img.shape[:2]
-    if screen_width is not None and screen_height is not None:
-        scale_w = screen_width / orig_w
-        scale_h = screen_height / orig_h
-        if screen_mode == "fill":
-            scale = max(scale_w, scale_h)
+# Bits per channel of the dominant-colour histogram (16 levels, 4096 bins)
+DOMINANT_COLOR_BITS = 4
+# Regions with more pixels are sampled on a regular grid down to about this many
+DOMINANT_COLOR_MAX_SAMPLES = 65536
+
+def color_bins(img):
+    """Dominant-colour histogram bin of every pixel of a BGR image."""
+    levels = (img >> (8 - DOMINANT_COLOR_BITS)).astype(np.uint16)
+    return (levels[..., 0] << (2 * DOMINANT_COLOR_BITS)) | (levels[..., 1] << DOMINANT_COLOR_BITS) | levels[..., 2]
+
+def get_dominant_colors(img, regions, bins=None):
+    """RGB dominant colour of each (x, y, w, h) region of a BGR image.
+
+    Pixels are counted in a coarse colour histogram and the colour is the
+    mean of the fullest bin, so the result is deterministic (k-means with
+    random centers was not). Near-black pixels are ignored unless the region
+    has nothing else. Pass bins=color_bins(img) to share one pass over the
+    image between calls.
+    """
+    colors = []
+    for x, y, w, h in regions:
+        # Ensure region is within bounds
+        x = max(0, x)
+        y = max(0, y)
+        w = max(1, min(w, img.shape[1] - x))
+        h = max(1, min(h, img.shape[0] - y))
+        region = img[y:y+h, x:x+w]
+        if region.size == 0:
+            colors.append([0, 0, 0])
+            continue
+        step = max(1, int(np.ceil(np.sqrt(region.shape[0] * region.shape[1] / DOMINANT_COLOR_MAX_SAMPLES))))
+        pixels = region[::step, ::step].reshape((-1, 3))
+        pixel_bins = (bins[y:y+h, x:x+w] if bins is not None else color_bins(region))[::step, ::step].ravel()
+        # Filter out black pixels (improves accuracy for some images)
+        non_black = np.any(pixels > 10, axis=1)
+        if non_black.any():
+            pixels = pixels[non_black]
+            pixel_bins = pixel_bins[non_black]
+        top = np.argmax(np.bincount(pixel_bins, minlength=1 << (3 * DOMINANT_COLOR_BITS)))
+        dominant = pixels[pixel_bins == top].mean(axis=0)
+        # Reverse from BGR to RGB
+        colors.append([int(round(c)) for c in reversed(dominant)])
+    return colors
+
+def get_dominant_color(img, x, y, w, h):
+    return get_dominant_colors(img, [(x, y, w, h)])[0]
+
+# Bump when a change to the search or the colour extraction alters results
+CACHE_VERSION = 2
+CACHE_MAX_PLACEMENTS = 1024
+CACHE_MAX_ANALYSES = 16
+
+def default_cache_dir():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "quickshell", "wallpaper_analysis")
+
+class AnalysisCache:
+    """On-disk cache of analysis frames and placement answers.
+
+    Everything is keyed on the wallpaper's content hash, so a renamed or
+    re-saved file with the same bytes still hits, and an edited one misses.
+    placements.json maps query keys to finished results and (path, size,
+    mtime) to content hashes, so a repeat query neither decodes nor re-hashes
+    the image. The analysis-sized colour frames (plus the sampled grayscale
+    frames of animated wallpapers) are stored as .npz next to it.
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "placements.json")
+        self.hashes = {}
+        self.placements = {}
+        self.dirty = False
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == CACHE_VERSION:
+            self.hashes = data.get("hashes") or {}
+            self.placements = data.get("placements") or {}
+
+    def content_hash(self, image_path):
+        st = os.stat(image_path)
+        stat_key = f"{os.path.realpath(image_path)}:{st.st_size}:{st.st_mtime_ns}"
+        digest = self.hashes.get(stat_key)
+        if digest is None:
+            hasher = hashlib.blake2b(digest_size=16)
+            with open(image_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    hasher.update(chunk)
+            digest = hasher.hexdigest()
+            self.hashes.pop(stat_key, None)
+            self.hashes[stat_key] = digest
+            self.dirty = True
+        return digest
+
+    def placement(self, key):
+        return self.placements.get(key)
+
+    def store_placement(self, key, result):
+        self.placements.pop(key, None)
+        self.placements[key] = result
+        self.dirty = True
+
+    def _analysis_path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.npz")
+
+    def load_analysis(self, name):
+        """Arrays stored by store_analysis(), as a dict, or None."""
+        path = self._analysis_path(name)
+        try:
+            with np.load(path) as data:
+                arrays = {key: data[key] for key in data.files}
+            os.utime(path)
+            return arrays if "image" in arrays else None
+        except (OSError, ValueError):
+            return None
+
+    def store_analysis(self, name, **arrays):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self._analysis_path(name)}.{os.getpid()}.tmp.npz"
+            np.savez_compressed(tmp_path, **arrays)
+            os.replace(tmp_path, self._analysis_path(name))
+            frames = sorted((entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".npz")), key=lambda entry: entry.stat().st_mtime)
+            for entry in frames[:-CACHE_MAX_ANALYSES]:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+    def save(self):
+        if not self.dirty:
+            return
+        # Oldest entries first (dict order); keep the most recent ones
+        data = {
+            "version": CACHE_VERSION,
+            "hashes": dict(list(self.hashes.items())[-CACHE_MAX_PLACEMENTS:]),
+            "placements": dict(list(self.placements.items())[-CACHE_MAX_PLACEMENTS:]),
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass
+
+def analyze_screen(image_path, screen_width, screen_height, screen_mode="fill", analysis_size=None, verbose=False, decoded=None, cache=None, content_hash=None, frame_samples=DEFAULT_FRAME_SAMPLES):
+    """Analysis-sized colour frame, its grayscale integrals and the screen mapping.
+
+    Animated wallpapers also get the integrals of `frame_samples` frames
+    spread over the animation; the colour frame is the first of them.
+    analysis_size defaults to ANALYSIS_MAX_SIDE, or ANIMATED_ANALYSIS_MAX_SIDE
+    for animations. With a cache and the wallpaper's content hash, the frames
+    are read from disk when this screen was analyzed before, skipping the decode.
+    """
+    animated = is_animated(image_path)
+    if analysis_size is None:
+        analysis_size = ANIMATED_ANALYSIS_MAX_SIDE if animated else ANALYSIS_MAX_SIDE
+    name = f"{content_hash}-{screen_width}x{screen_height}-{screen_mode}-{analysis_size}" if cache is not None and content_hash else None
+    if name and animated:
+        name += f"-{frame_samples}f"
+    arrays = cache.load_analysis(name) if name else None
+    if arrays is None:
+        if animated:
+            frames = [analysis_frame(frame, analysis_size)[0] for frame in load_screen_frames(image_path, screen_width, screen_height, screen_mode, frame_samples, verbose, decoded)]
+            arrays = {"image": frames[0], "frames": np.stack([cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in frames])}
         else:
-            scale = min(scale_w, scale_h)
-        new_w = int(orig_w * scale)
-        new_h = int(orig_h * scale)
-        img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LANCZOS4)
-        img = center_crop(img, screen_width, screen_height)
-    # Ensure region is within bounds
-    x = max(0, x)
-    y = max(0, y)
-    w = max(1, min(w, img.shape[1] - x))
-    h = max(1, min(h, img.shape[0] - y))
-    region = img[y:y+h, x:x+w]
-    if region.size == 0 or region.shape[0] == 0 or region.shape[1] == 0:
-        return [0, 0, 0]
-    region = region.reshape((-1, 3))
-    # Filter out black pixels (optional, improves accuracy for some images)
-    non_black = region[np.any(region > 10, axis=1)]
-    if non_black.shape[0] == 0:
-        non_black = region
-    region = np.float32(non_black)
-    if region.shape[0] < 3:
-        return [int(x) for x in np.mean(region, axis=0)]
-    # K-means to find dominant color
-    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
-    K = min(3, region.shape[0])
-    _, labels, centers = cv2.kmeans(region, K, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
-    counts = np.bincount(labels.flatten())
-    dominant = centers[np.argmax(counts)]
-    # Reverse from BGR to RGB
-    return [int(x) for x in reversed(dominant)]
+            arrays = {"image": analysis_frame(load_screen_frame(image_path, screen_width, screen_height, screen_mode, verbose=verbose, decoded=decoded), analysis_size)[0]}
+        if name:
+            cache.store_analysis(name, **arrays)
+    elif verbose:
+        print(f"Using cached analysis for {screen_width}x{screen_height} ({screen_mode})")
+    image = arrays["image"]
+    factor = image.shape[1] / screen_width
+    if verbose and factor != 1.0:
+        print(f"Analyzing at {image.shape[1]}x{image.shape[0]} (factor: {factor:.3f})")
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    integrals = integral_images(gray)
+    # Frame 0 is `gray`; the rest are searched alongside it
+    frame_integrals = [integral_images(frame) for frame in arrays["frames"][1:]] if "frames" in arrays else []
+    return {"image": image, "gray": gray, "factor": factor, "integrals": integrals, "frame_integrals": frame_integrals, "size": (screen_width, screen_height)}
+
+def place_region(analysis, width, height, horizontal_padding=50, vertical_padding=50, stride=1, busiest=False, verbose=False, occupied=(), cost="variance", frame_aggregate="max"):
+    """Least (or most) busy width x height region on a screen, as a JSON-ready dict.
+
+    Coordinates are in screen pixels; `occupied` holds (x, y, w, h) screen
+    rectangles of regions placed earlier that the result should not overlap.
+    `cost` is "variance" or "saliency" (see saliency_cost_integrals), and
+    `frame_aggregate` combines the frames of animated wallpapers.
+    """
+    factor = analysis["factor"]
+    cost_integrals = ()
+    if cost == "saliency":
+        if "saliency_integrals" not in analysis:
+            analysis["saliency_integrals"] = saliency_cost_integrals(analysis["gray"])
+        cost_integrals = analysis["saliency_integrals"]
+    def to_analysis(value):
+        return int(round(value * factor))
+    def to_screen(value):
+        return int(round(value / factor))
+    coords, variance = find_least_busy_region(
+        analysis["gray"],
+        region_width=max(1, to_analysis(width)),
+        region_height=max(1, to_analysis(height)),
+        verbose=verbose,
+        stride=stride,
+        horizontal_padding=to_analysis(horizontal_padding),
+        vertical_padding=to_analysis(vertical_padding),
+        busiest=busiest,
+        integrals=analysis["integrals"],
+        occupied=[(int(x * factor), int(y * factor), int(np.ceil(w * factor)), int(np.ceil(h * factor))) for x, y, w, h in occupied],
+        cost_integrals=cost_integrals,
+        frame_integrals=analysis["frame_integrals"],
+        frame_aggregate=frame_aggregate
+    )
+    screen_w, screen_h = analysis["size"]
+    coords = (
+        max(0, min(to_screen(coords[0]), screen_w - width)),
+        max(0, min(to_screen(coords[1]), screen_h - height)),
+    )
+    if "bins" not in analysis:
+        analysis["bins"] = color_bins(analysis["image"])
+    dominant_color = get_dominant_colors(analysis["image"], [(to_analysis(coords[0]), to_analysis(coords[1]), max(1, to_analysis(width)), max(1, to_analysis(height)))], analysis["bins"])[0]
+    return {
+        "center_x": coords[0] + width // 2,
+        "center_y": coords[1] + height // 2,
+        "width": width,
+        "height": height,
+        "variance": variance,
+        "dominant_color": '#{:02x}{:02x}{:02x}'.format(*dominant_color)
+    }
+
+# Per-query keys accepted by --batch; missing ones fall back to the command-line values
+BATCH_QUERY_KEYS = ("width", "height", "horizontal_padding", "vertical_padding", "screen_width", "screen_height", "screen_mode", "stride", "busiest", "cost")
+
+def run_batch(args, request, cache=None):
+    """Answer every placement query in `request` from one decode of the wallpaper.
+
+    `request` is {"image_path": ..., "queries": [...]} or just the list of
+    queries. Each query may set the keys in BATCH_QUERY_KEYS plus "id" (echoed
+    back) and "screen" (a monitor name; defaults to WIDTHxHEIGHT). Queries on
+    the same screen are placed in order and never overlap each other.
+    A query with "reserve": false only wants the answer (e.g. its dominant
+    colour) and is not kept clear of later queries; "fixed": [x, y, w, h] marks
+    a widget that stays put, reserved on its screen before anything is placed.
+    The request's own "fixed": {screen: [[x, y, w, h], ...]} reserves widgets
+    that are not being placed in this batch the same way.
+    Answers found in `cache` are returned without touching the image.
+    """
+    if isinstance(request, list):
+        request = {"queries": request}
+    image_path = request.get("image_path") or args.image_path
+    if not image_path:
+        raise SystemExit("--batch needs an image path, either as argument or as \"image_path\" on stdin")
+    content_hash = None
+    if cache is not None:
+        try:
+            content_hash = cache.content_hash(image_path)
+        except OSError:
+            cache = None
+    defaults = {key: getattr(args, key) for key in BATCH_QUERY_KEYS}
+    decoded = {}
+    analyses = {}
+    placed = {}
+    results = []
+    queries = []
+    for screen, rects in (request.get("fixed") or {}).items():
+        placed.setdefault(str(screen), []).extend([int(v) for v in rect] for rect in rects)
+    for query in request.get("queries", []):
+        params = {**defaults, **{key: query[key] for key in BATCH_QUERY_KEYS if query.get(key) is not None}}
+        screen = str(query.get("screen") or f"{int(params['screen_width'])}x{int(params['screen_height'])}")
+        if query.get("fixed"):
+            placed.setdefault(screen, []).append([int(v) for v in query["fixed"]])
+        queries.append((query, params, screen))
+    for query, params, screen in queries:
+        width, height = int(params["width"]), int(params["height"])
+        screen_width, screen_height = int(params["screen_width"]), int(params["screen_height"])
+        result = {"id": query["id"]} if "id" in query else {}
+        reserve = query.get("reserve", True) is not False
+        occupied = placed.setdefault(screen, [])
+        # Earlier placements on the screen change the answer, so they are part of the key
+        cache_key = json.dumps([content_hash, args.analysis_size, args.frames, args.frame_aggregate, [params[key] for key in BATCH_QUERY_KEYS], reserve, occupied]) if cache is not None else None
+        placement = cache.placement(cache_key) if cache is not None else None
+        if placement is None:
+            analysis_key = (screen_width, screen_height, params["screen_mode"])
+            if analysis_key not in analyses:
+                # A wallpaper that cannot be read fails its queries, not the whole batch
+                try:
+                    analyses[analysis_key] = analyze_screen(image_path, screen_width, screen_height, params["screen_mode"], args.analysis_size, args.verbose, decoded, cache, content_hash, args.frames)
+                except (OSError, ValueError, cv2.error) as e:
+                    analyses[analysis_key] = e
+            if isinstance(analyses[analysis_key], Exception):
+                results.append({**result, "error": str(analyses[analysis_key])})
+                continue
+            try:
+                placement = place_region(
+                    analyses[analysis_key],
+                    width,
+                    height,
+                    horizontal_padding=int(params["horizontal_padding"]),
+                    vertical_padding=int(params["vertical_padding"]),
+                    stride=int(params["stride"]),
+                    busiest=bool(params["busiest"]),
+                    verbose=args.verbose,
+                    occupied=occupied,
+                    cost=params["cost"],
+                    frame_aggregate=args.frame_aggregate
+                )
+            except ValueError as e:
+                results.append({**result, "error": str(e)})
+                continue
+            if cache is not None:
+                cache.store_placement(cache_key, placement)
+        elif args.verbose:
+            print(f"Using cached placement for {width}x{height} on {screen_width}x{screen_height}")
+        if reserve:
+            occupied.append([placement["center_x"] - width // 2, placement["center_y"] - height // 2, width, height])
+        results.append({**result, **placement})
+    if cache is not None:
+        cache.save()
+    return results
 
 def main():
     parser = argparse.ArgumentParser(description="Find least busy region in an image and output a JSON. Made for determining a suitable position for a wallpaper widget.")
-    parser.add_argument("image_path", help="Path to the input image")
+    parser.add_argument("image_path", nargs="?", help="Path to the input image")
     parser.add_argument("--width", type=int, default=300, help="Region width")
     parser.add_argument("--height", type=int, default=200, help="Region height")
     parser.add_argument("-v", "--visual-output", action="store_true", help="Output image with rectangle")
     parser.add_argument("--screen-width", type=int, default=1920, help="Screen width for wallpaper scaling")
     parser.add_argument("--screen-height", type=int, default=1080, help="Screen height for wallpaper scaling")
-    parser.add_argument("--stride", type=int, default=10, help="Step size for sliding window (higher is faster, less precise)")
+    parser.add_argument("--stride", type=int, default=1, help="Step size for sliding window (1 = pixel-exact placement)")
     parser.add_argument("--screen-mode", choices=["fill", "fit"], default="fill", help="Wallpaper scaling mode: 'fill' (default) or 'fit'")
     parser.add_argument("--verbose", action="store_true", help="Print verbose output")
     parser.add_argument("-l", "--largest-region", action="store_true", help="Find the largest region under the variance threshold and output its center")
@@ -322,34 +778,53 @@ def main():
     parser.add_argument("--horizontal-padding", "-hp", type=int, default=50, help="Minimum horizontal distance from region to image edge")
     parser.add_argument("--vertical-padding", "-vp", type=int, default=50, help="Minimum vertical distance from region to image edge")
     parser.add_argument("--busiest", action="store_true", help="Find the busiest region instead of the least busy")
+    parser.add_argument("--cost", choices=["variance", "saliency"], default="variance", help="Busyness measure for placement: grayscale 'variance' (default) or 'saliency', which also weighs edge density and spectral-residual saliency")
+    parser.add_argument("--batch", action="store_true", help="Read a JSON list of placement queries from stdin and print a JSON list of results (see run_batch)")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor update the on-disk analysis cache")
+    parser.add_argument("--cache-dir", help="Analysis cache directory (default: ~/.cache/quickshell/wallpaper_analysis)")
+    parser.add_argument("--analysis-size", type=int, default=None, help=f"Longest side the region search runs at; larger screens are downscaled (default: {ANALYSIS_MAX_SIDE}, {ANIMATED_ANALYSIS_MAX_SIDE} for animations; 0 = full resolution)")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAME_SAMPLES, help="Frames sampled from video and animated wallpapers (" + ", ".join(ANIMATED_EXTENSIONS) + ")")
+    parser.add_argument("--frame-aggregate", choices=["max", "mean"], default="max", help="How per-frame window variances of animated wallpapers are combined")
     args = parser.parse_args()
 
+    cache = None if args.no_cache else AnalysisCache(args.cache_dir or default_cache_dir())
+    if args.batch:
+        print(json.dumps(run_batch(args, json.load(sys.stdin), cache)))
+        return
+    if not args.image_path:
+        parser.error("the image path is required")
+
     if args.largest_region:
+        content_hash = None
+        if cache is not None:
+            content_hash = cache.content_hash(args.image_path)
+            cache.save()
+        analysis = analyze_screen(args.image_path, args.screen_width, args.screen_height, args.screen_mode, args.analysis_size, args.verbose, cache=cache, content_hash=content_hash, frame_samples=args.frames)
+        factor = analysis["factor"]
+        def to_analysis(value):
+            return int(round(value * factor))
+        def to_screen(value):
+            return int(round(value / factor))
         center, size, var = find_largest_region(
-            args.image_path,
-            screen_width=args.screen_width,
-            screen_height=args.screen_height,
+            analysis["gray"],
             verbose=args.verbose,
             stride=args.stride,
-            screen_mode=args.screen_mode,
             threshold=args.variance_threshold,
             aspect_ratio=args.aspect_ratio,
-            horizontal_padding=args.horizontal_padding,
-            vertical_padding=args.vertical_padding
+            horizontal_padding=to_analysis(args.horizontal_padding),
+            vertical_padding=to_analysis(args.vertical_padding),
+            integrals=analysis["integrals"]
         )
         if center:
-            if args.visual_output:
-                draw_largest_region(args.image_path, center, size, screen_width=args.screen_width, screen_height=args.screen_height, screen_mode=args.screen_mode)
             # Extract dominant color
             cx, cy = center
             region_w, region_h = size
-            x1 = cx - region_w // 2
-            y1 = cy - region_h // 2
-            dominant_color = get_dominant_color(
-                args.image_path, x1, y1, region_w, region_h,
-                screen_width=args.screen_width, screen_height=args.screen_height, screen_mode=args.screen_mode
-            )
+            dominant_color = get_dominant_color(analysis["image"], cx - region_w // 2, cy - region_h // 2, region_w, region_h)
             dominant_color_hex = '#{:02x}{:02x}{:02x}'.format(*dominant_color)
+            center = (to_screen(center[0]), to_screen(center[1]))
+            size = (to_screen(size[0]), to_screen(size[1]))
+            if args.visual_output:
+                draw_largest_region(load_screen_frame(args.image_path, args.screen_width, args.screen_height, args.screen_mode), center, size)
             print(json.dumps({
                 "center_x": center[0],
                 "center_y": center[1],
@@ -362,37 +837,14 @@ def main():
             print(json.dumps({"error": "No region found under the threshold."}))
         return
 
-    coords, variance = find_least_busy_region(
-        args.image_path,
-        region_width=args.width,
-        region_height=args.height,
-        screen_width=args.screen_width,
-        screen_height=args.screen_height,
-        verbose=args.verbose,
-        stride=args.stride,
-        screen_mode=args.screen_mode,
-        horizontal_padding=args.horizontal_padding,
-        vertical_padding=args.vertical_padding,
-        busiest=args.busiest
-    )
+    placement = run_batch(args, [{}], cache)[0]
+    if "error" in placement:
+        raise ValueError(placement["error"])
     if args.visual_output:
-        draw_region(args.image_path, coords, region_width=args.width, region_height=args.height, screen_width=args.screen_width, screen_height=args.screen_height, screen_mode=args.screen_mode)
+        coords = (placement["center_x"] - args.width // 2, placement["center_y"] - args.height // 2)
+        draw_region(load_screen_frame(args.image_path, args.screen_width, args.screen_height, args.screen_mode), coords, region_width=args.width, region_height=args.height)
     # Output JSON with center point
-    center_x = coords[0] + args.width // 2
-    center_y = coords[1] + args.height // 2
-    dominant_color = get_dominant_color(
-        args.image_path, coords[0], coords[1], args.width, args.height,
-        screen_width=args.screen_width, screen_height=args.screen_height, screen_mode=args.screen_mode
-    )
-    dominant_color_hex = '#{:02x}{:02x}{:02x}'.format(*dominant_color)
-    print(json.dumps({
-        "center_x": center_x,
-        "center_y": center_y,
-        "width": args.width,
-        "height": args.height,
-        "variance": variance,
-        "dominant_color": dominant_color_hex
-    }))
+    print(json.dumps(placement))
 
 if __name__ == "__main__":
     main()
@@ -6,12 +6,13 @@
 
 import os
 import sys
+import json
 import hashlib
 import subprocess
 import urllib.parse
 from multiprocessing import Pool
 from pathlib import Path
-from typing import List, Union
+from typing import Dict, List, Tuple, Union
 
 import click
 from loguru import logger
@@ -35,6 +36,25 @@ try:
 except (ImportError, ValueError):
     pass
 
+# In-process backends, used before forking ImageMagick for every file.
+# pyvips shrinks on load for most formats; Pillow's draft() does the same for
+# JPEG through DCT scaling.
+PYVIPS_AVAILABLE = False
+try:
+    import pyvips
+
+    PYVIPS_AVAILABLE = True
+except (ImportError, OSError):
+    pass
+
+PIL_AVAILABLE = False
+try:
+    from PIL import Image, PngImagePlugin
+
+    PIL_AVAILABLE = True
+except ImportError:
+    pass
+
 # Pixel sizes for thumbnail directories (freedesktop spec)
 thumbnail_pixel_sizes = {
     "normal": 128,
@@ -43,6 +63,12 @@ thumbnail_pixel_sizes = {
     "xx-large": 1024,
 }
 
+# Persistent record of what has already been thumbnailed, so a rerun only
+# dispatches new or changed files: "<size>:<path>" -> [mtime_ns, bytes, state]
+INDEX_VERSION = 1
+INDEX_OK = "ok"
+INDEX_FAILED = "failed"
+
 factory = None
 current_size = "large"
 logger.remove()
@@ -50,25 +76,142 @@ logger.add(sys.stdout, level="INFO")
 logger.add("/tmp/thumbgen.log", level="DEBUG", rotation="100 MB")
 
 
-def get_thumbnail_path(fpath: str, size_name: str) -> str:
-    """Calculate thumbnail path using the same method as QML ThumbnailImage."""
+def get_thumbnail_uri(fpath: str) -> str:
     # Encode each path component (like QML's encodeURIComponent)
     parts = fpath.split("/")
     encoded = "/".join(urllib.parse.quote(p, safe="") for p in parts)
-    url = f"file://{encoded}"
-    md5 = hashlib.md5(url.encode()).hexdigest()
-    cache_dir = os.path.expanduser(f"~/.cache/thumbnails/{size_name}")
-    return f"{cache_dir}/{md5}.png"
+    return f"file://{encoded}"
+
+
+def get_thumbnail_path(fpath: str, size_name: str) -> str:
+    """Calculate thumbnail path using the same method as QML ThumbnailImage."""
+    md5 = hashlib.md5(get_thumbnail_uri(fpath).encode()).hexdigest()
+    return f"{get_thumbnail_dir(size_name)}/{md5}.png"
+
+
+def get_thumbnail_dir(size_name: str) -> str:
+    return os.path.expanduser(f"~/.cache/thumbnails/{size_name}")
+
+
+def default_index_path() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "quickshell", "thumbgen_index.json")
+
+
+def load_index(index_path: str) -> Dict[str, list]:
+    try:
+        with open(index_path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        return {}
+    entries = data.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
+def store_index(index_path: str, entries: Dict[str, list]) -> None:
+    """Write the index through a temp file so a killed run never leaves half of it."""
+    try:
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": INDEX_VERSION, "entries": entries}, f)
+        os.replace(tmp_path, index_path)
+    except OSError as e:
+        logger.warning("Could not write thumbnail index {}: {}".format(index_path, e))
+
+
+def thumbnail_is_fresh(fpath: str, thumb_path: str) -> bool:
+    """A thumbnail is fresh unless it is missing, unreadable or its
+    Thumb::MTime no longer matches the source (ImageMagick ones have none)."""
+    if not os.path.exists(thumb_path):
+        return False
+    if not PIL_AVAILABLE:
+        return True
+    try:
+        with Image.open(thumb_path) as thumb:
+            recorded = thumb.info.get("Thumb::MTime")
+    except OSError:
+        return False
+    return recorded is None or recorded == str(int(os.path.getmtime(fpath)))
+
+
+def thumbnail_metadata(fpath: str) -> Dict[str, str]:
+    """tEXt chunks required by the freedesktop thumbnail spec."""
+    return {
+        "Thumb::URI": get_thumbnail_uri(fpath),
+        "Thumb::MTime": str(int(os.path.getmtime(fpath))),
+        "Software": "thumbgen.py",
+    }
+
+
+def save_thumbnail_vips(fpath: str, tmp_path: str, size: int) -> None:
+    image = pyvips.Image.thumbnail(
+        fpath, size, height=size, size="down", no_rotate=True
+    )
+    # 16-bit sources would otherwise produce 16-bit PNGs
+    if image.interpretation == "rgb16":
+        image = image.colourspace("srgb")
+    elif image.interpretation == "grey16":
+        image = image.colourspace("b-w")
+    image = image.copy()
+    # pngsave writes png-comment-<n>-<key> fields as tEXt chunks
+    for i, (key, value) in enumerate(thumbnail_metadata(fpath).items()):
+        image.set_type(pyvips.GValue.gstr_type, f"png-comment-{i}-{key}", value)
+    image.pngsave(tmp_path)
+
+
+def save_thumbnail_pillow(fpath: str, tmp_path: str, size: int) -> None:
+    with Image.open(fpath) as image:
+        # JPEG only: decode at the smallest DCT scale that still covers size
+        image.draft("RGB", (size, size))
+        if image.mode not in ("RGB", "RGBA"):
+            has_alpha = "A" in image.getbands() or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        info = PngImagePlugin.PngInfo()
+        for key, value in thumbnail_metadata(fpath).items():
+            info.add_text(key, value)
+        image.save(tmp_path, format="PNG", pnginfo=info)
+
+
+def make_thumbnail_inprocess(fpath: str, size_name: str) -> bool:
+    """Generate thumbnail without spawning a process (pyvips, then Pillow)."""
+    backends = []
+    if PYVIPS_AVAILABLE:
+        backends.append(("VIPS", save_thumbnail_vips, pyvips.Error))
+    if PIL_AVAILABLE:
+        backends.append(("PILLOW", save_thumbnail_pillow, Exception))
+    if not backends:
+        return False
+
+    thumb_path = get_thumbnail_path(fpath, size_name)
+    os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+    size = thumbnail_pixel_sizes[size_name]
+    # Written next to the final path and renamed, so readers never see a
+    # partial PNG; the spec asks for owner-only permissions
+    tmp_path = f"{thumb_path}.{os.getpid()}.tmp"
+    for name, save, errors in backends:
+        try:
+            save(fpath, tmp_path, size)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, thumb_path)
+            logger.debug("OK_{:<9}{}".format(name, fpath))
+            return True
+        except (OSError, errors) as e:
+            logger.debug("ERROR_{} {} - {}".format(name, fpath, str(e)))
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+    return False
 
 
 def make_thumbnail_imagemagick(fpath: str, size_name: str) -> bool:
     """Generate thumbnail using ImageMagick (fallback method)."""
     thumb_path = get_thumbnail_path(fpath, size_name)
 
-    if os.path.exists(thumb_path):
-        logger.debug("FRESH       {}".format(fpath))
-        return False
-
     # Ensure directory exists
     os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
 
@@ -111,10 +254,17 @@ def make_thumbnail(fpath: str) -> bool:
                 factory.save_thumbnail(thumbnail, uri, mtime)
                 return True
 
-        # GnomeDesktop failed, fall through to ImageMagick
+        # GnomeDesktop failed, fall through to the other backends
         logger.debug("FALLBACK    {} (GnomeDesktop unsupported)".format(uri))
 
-    # Fallback to ImageMagick
+    if thumbnail_is_fresh(fpath, get_thumbnail_path(fpath, current_size)):
+        logger.debug("FRESH       {}".format(fpath))
+        return False
+
+    if make_thumbnail_inprocess(fpath, current_size):
+        return True
+
+    # Fallback to ImageMagick (videos, formats Pillow/libvips cannot read)
     return make_thumbnail_imagemagick(fpath, current_size)
 
 
@@ -126,25 +276,93 @@ def thumbnail_folder(
     only_images: bool,
     recursive: bool,
     machine_progress: bool = False,
+    index: Dict[str, list],
+    check_all: bool = False,
 ) -> None:
     all_files = get_all_files(dir_path=dir_path, recursive=recursive)
     if only_images:
         all_files = get_all_images(all_files=all_files)
-    all_files = [str(fpath) for fpath in all_files]
-    if machine_progress:
-        completed = 0
-        total = len(all_files)
-        with Pool(processes=workers) as p:
-            for result in p.imap(make_thumbnail, all_files):
-                completed += 1
-                print(f"PROGRESS {completed}/{total} FILE {all_files[completed - 1]}")
+    prune_index(
+        dir_path=dir_path, recursive=recursive, all_files=all_files, index=index
+    )
+    pending = (
+        all_files if check_all else get_stale_files(all_files=all_files, index=index)
+    )
+    if not pending:
+        return
+    pending_paths = [fpath for fpath, _, _ in pending]
+    total = len(pending_paths)
+    with Pool(processes=workers) as p:
+        results = p.imap(make_thumbnail, pending_paths)
+        if not machine_progress:
+            results = tqdm(results, total=total)
+        for completed, result in enumerate(results, start=1):
+            record_thumbnail(index, pending[completed - 1])
+            if machine_progress:
+                print(
+                    f"PROGRESS {completed}/{total} FILE {pending_paths[completed - 1]}"
+                )
                 sys.stdout.flush()
-    else:
-        with Pool(processes=workers) as p:
-            list(tqdm(p.imap(make_thumbnail, all_files), total=len(all_files)))
 
 
-def get_all_images(*, all_files: List[Path]) -> List[Path]:
+def index_key(fpath: str) -> str:
+    return f"{current_size}:{fpath}"
+
+
+def get_stale_files(
+    *, all_files: List[Tuple[str, int, int]], index: Dict[str, list]
+) -> List[Tuple[str, int, int]]:
+    """Files that are new, changed or lost their thumbnail since the last run."""
+    thumbnail_dir = get_thumbnail_dir(current_size)
+    try:
+        thumbnails = set(os.listdir(thumbnail_dir))
+    except OSError:
+        thumbnails = set()
+    stale = []
+    for fpath, mtime_ns, size in all_files:
+        entry = index.get(index_key(fpath))
+        if entry is not None and entry[0] == mtime_ns and entry[1] == size:
+            # Failed files are only retried once they change
+            if entry[2] == INDEX_FAILED:
+                continue
+            if os.path.basename(get_thumbnail_path(fpath, current_size)) in thumbnails:
+                continue
+        stale.append((fpath, mtime_ns, size))
+    print("{} of {} files need thumbnails".format(len(stale), len(all_files)))
+    return stale
+
+
+def prune_index(
+    *,
+    dir_path: Path,
+    recursive: bool,
+    all_files: List[Tuple[str, int, int]],
+    index: Dict[str, list],
+) -> None:
+    """Forget files under dir_path that were not found by this scan."""
+    root = str(dir_path)
+    prefix = f"{current_size}:{os.path.join(root, '')}"
+    seen = {index_key(fpath) for fpath, _, _ in all_files}
+    for key in [key for key in index if key.startswith(prefix) and key not in seen]:
+        if recursive or os.path.dirname(key[len(current_size) + 1 :]) == root:
+            del index[key]
+
+
+def record_thumbnail(index: Dict[str, list], file_info: Tuple[str, int, int]) -> None:
+    fpath, mtime_ns, size = file_info
+    state = (
+        INDEX_OK
+        if os.path.exists(get_thumbnail_path(fpath, current_size))
+        else INDEX_FAILED
+    )
+    key = index_key(fpath)
+    index.pop(key, None)
+    index[key] = [mtime_ns, size, state]
+
+
+def get_all_images(
+    *, all_files: List[Tuple[str, int, int]]
+) -> List[Tuple[str, int, int]]:
     img_suffixes = [
         ".jpg",
         ".jpeg",
@@ -156,21 +374,46 @@ def get_all_images(*, all_files: List[Path]) -> List[Path]:
         ".avi",
         ".mov",
     ]
-    all_images = [fpath for fpath in all_files if fpath.suffix.lower() in img_suffixes]
+    all_images = [
+        file_info
+        for file_info in all_files
+        if os.path.splitext(file_info[0])[1].lower() in img_suffixes
+    ]
     print("Found {} images/videos".format(len(all_images)))
     return all_images
 
 
-def get_all_files(*, dir_path: Path, recursive: bool) -> List[Path]:
+def get_all_files(*, dir_path: Path, recursive: bool) -> List[Tuple[str, int, int]]:
+    """(path, mtime_ns, size) for every file, from a single os.scandir pass."""
     if not (dir_path.exists() and dir_path.is_dir()):
         raise ValueError(
             "{} doesn't exist or isn't a valid directory!".format(dir_path.resolve())
         )
-    if recursive:
-        all_files = dir_path.rglob("*")
-    else:
-        all_files = dir_path.glob("*")
-    all_files = [fpath for fpath in all_files if fpath.is_file()]
+    all_files = []
+    pending_dirs = [str(dir_path)]
+    # (device, inode) of every directory entered, so symlinked dirs cannot loop
+    visited = set()
+    while pending_dirs:
+        current_dir = pending_dirs.pop()
+        try:
+            dir_stat = os.stat(current_dir)
+            if (dir_stat.st_dev, dir_stat.st_ino) in visited:
+                continue
+            visited.add((dir_stat.st_dev, dir_stat.st_ino))
+            with os.scandir(current_dir) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            all_files.append(
+                                (entry.path, stat.st_mtime_ns, stat.st_size)
+                            )
+                        elif recursive and entry.is_dir():
+                            pending_dirs.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
     print(
         "Found {} files in the directory: {}".format(len(all_files), dir_path.resolve())
     )
@@ -212,6 +455,12 @@ def get_all_files(*, dir_path: Path, recursive: bool) -> List[Path]:
     default=False,
     help="Print machine-readable progress lines instead of a progress bar",
 )
+@click.option(
+    "--no_index",
+    is_flag=True,
+    default=False,
+    help="Ignore the thumbnail index and check every file",
+)
 def main(
     img_dirs: str,
     size: str,
@@ -219,6 +468,7 @@ def main(
     only_images: bool,
     recursive: bool,
     machine_progress: bool,
+    no_index: bool,
 ) -> None:
     img_dirs = [Path(img_dir) for img_dir in img_dirs.split()]
     global factory, current_size
@@ -227,17 +477,27 @@ def main(
     if GNOME_DESKTOP_AVAILABLE:
         factory = GnomeDesktop.DesktopThumbnailFactory.new(thumbnail_size_map[size])
     else:
-        logger.info("GnomeDesktop not available, using ImageMagick fallback")
+        backend = "ImageMagick"
+        if PYVIPS_AVAILABLE:
+            backend = "pyvips"
+        elif PIL_AVAILABLE:
+            backend = "Pillow"
+        logger.info("GnomeDesktop not available, using {} fallback".format(backend))
         factory = None
 
+    index_path = default_index_path()
+    index = load_index(index_path)
     for img_dir in img_dirs:
         thumbnail_folder(
-            dir_path=img_dir,
+            dir_path=Path(os.path.abspath(img_dir)),
             workers=workers,
             only_images=only_images,
             recursive=recursive,
             machine_progress=machine_progress,
+            index=index,
+            check_all=no_index,
         )
+    store_index(index_path, index)
     print("Thumbnail Generation Completed!")
 
 
@@ -868,12 +868,16 @@ Singleton {
                 return
             }
             root.thumbnailGenerated(thumbgenProc.directory)
+            root.generatePalettePreviews(thumbgenProc.directory)
         }
     }
 
     Process {
         id: thumbgenFallbackProc
-        onExited: root.thumbnailGenerated(thumbgenProc.directory)
+        onExited: {
+            root.thumbnailGenerated(thumbgenProc.directory)
+            root.generatePalettePreviews(thumbgenProc.directory)
+        }
     }
 
     Process {
@@ -888,6 +892,97 @@ Singleton {
         }
     }
 
+    // ── Palette previews ────────────────────────────────────────────────
+    // generate_colors_material.py --batch streams one JSON line per wallpaper
+    // (seed, scheme variant, key tokens) and persists them to an index, so
+    // previews are available on the next start without re-running it.
+    property string palettePreviewIndexPath: `${Directories.cachePath}/wallpaper_palettes.json`
+    property string generateColorsScriptPath: `${FileUtils.trimFileProtocol(Directories.scriptPath)}/colors/generate_colors_material.py`
+    property var palettePreviews: ({})
+    property string _palettePreviewMode: ""
+    property string _queuedPalettePreviewDir: ""
+    readonly property bool palettePreviewGenerationRunning: palettePreviewProc.running
+
+    signal palettePreviewGenerated(string filePath)
+
+    function palettePreviewFor(filePath: string): var {
+        return root.palettePreviews[FileUtils.trimFileProtocol(String(filePath ?? ""))] ?? null
+    }
+
+    function generatePalettePreviews(directory = "", darkMode = Appearance.m3colors.darkmode) {
+        const dir = FileUtils.trimFileProtocol(String(directory || root.directory)).replace(/\/+$/, "")
+        if (!dir || dir.length === 0) return
+        if (palettePreviewProc.running) {
+            root._queuedPalettePreviewDir = dir
+            return
+        }
+
+        const mode = darkMode ? "dark" : "light"
+        if (mode !== root._palettePreviewMode) {
+            root.palettePreviews = ({})
+            root._palettePreviewMode = mode
+        }
+        const paletteType = Config.options?.appearance?.palette?.type ?? "auto"
+        const args = ["--batch", dir, "--batch-index", root.palettePreviewIndexPath, "--mode", mode,
+            "--scheme", paletteType === "auto" ? "scheme-tonal-spot" : paletteType,
+            "--color-strength", String(Config.options?.appearance?.wallpaperTheming?.colorStrength ?? 1.0)]
+        // Same per-wallpaper detection switchwall.sh applies for the auto type
+        if (paletteType === "auto") args.push("--auto-scheme")
+        if (Config.options?.appearance?.softenColors ?? false) args.push("--soften")
+
+        palettePreviewProc.command = ["bash", "-c",
+            "py=\"${INIR_VENV:-${ILLOGICAL_IMPULSE_VIRTUAL_ENV:-$HOME/.local/state/quickshell/.venv}}/bin/python3\"; "
+            + "[ -x \"$py\" ] || py=python3; exec \"$py\" \"$@\"",
+            "palette-previews", root.generateColorsScriptPath].concat(args)
+        palettePreviewProc.running = true
+    }
+
+    FileView {
+        id: palettePreviewIndexFile
+        path: Qt.resolvedUrl("file://" + root.palettePreviewIndexPath)
+        watchChanges: false
+        onLoaded: {
+            try {
+                const index = JSON.parse(palettePreviewIndexFile.text())
+                if (!root._palettePreviewMode || root._palettePreviewMode === index?.settings?.mode) {
+                    root._palettePreviewMode = index?.settings?.mode ?? ""
+                    root.palettePreviews = Object.assign(index?.entries ?? {}, root.palettePreviews)
+                }
+            } catch (e) {
+                console.warn("[Wallpapers] Failed to parse palette index:", e)
+            }
+        }
+    }
+
+    Process {
+        id: palettePreviewProc
+        environment: ({
+            "INIR_VENV": Quickshell.env("INIR_VENV") || Quickshell.env("HOME") + "/.local/state/quickshell/.venv"
+        })
+        stdout: SplitParser {
+            onRead: data => {
+                let entry
+                try {
+                    entry = JSON.parse(data)
+                } catch (e) {
+                    return
+                }
+                if (!entry?.path || entry.error) return
+                const previews = Object.assign({}, root.palettePreviews)
+                previews[entry.path] = entry
+                root.palettePreviews = previews
+                root.palettePreviewGenerated(entry.path)
+            }
+        }
+        onExited: (exitCode, exitStatus) => {
+            if (root._queuedPalettePreviewDir.length > 0) {
+                const dir = root._queuedPalettePreviewDir
+                root._queuedPalettePreviewDir = ""
+                root.generatePalettePreviews(dir)
+            }
+        }
+    }
+
     // ── Auto wallpaper cycling ──────────────────────────────────────────
     readonly property bool autoWallpaperEnabled: Config.options?.background?.autoWallpaper?.enable ?? false
     readonly property int autoWallpaperInterval: Config.options?.background?.autoWallpaper?.intervalMinutes ?? 30
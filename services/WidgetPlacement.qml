@@ -0,0 +1,148 @@
+pragma Singleton
+pragma ComponentBehavior: Bound
+
+import QtQuick
+import Quickshell
+import Quickshell.Io
+
+/**
+ * Batches least-busy-region placement for background widgets.
+ *
+ * Widgets call request() when the wallpaper (or their size) changes. Requests
+ * arriving within a short window are sent together to one
+ * `least_busy_region.py --batch` process per wallpaper, which decodes and
+ * analyzes the image once and keeps widgets on the same screen from
+ * overlapping. Each widget gets its own result through its callback.
+ * Widgets placed by earlier batches are sent along as fixed rects, so a
+ * widget placed on its own still stays clear of the rest.
+ */
+Singleton {
+    id: root
+
+    // id -> { wallpaperPath, query, callback }
+    property var _pending: ({})
+    // id -> { wallpaperPath, query, callback }, for the batch currently running
+    property var _inFlight: ({})
+    // id -> { wallpaperPath, screen, rect: [x, y, w, h] }, last known placement
+    property var _placements: ({})
+
+    /**
+     * @param id Unique per widget and screen, e.g. "clock@DP-1"
+     * @param query least_busy_region.py batch query: screen, screen_width,
+     *        screen_height, width, height, horizontal_padding,
+     *        vertical_padding, busiest, reserve, fixed
+     * @param callback Called with the parsed result ({ center_x, center_y,
+     *        dominant_color, ... } or { error })
+     */
+    function request(id: string, wallpaperPath: string, query: var, callback: var): void {
+        if (!wallpaperPath || wallpaperPath.length === 0)
+            return;
+        root._pending[id] = {
+            wallpaperPath: wallpaperPath,
+            query: Object.assign({}, query, { id: id }),
+            callback: callback
+        };
+        batchTimer.restart();
+    }
+
+    function cancel(id: string): void {
+        delete root._pending[id];
+        delete root._inFlight[id];
+        delete root._placements[id];
+    }
+
+    function _flush(): void {
+        if (placementProc.running)
+            return; // picked up again when the running batch exits
+        const ids = Object.keys(root._pending);
+        if (ids.length === 0)
+            return;
+        // One process per wallpaper; requests for another path wait for the next round
+        const wallpaperPath = root._pending[ids[0]].wallpaperPath;
+        const queries = [];
+        const inFlight = {};
+        for (const id of ids) {
+            const entry = root._pending[id];
+            if (entry.wallpaperPath !== wallpaperPath)
+                continue;
+            queries.push(entry.query);
+            inFlight[id] = entry;
+            delete root._pending[id];
+        }
+        // screen -> rects of widgets on this wallpaper that are not being re-placed
+        const fixed = {};
+        for (const id of Object.keys(root._placements)) {
+            const placement = root._placements[id];
+            if (inFlight[id] || placement.wallpaperPath !== wallpaperPath)
+                continue;
+            (fixed[placement.screen] = fixed[placement.screen] || []).push(placement.rect);
+        }
+        root._inFlight = inFlight;
+        placementProc.input = JSON.stringify({ image_path: wallpaperPath, queries: queries, fixed: fixed });
+        placementProc.stdinEnabled = true;
+        placementProc.running = true;
+    }
+
+    function _deliver(output: string): void {
+        const inFlight = root._inFlight;
+        root._inFlight = {};
+        if (!output || output.length === 0)
+            return;
+        let results = [];
+        try {
+            results = JSON.parse(output);
+        } catch (e) {
+            console.warn("[WidgetPlacement] Invalid output:", e);
+            return;
+        }
+        for (const result of results) {
+            const entry = inFlight[result.id];
+            if (!entry)
+                continue;
+            const query = entry.query;
+            if (query.reserve === false) {
+                if (query.fixed)
+                    root._placements[result.id] = { wallpaperPath: entry.wallpaperPath, screen: query.screen, rect: query.fixed };
+            } else if (!result.error) {
+                root._placements[result.id] = {
+                    wallpaperPath: entry.wallpaperPath,
+                    screen: query.screen,
+                    rect: [result.center_x - Math.floor(query.width / 2), result.center_y - Math.floor(query.height / 2), query.width, query.height]
+                };
+            }
+            try {
+                entry.callback(result);
+            } catch (e) {
+                // The widget went away while the batch was running
+            }
+        }
+    }
+
+    Timer {
+        id: batchTimer
+        interval: 150
+        repeat: false
+        onTriggered: root._flush()
+    }
+
+    Process {
+        id: placementProc
+        property string input: ""
+        command: [Quickshell.shellPath("scripts/images/least-busy-region-venv.sh"), "--batch"]
+        stdinEnabled: true
+        onRunningChanged: {
+            if (placementProc.running) {
+                placementProc.write(placementProc.input);
+                placementProc.stdinEnabled = false; // closes stdin so the script sees EOF
+            }
+        }
+        stdout: StdioCollector {
+            id: placementOutputCollector
+            onStreamFinished: root._deliver(placementOutputCollector.text)
+        }
+        onExited: (exitCode, exitStatus) => {
+            if (Object.keys(root._pending).length > 0)
+                batchTimer.restart();
+        }
+    }
+}